@@ -0,0 +1,38 @@
+"""
+Конфигурация gunicorn для запуска через ASGI с воркерами uvicorn:
+
+    gunicorn -c gunicorn_asgi.py tender_service.asgi:application
+
+С preload_app (по умолчанию) приложение, URLconf, вьюсеты и
+сериализаторы загружаются один раз в мастер-процессе, и воркеры получают
+их после fork готовыми: новый воркер при масштабировании и перезапуске
+сразу принимает запросы. GUNICORN_PRELOAD=false загружает приложение в
+каждом воркере (например, для перезапуска воркеров с новым кодом по HUP)
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8080')
+worker_class = 'uvicorn.workers.UvicornWorker'
+workers = int(os.environ.get('GUNICORN_WORKERS',
+                             multiprocessing.cpu_count() * 2 + 1))
+keepalive = 5
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in (
+    'true', '1', 'yes')
+
+
+def on_starting(server):
+    """
+    Загружает URLconf в мастере: Django импортирует его при первом
+    запросе, и без этого каждый воркер тратил бы время на импорт вьюсетов
+    уже после fork
+    """
+    if server.cfg.preload_app:
+        from django.db import connections
+        from django.urls import get_resolver
+
+        get_resolver().url_patterns
+        # Соединения мастера не должны попасть в воркеры
+        connections.close_all()
@@ -1,16 +1,21 @@
-"""
-ASGI config for tender_service project.
-
-It exposes the ASGI callable as a module-level variable named ``application``.
-
-For more information on this file, see
-https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
-"""
-
-import os
-
-from django.core.asgi import get_asgi_application
-
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tender_service.settings')
-
-application = get_asgi_application()
+"""
+ASGI config for tender_service project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tender_service.settings')
+# Чтение списков и объектов обслуживают async-обработчики
+os.environ.setdefault('ASYNC_READ_PATH', 'True')
+# В асинхронном режиме соединения открываются в потоках запросов, поэтому
+# постоянные соединения не используются (пул — на стороне базы, PgBouncer)
+os.environ.setdefault('POSTGRES_CONN_MAX_AGE', '0')
+
+application = get_asgi_application()
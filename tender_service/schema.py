@@ -0,0 +1,119 @@
+"""
+OpenAPI-схема API для /swagger/ и /redoc/.
+
+Построение схемы обходит все вьюсеты и сериализаторы, поэтому схема
+генерируется заранее командой generate_schema (при сборке образа) в файлы
+SCHEMA_DIR/openapi-<версия кода>.json и .yaml. Файл читается один раз и
+хранится в памяти процесса по версии кода; ответ отдается с сильным ETag
+(версия кода) и Cache-Control. Если файла для текущей версии нет, схема
+строится во время запроса только при DEBUG, иначе ответ 503. Страницы
+Swagger UI и ReDoc схему не строят: они загружают ее по ?format=openapi
+"""
+import functools
+import hashlib
+from pathlib import Path
+
+import drf_yasg
+import rest_framework
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.generators import OpenAPISchemaGenerator
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions, status
+from rest_framework.response import Response
+
+INFO = openapi.Info(
+    title="Tender API",
+    default_version='v1',
+)
+# Форматы схемы: (кодек, тип содержимого) по расширению файла
+FORMATS = {
+    'json': (OpenAPICodecJson, 'application/json'),
+    'yaml': (OpenAPICodecYaml, 'application/yaml'),
+}
+# Расширение файла для формата рендерера drf_yasg
+RENDERER_FORMATS = {'openapi': 'json', '.json': 'json', '.yaml': 'yaml'}
+# Каталоги с исходным кодом, от которого зависит схема
+SOURCE_DIRS = ('tender_service', 'tenders')
+
+_schemas = {}
+
+
+@functools.cache
+def code_version():
+    """
+    Версия кода: CODE_VERSION (например, хеш коммита) или хеш исходников
+    приложения и версий DRF и drf_yasg
+    """
+    if settings.CODE_VERSION:
+        return settings.CODE_VERSION
+    digest = hashlib.sha256(
+        f'{rest_framework.VERSION}:{drf_yasg.__version__}'.encode())
+    base_dir = Path(settings.BASE_DIR)
+    for directory in SOURCE_DIRS:
+        for path in sorted((base_dir / directory).rglob('*.py')):
+            digest.update(str(path.relative_to(base_dir)).encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def schema_path(extension, directory=None):
+    directory = Path(directory or settings.SCHEMA_DIR)
+    return directory / f'openapi-{code_version()}.{extension}'
+
+
+def generate(extension):
+    """Строит схему интроспекцией вьюсетов. Возвращает байты файла"""
+    codec_class, _ = FORMATS[extension]
+    schema = OpenAPISchemaGenerator(INFO).get_schema(request=None,
+                                                     public=True)
+    return codec_class(validators=[]).encode(schema)
+
+
+def load(extension):
+    """
+    Схема текущей версии кода из памяти, файла или, при DEBUG, построенная
+    заново. None, если схемы нет
+    """
+    key = code_version(), extension
+    content = _schemas.get(key)
+    if content is None:
+        path = schema_path(extension)
+        if path.exists():
+            content = path.read_bytes()
+        elif settings.DEBUG:
+            content = generate(extension)
+        else:
+            return None
+        _schemas[key] = content
+    return content
+
+
+class SchemaView(get_schema_view(
+        INFO, public=True, permission_classes=(permissions.AllowAny,))):
+    """Схема из load() вместо построения на каждый запрос"""
+
+    def get(self, request, version='', format=None):
+        extension = RENDERER_FORMATS.get(request.accepted_renderer.format)
+        if extension is None:
+            # Страница Swagger UI или ReDoc
+            return super().get(request, version, format)
+
+        content = load(extension)
+        if content is None:
+            return Response(
+                {'detail': 'Schema is not generated, run '
+                           'manage.py generate_schema.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        etag = quote_etag(code_version())
+        response = get_conditional_response(request, etag=etag) \
+            or HttpResponse(content, content_type=FORMATS[extension][1])
+        response['ETag'] = etag
+        response['Vary'] = 'Accept'
+        patch_cache_control(response, public=True,
+                            max_age=settings.SCHEMA_MAX_AGE)
+        return response
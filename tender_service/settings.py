@@ -1,122 +1,247 @@
-from pathlib import Path
-from decouple import config
-
-# Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent
-
-# Quick-start development settings - unsuitable for production
-# See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
-
-# SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-p6!wpb98abu5g7flh$b4a)i=-ikj%j50j((20h5^)hbp1ks%#-'
-
-# SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
-
-ALLOWED_HOSTS = []
-
-# Application definition
-
-INSTALLED_APPS = [
-    'django.contrib.admin',
-    'django.contrib.auth',
-    'django.contrib.contenttypes',
-    'django.contrib.sessions',
-    'django.contrib.messages',
-    'django.contrib.staticfiles',
-
-    'tenders',
-    'rest_framework',
-    'django_filters',
-    'drf_yasg',
-]
-
-MIDDLEWARE = [
-    'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
-    'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
-]
-
-ROOT_URLCONF = 'tender_service.urls'
-
-TEMPLATES = [
-    {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
-        'APP_DIRS': True,
-        'OPTIONS': {
-            'context_processors': [
-                'django.template.context_processors.debug',
-                'django.template.context_processors.request',
-                'django.contrib.auth.context_processors.auth',
-                'django.contrib.messages.context_processors.messages',
-            ],
-        },
-    },
-]
-
-WSGI_APPLICATION = 'tender_service.wsgi.application'
-
-# Database
-# https://docs.djangoproject.com/en/5.1/ref/settings/#databases
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': config('POSTGRES_DATABASE'),
-        'USER': config('POSTGRES_USERNAME'),
-        'PASSWORD': config('POSTGRES_PASSWORD'),
-        'HOST': config('POSTGRES_HOST'),
-        'PORT': config('POSTGRES_PORT', default=5432),
-    }
-}
-
-# Password validation
-# https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
-
-AUTH_PASSWORD_VALIDATORS = [
-    {
-        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
-    },
-]
-
-# Internationalization
-# https://docs.djangoproject.com/en/5.1/topics/i18n/
-
-LANGUAGE_CODE = 'en-us'
-
-TIME_ZONE = 'UTC'
-
-USE_I18N = True
-
-USE_TZ = True
-
-# Static files (CSS, JavaScript, Images)
-# https://docs.djangoproject.com/en/5.1/howto/static-files/
-
-STATIC_URL = 'static/'
-
-# Default primary key field type
-# https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
-
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-
-REST_FRAMEWORK = {
-    'DEFAULT_FILTER_BACKENDS':
-        ['django_filters.rest_framework.DjangoFilterBackend'],
-}
-
-APPEND_SLASH = False
+from pathlib import Path
+from decouple import Csv, config
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = 'django-insecure-p6!wpb98abu5g7flh$b4a)i=-ikj%j50j((20h5^)hbp1ks%#-'
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = True
+
+ALLOWED_HOSTS = []
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+
+    'tenders',
+    'rest_framework',
+    'django_filters',
+    'drf_yasg',
+]
+
+MIDDLEWARE = [
+    'tenders.middleware.RequestMetricsMiddleware',
+    'tenders.middleware.LoadSheddingMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'tenders.middleware.ReplicaRoutingMiddleware',
+]
+
+ROOT_URLCONF = 'tender_service.urls'
+
+# Админка (/admin/) и документация API (/swagger/, /redoc/). Профиль
+# tender_service.settings_production по умолчанию их отключает
+ENABLE_ADMIN = True
+ENABLE_DOCS = True
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'tender_service.wsgi.application'
+
+# Database
+# https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': config('POSTGRES_DATABASE'),
+        'USER': config('POSTGRES_USERNAME'),
+        'PASSWORD': config('POSTGRES_PASSWORD'),
+        'HOST': config('POSTGRES_HOST'),
+        'PORT': config('POSTGRES_PORT', default=5432),
+        # Постоянные соединения с проверкой перед повторным использованием
+        'CONN_MAX_AGE': config('POSTGRES_CONN_MAX_AGE', default=60,
+                               cast=int),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+# Реплики для чтения: список host[:port] через запятую. Учетные данные и
+# имя базы совпадают с основной
+DATABASE_REPLICAS = []
+for index, address in enumerate(config('POSTGRES_REPLICA_HOSTS', default='',
+                                       cast=Csv())):
+    host, _, port = address.partition(':')
+    alias = f'replica_{index + 1}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['tenders.routers.ReplicaRouter']
+
+# Сколько секунд после изменения клиент читает из основной базы
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=5,
+                                cast=int)
+# Кэш Django, в котором по IP клиента отмечаются недавние изменения
+# (общий для всех воркеров, например с Redis, чтобы отметка действовала
+# в любом воркере)
+REPLICA_STICKY_CACHE = config('REPLICA_STICKY_CACHE', default='default')
+# На сколько секунд исключать из выбора недоступную реплику
+REPLICA_RETRY_SECONDS = config('REPLICA_RETRY_SECONDS', default=30,
+                               cast=int)
+
+# Password validation
+# https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+# Internationalization
+# https://docs.djangoproject.com/en/5.1/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_TZ = True
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/5.1/howto/static-files/
+
+STATIC_URL = 'static/'
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+REST_FRAMEWORK = {
+    'DEFAULT_FILTER_BACKENDS': [
+        'django_filters.rest_framework.DjangoFilterBackend',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'tenders.pagination.KeysetPagination',
+    'DEFAULT_RENDERER_CLASSES': [
+        'tenders.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'PAGE_SIZE': 50,
+}
+
+APPEND_SLASH = False
+
+# Кэш проверки ответственности за организацию (tenders.responsibility)
+RESPONSIBILITY_CACHE_TTL = config('RESPONSIBILITY_CACHE_TTL', default=30,
+                                  cast=int)
+RESPONSIBILITY_CACHE_SIZE = config('RESPONSIBILITY_CACHE_SIZE',
+                                   default=10000, cast=int)
+
+# Максимальное число элементов в запросах /tenders/bulk и /bids/bulk
+BULK_MAX_ITEMS = config('BULK_MAX_ITEMS', default=1000, cast=int)
+
+# Каждая N-я версия истории хранится полностью, остальные — разницей
+VERSION_KEYFRAME_INTERVAL = config('VERSION_KEYFRAME_INTERVAL', default=20,
+                                   cast=int)
+
+# Размер порции при потоковой выгрузке (/tenders/export, /bids/export)
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Асинхронные обработчики чтения (tenders.async_views). Включаются в
+# tender_service.asgi
+ASYNC_READ_PATH = config('ASYNC_READ_PATH', default=False, cast=bool)
+
+# Ограничение частоты запросов корзинами токенов (tenders.throttling):
+# 'N/период' (s, min, hour, day) для чтения, поиска и изменений отдельно
+# по IP, сотруднику и организации; пустое значение отключает ограничение
+THROTTLE_RATES = {
+    'read': config('THROTTLE_READ_RATE', default='1200/min'),
+    'search': config('THROTTLE_SEARCH_RATE', default='300/min'),
+    'write': config('THROTTLE_WRITE_RATE', default='300/min'),
+}
+# Кэш Django для корзин, общий для всех воркеров (например, default с
+# Redis); пусто — корзины в памяти каждого процесса
+THROTTLE_CACHE = config('THROTTLE_CACHE', default='')
+
+CACHES = {
+    'default': {
+        'BACKEND': config(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
+# Максимум одновременно обрабатываемых запросов в процессе, сверх него
+# ответ 503 (0 — без ограничения), и значение Retry-After в секундах
+MAX_IN_FLIGHT_REQUESTS = config('MAX_IN_FLIGHT_REQUESTS', default=100,
+                                cast=int)
+LOAD_SHEDDING_RETRY_AFTER = config('LOAD_SHEDDING_RETRY_AFTER', default=1,
+                                   cast=int)
+
+# Закрытые тендеры, не менявшиеся столько дней, переносятся в архив
+# командой archive_tenders
+ARCHIVE_AFTER_DAYS = config('ARCHIVE_AFTER_DAYS', default=180, cast=int)
+
+# Журнал изменений /api/changes (tenders.changes): интервал опроса при
+# ожидании, максимальное ожидание long-poll, срок жизни и интервал
+# keepalive потока SSE (секунды), максимальный размер пакета и срок
+# хранения записей (дни)
+CHANGES_POLL_INTERVAL = config('CHANGES_POLL_INTERVAL', default=0.5,
+                               cast=float)
+CHANGES_MAX_WAIT = config('CHANGES_MAX_WAIT', default=30, cast=int)
+CHANGES_STREAM_SECONDS = config('CHANGES_STREAM_SECONDS', default=300,
+                                cast=int)
+CHANGES_HEARTBEAT_SECONDS = config('CHANGES_HEARTBEAT_SECONDS', default=15,
+                                   cast=int)
+CHANGES_MAX_LIMIT = config('CHANGES_MAX_LIMIT', default=1000, cast=int)
+CHANGES_RETENTION_DAYS = config('CHANGES_RETENTION_DAYS', default=7,
+                                cast=int)
+
+# Срок хранения ответов на запросы с Idempotency-Key (секунды), см.
+# tenders.idempotency
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=86400, cast=int)
+
+# OpenAPI-схема (tender_service.schema): каталог файлов, которые создает
+# generate_schema, время кэширования ответа клиентами (секунды) и версия
+# кода для имени файла (пусто — хеш исходников)
+SCHEMA_DIR = config('SCHEMA_DIR', default=str(BASE_DIR / 'schema'))
+SCHEMA_MAX_AGE = config('SCHEMA_MAX_AGE', default=3600, cast=int)
+CODE_VERSION = config('CODE_VERSION', default='')
@@ -0,0 +1,52 @@
+"""
+Профиль настроек для продакшена:
+
+    DJANGO_SETTINGS_MODULE=tender_service.settings_production
+
+Воркеры, которые обслуживают только /api/, не загружают админку,
+сессии, сообщения и drf_yasg (он импортирует pkg_resources), поэтому
+запускаются быстрее. Админка и документация включаются переменными
+ENABLE_ADMIN и ENABLE_DOCS, например в отдельном деплойменте. Время
+запуска профилей сравнивает команда benchmark_startup
+"""
+from decouple import Csv, config
+
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS, MIDDLEWARE, REST_FRAMEWORK
+
+DEBUG = config('DEBUG', default=False, cast=bool)
+
+# По умолчанию те же адреса, что Django разрешает при DEBUG
+ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost,127.0.0.1,[::1]',
+                       cast=Csv())
+
+ENABLE_ADMIN = config('ENABLE_ADMIN', default=False, cast=bool)
+ENABLE_DOCS = config('ENABLE_DOCS', default=False, cast=bool)
+
+# Приложения и middleware, которые нужны только админке и документации
+ADMIN_APPS = ('django.contrib.admin', 'django.contrib.sessions',
+              'django.contrib.messages')
+ADMIN_MIDDLEWARE = (
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+)
+DOCS_APPS = ('drf_yasg',)
+STATIC_APPS = ('django.contrib.staticfiles',)
+
+disabled = set()
+if not ENABLE_ADMIN:
+    disabled.update(ADMIN_APPS, ADMIN_MIDDLEWARE)
+if not ENABLE_DOCS:
+    disabled.update(DOCS_APPS)
+if not ENABLE_ADMIN and not ENABLE_DOCS:
+    disabled.update(STATIC_APPS)
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in disabled]
+MIDDLEWARE = [name for name in MIDDLEWARE if name not in disabled]
+
+# API отдает только JSON: HTML-страницы DRF без админки и документации не
+# нужны
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': ['tenders.renderers.JSONRenderer'],
+}
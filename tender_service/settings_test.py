@@ -0,0 +1,16 @@
+"""
+Профиль настроек для тестов:
+
+    python manage.py test tenders --settings=tender_service.settings_test
+
+Добавляет зеркало основной базы replica_test для тестов маршрутизации
+чтения (tenders.tests.ReplicaRoutingTests). В DATABASE_REPLICAS оно не
+входит, поэтому обычные запросы работают без реплик
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+DATABASES = {
+    **DATABASES,
+    'replica_test': {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}},
+}
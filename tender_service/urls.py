@@ -1,23 +1,25 @@
-from django.contrib import admin
-from django.urls import path, include
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-from rest_framework import permissions
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Tender API",
-        default_version='v1',
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
-
-urlpatterns = [
-    path('admin/', admin.site.urls),
-    path('api/', include('tenders.urls')),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0),
-         name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0),
-         name='schema-redoc'),
-]
+from django.conf import settings
+from django.urls import path, include
+
+urlpatterns = [
+    path('api/', include('tenders.urls')),
+]
+
+# Админка и документация импортируются, только если включены
+# (см. tender_service.settings_production)
+if settings.ENABLE_ADMIN:
+    from django.contrib import admin
+
+    urlpatterns += [
+        path('admin/', admin.site.urls),
+    ]
+
+if settings.ENABLE_DOCS:
+    from .schema import SchemaView
+
+    urlpatterns += [
+        path('swagger/', SchemaView.with_ui('swagger'),
+             name='schema-swagger-ui'),
+        path('redoc/', SchemaView.with_ui('redoc'),
+             name='schema-redoc'),
+    ]
@@ -1,6 +1,9 @@
-from django.apps import AppConfig
-
-
-class TendersConfig(AppConfig):
-    default_auto_field = 'django.db.models.BigAutoField'
-    name = 'tenders'
+from django.apps import AppConfig
+
+
+class TendersConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'tenders'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,130 @@
+"""
+Архив закрытых тендеров.
+
+Закрытые тендеры, которые не менялись дольше заданного срока, вместе с
+предложениями, версиями и отзывами переносятся в таблицы Archived* с
+теми же колонками и id: INSERT ... SELECT и DELETE пакетами, каждый
+пакет в своей транзакции. Действующие эндпоинты читают только
+действующие таблицы, поэтому их индексы не растут вместе с архивом. В
+режиме ?include_archived=true списки и объекты читаются из
+представлений tenders_tender_all и tenders_bid_all (UNION ALL
+действующей и архивной таблицы). Архив доступен только для чтения;
+поиск по нему выполняется без полнотекстового индекса. Перенос в архив
+и возврат из него записываются в журнал изменений (archived, restored)
+для тендеров и их предложений в транзакции пакета
+"""
+import datetime
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .changes import publish
+from .models import (ArchivedBid, ArchivedBidVersion, ArchivedReview,
+                     ArchivedTender, ArchivedTenderVersion, Bid, BidVersion,
+                     Review, Tender, TenderVersion)
+from .serializers import BidSerializer, TenderSerializer
+
+# Пары (действующая таблица, архивная) в порядке вставки: сначала
+# родительские строки
+TABLES = (
+    (Tender, ArchivedTender),
+    (TenderVersion, ArchivedTenderVersion),
+    (Bid, ArchivedBid),
+    (BidVersion, ArchivedBidVersion),
+    (Review, ArchivedReview),
+)
+# Таблицы, строки которых относятся к тендеру через предложение
+BID_CHILDREN = {
+    BidVersion: Bid,
+    Review: Bid,
+    ArchivedBidVersion: ArchivedBid,
+    ArchivedReview: ArchivedBid,
+}
+# Действия, которые в режиме include_archived читают и архив
+ARCHIVE_ACTIONS = ('list', 'retrieve', 'list_my_items',
+                   'list_bids_for_tender', 'export')
+
+
+def include_archived(request):
+    """Запрос на чтение с параметром include_archived=true"""
+    return request.method in ('GET', 'HEAD') and request.GET.get(
+        'include_archived', '').lower() in ('true', '1', 'yes')
+
+
+def _rows(model, tender_ids):
+    """Строки таблицы model, относящиеся к тендерам tender_ids"""
+    if model in (Tender, ArchivedTender):
+        return model.objects.filter(id__in=tender_ids)
+    bid_model = BID_CHILDREN.get(model)
+    if bid_model is None:
+        return model.objects.filter(tender_id__in=tender_ids)
+    return model.objects.filter(bid_id__in=bid_model.objects.filter(
+        tender_id__in=tender_ids).values('id'))
+
+
+def _copy(source, target, tender_ids):
+    """INSERT INTO target SELECT ... FROM source для тендеров tender_ids"""
+    fields = [field.attname for field in target._meta.concrete_fields]
+    sql, params = _rows(source, tender_ids).order_by() \
+        .values_list(*fields).query.sql_with_params()
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(target._meta.get_field(name).column)
+                        for name in fields)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(target._meta.db_table)} ({columns}) {sql}',
+            params)
+
+
+def _move(pairs, tender_ids):
+    for source, target in pairs:
+        _copy(source, target, tender_ids)
+    for source, _ in reversed(pairs):
+        _rows(source, tender_ids).delete()
+
+
+def archive_candidates(days):
+    cutoff = timezone.now() - datetime.timedelta(days=days)
+    return Tender.objects.filter(status='CLOSED', updated_at__lt=cutoff)
+
+
+def archive(days, batch_size=500):
+    """
+    Переносит в архив закрытые тендеры, не менявшиеся days дней.
+    Возвращает итератор по числу тендеров в каждом пакете. Заблокированные
+    другими транзакциями тендеры пропускаются до следующего запуска
+    """
+    while True:
+        with transaction.atomic():
+            ids = list(archive_candidates(days)
+                       .select_for_update(skip_locked=True).order_by('id')
+                       .values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return
+            publish('archived', [
+                *Tender.objects.filter(id__in=ids).only('id', 'version'),
+                *Bid.objects.filter(tender_id__in=ids).only('id', 'version'),
+            ])
+            _move(TABLES, ids)
+        yield len(ids)
+
+
+def restore(tender_ids, batch_size=500):
+    """
+    Возвращает тендеры из архива вместе с предложениями, версиями и
+    отзывами. Возвращает итератор по числу тендеров в каждом пакете
+    """
+    tender_ids = sorted(set(tender_ids))
+    pairs = [(target, source) for source, target in TABLES]
+    for start in range(0, len(tender_ids), batch_size):
+        with transaction.atomic():
+            ids = list(ArchivedTender.objects.select_for_update().filter(
+                id__in=tender_ids[start:start + batch_size])
+                .values_list('id', flat=True))
+            if ids:
+                _move(pairs, ids)
+                publish('restored', Tender.objects.filter(id__in=ids),
+                        TenderSerializer)
+                publish('restored', Bid.objects.filter(tender_id__in=ids),
+                        BidSerializer)
+        yield len(ids)
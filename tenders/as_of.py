@@ -0,0 +1,85 @@
+"""
+Просмотр тендеров и предложений на момент времени (?as_of=<время>).
+
+Список и объект отдаются в том состоянии, в котором они были в момент
+as_of: объекты, созданные позже, не попадают в ответ, а для измененных
+после as_of состояние восстанавливается по истории версий (см.
+tenders.history.states_as_of) одним запросом на страницу. Фильтры
+status и service_type применяются к состоянию на момент as_of.
+Удаленные и перенесенные в архив объекты в ответ не попадают
+"""
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from .archive import include_archived
+from .history import states_as_of
+
+AS_OF_ACTIONS = ('list', 'retrieve')
+
+
+def parse_as_of(value):
+    """Момент времени из значения параметра as_of"""
+    try:
+        return serializers.DateTimeField().run_validation(value)
+    except ValidationError as exc:
+        raise ValidationError({'as_of': exc.detail}) from None
+
+
+class AsOfMixin:
+    """Режим ?as_of= для действий list и retrieve вьюсета"""
+
+    # Фильтры по состоянию на момент as_of
+    as_of_filterset_class = None
+    as_of = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.as_of = self.get_as_of(request)
+        if self.as_of is not None:
+            self.filterset_class = self.as_of_filterset_class
+
+    def get_as_of(self, request):
+        """Момент времени из параметра as_of или None"""
+        value = request.query_params.get('as_of')
+        if not value or self.action not in AS_OF_ACTIONS:
+            return None
+        if include_archived(request):
+            raise ValidationError(
+                {'as_of': 'Cannot be combined with include_archived.'})
+        if request.query_params.get('q'):
+            raise ValidationError(
+                {'as_of': 'Full-text search is not available with as_of.'})
+        return parse_as_of(value)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.as_of is None:
+            return queryset
+        return queryset.filter(created_at__lte=self.as_of)
+
+    def get_states(self, ids):
+        return states_as_of(self.queryset.model, self.as_of, ids)
+
+    def get_object(self):
+        instance = super().get_object()
+        if self.as_of is not None:
+            state = self.get_states([instance.pk]).get(instance.pk, {})
+            for field, value in state.items():
+                setattr(instance, field, value)
+            if state and instance.updated_at is None:
+                instance.updated_at = instance.created_at
+        return instance
+
+    def paginated_response(self, queryset):
+        if self.as_of is None:
+            return super().paginated_response(queryset)
+        reader = self.get_values_serializer()
+        page = self.paginate_queryset(reader.values(queryset))
+        states = self.get_states([row['id'] for row in page])
+        for row in page:
+            state = states.get(row['id'])
+            if state:
+                row.update(state)
+                if row['updated_at'] is None:
+                    row['updated_at'] = row['created_at']
+        return self.get_paginated_response(reader.represent(page))
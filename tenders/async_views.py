@@ -0,0 +1,235 @@
+"""
+Асинхронные обработчики чтения для ASGI (async ORM).
+
+Повторяют ответы соответствующих действий TenderViewSet и BidViewSet:
+список, объект, my, bids/{id}/list и bids/{id}/reviews. Запросы с
+другими методами на те же адреса передаются синхронному вьюсету.
+Подключаются в tenders.urls, если включен ASYNC_READ_PATH
+"""
+import abc
+import inspect
+
+from asgiref.sync import sync_to_async
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+
+from .archive import include_archived
+from .conditional import (alist_validators, list_not_modified,
+                          not_modified, set_validators, version_etag)
+from .fieldsets import REQUIRED_COLUMNS, only_fields, requested_fields
+from .models import Tender, Bid, Review, TenderWithArchive
+from .renderers import json_response
+from .responsibility import employee_id_for_username, \
+    is_responsible_by_username
+from .serializers import ReviewSerializer, values_serializer
+from .throttling import acheck, throttled_detail
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncReadView(View, metaclass=abc.ABCMeta):
+    """
+    Базовый асинхронный обработчик. GET и HEAD обрабатываются методом
+    read, остальные методы и запросы с ?as_of= — синхронным
+    представлением fallback. Подключить в URLconf можно только
+    подкласс, реализующий read
+    """
+
+    view_is_async = True
+    replica_reads = True
+    viewset = None
+    fallback = None
+    # Имя соответствующего действия вьюсета (для метрик)
+    action = None
+    # Сериализатор ответа, если он отличается от сериализатора вьюсета
+    serializer_class = None
+    # Поля ответа из ?fields= и ?exclude= (см. tenders.fieldsets)
+    response_fields = None
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD') and not self.delegate(request):
+            wait = await acheck(request)
+            if wait:
+                detail, retry_after = throttled_detail(wait)
+                response = json_response(
+                    {'detail': detail}, status.HTTP_429_TOO_MANY_REQUESTS)
+                response['Retry-After'] = retry_after
+                return response
+            try:
+                self.response_fields = requested_fields(
+                    request.GET, (self.get_serializer_class(),))
+                return await self.read(request, *args, **kwargs)
+            except APIException as exc:
+                return self.handle_exception(exc)
+        if self.fallback is None:
+            return self.http_method_not_allowed(request, *args, **kwargs)
+        return await sync_to_async(self.fallback)(request, *args, **kwargs)
+
+    @staticmethod
+    def handle_exception(exc):
+        """
+        Ответ на исключение DRF в том же формате, что и у вьюсета
+        (rest_framework.views.exception_handler)
+        """
+        data = exc.detail if isinstance(exc.detail, (list, dict)) \
+            else {'detail': exc.detail}
+        return json_response(data, exc.status_code)
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        if inspect.isabstract(cls):
+            raise TypeError(f'{cls.__name__}: не реализован метод read')
+        return super().as_view(**initkwargs)
+
+    @abc.abstractmethod
+    async def read(self, request, *args, **kwargs):
+        """Ответ на GET и HEAD"""
+
+    def delegate(self, request):
+        """Состояние на момент ?as_of= собирает синхронный вьюсет"""
+        return self.fallback is not None and bool(request.GET.get('as_of'))
+
+    def get_queryset(self):
+        if include_archived(self.request):
+            return self.viewset.archive_model.objects.all()
+        return self.viewset.queryset.all()
+
+    def get_serializer_class(self):
+        return self.serializer_class or self.viewset.serializer_class
+
+    @property
+    def reader(self):
+        return values_serializer(self.get_serializer_class(),
+                                 self.response_fields)
+
+    async def conditional_list(self, request, queryset):
+        """
+        Асинхронный вариант ConditionalGetMixin.conditional_list:
+        постраничный список или 304
+        """
+        etag, last_modified = await alist_validators(queryset)
+        response = list_not_modified(request, etag)
+        if response is not None:
+            return response
+
+        drf_request = Request(request)
+        paginator = self.viewset.pagination_class()
+        page = await paginator.apaginate_queryset(
+            self.reader.values(queryset), drf_request)
+        data = self.reader.represent(page)
+        response = json_response(paginator.get_paginated_response(data).data)
+        return set_validators(response, etag, last_modified)
+
+
+class AsyncListView(AsyncReadView):
+    """Список объектов с фильтрами (GET /tenders, GET /bids)"""
+
+    action = 'list'
+
+    async def read(self, request):
+        filterset_class = self.viewset.archive_filterset_class \
+            if include_archived(request) else self.viewset.filterset_class
+        filterset = filterset_class(
+            request.GET, queryset=self.get_queryset(), request=request)
+        if not filterset.is_valid():
+            return json_response(filterset.errors,
+                                 status.HTTP_400_BAD_REQUEST)
+        return await self.conditional_list(request, filterset.qs)
+
+
+class AsyncDetailView(AsyncReadView):
+    """Объект по id (GET /tenders/{id}, GET /bids/{id})"""
+
+    action = 'retrieve'
+
+    async def read(self, request, pk):
+        queryset = only_fields(self.get_queryset(),
+                               self.get_serializer_class(),
+                               self.response_fields, *REQUIRED_COLUMNS)
+        instance = await queryset.filter(pk=pk).afirst()
+        if instance is None:
+            model_name = self.viewset.queryset.model._meta.object_name
+            return json_response(
+                {"detail": f"No {model_name} matches the given query."},
+                status.HTTP_404_NOT_FOUND)
+
+        etag = version_etag(instance)
+        response = not_modified(request, etag, instance.updated_at)
+        if response is not None:
+            return response
+        response = json_response(self.get_serializer_class()(
+            instance, fields=self.response_fields).data)
+        return set_validators(response, etag, instance.updated_at)
+
+
+class AsyncMyListView(AsyncReadView):
+    """Объекты, созданные пользователем (GET /tenders/my, GET /bids/my)"""
+
+    action = 'list_my_items'
+
+    async def read(self, request):
+        username = request.GET.get('username')
+        if not username:
+            return json_response(
+                {"detail": "Username parameter is required."},
+                status.HTTP_400_BAD_REQUEST)
+
+        user_id = await sync_to_async(employee_id_for_username)(request,
+                                                                username)
+        if user_id is None:
+            return json_response({"detail": "User not found."},
+                                 status.HTTP_404_NOT_FOUND)
+        return await self.conditional_list(
+            request, self.get_queryset().filter(creator_id=user_id))
+
+
+class AsyncTenderBidsView(AsyncReadView):
+    """Предложения тендера (GET /bids/{id}/list)"""
+
+    action = 'list_bids_for_tender'
+
+    async def read(self, request, pk):
+        tenders = TenderWithArchive.objects if include_archived(request) \
+            else Tender.objects
+        if not await tenders.filter(pk=pk).aexists():
+            return json_response({"detail": "Tender not found."},
+                                 status.HTTP_404_NOT_FOUND)
+        return await self.conditional_list(
+            request, self.get_queryset().filter(tender_id=pk))
+
+
+class AsyncBidReviewsView(AsyncReadView):
+    """Отзывы автора на предложение (GET /bids/{id}/reviews)"""
+
+    action = 'list_reviews_for_bid'
+    serializer_class = ReviewSerializer
+
+    async def read(self, request, pk):
+        author_username = request.GET.get('authorUsername')
+        organization_id = request.GET.get('organizationId')
+        if not author_username or not organization_id:
+            return json_response(
+                {
+                    "detail": "Both authorUsername and organizationId "
+                              "are required."
+                },
+                status.HTTP_400_BAD_REQUEST)
+
+        if not await Bid.objects.filter(pk=pk).aexists():
+            return json_response({"detail": "Bid not found."},
+                                 status.HTTP_404_NOT_FOUND)
+
+        if not await sync_to_async(is_responsible_by_username)(
+                request, author_username, organization_id):
+            return json_response(
+                {"detail": "Вы не ответственны за организацию."},
+                status.HTTP_403_FORBIDDEN)
+
+        author_id = await sync_to_async(employee_id_for_username)(
+            request, author_username)
+        reviews = [row async for row in self.reader.values(
+            Review.objects.filter(bid_id=pk, author_id=author_id))]
+        return json_response(self.reader.represent(reviews))
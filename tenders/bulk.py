@@ -0,0 +1,204 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+
+from .changes import publish
+from .history import load_keyframes
+from .responsibility import is_responsible
+from .stats import record_changes, record_created, stats_key
+
+
+class BulkMixin:
+    """
+    Массовое создание и изменение объектов (Tender или Bid). Пакет
+    применяется целиком: если хотя бы один элемент содержит ошибку, ничего
+    не записывается, а ошибки возвращаются с индексами элементов.
+    Число запросов к базе не зависит от количества элементов в пакете:
+    связанные объекты загружаются одним запросом на модель, права
+    проверяются один раз на пользователя, вставка и снимки версий
+    выполняются пакетно
+    """
+
+    def get_bulk_items(self, request):
+        """Возвращает список элементов пакета или Response с ошибкой"""
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return None, Response(
+                {"detail": "A non-empty list is required."},
+                status=status.HTTP_400_BAD_REQUEST)
+        max_items = getattr(settings, 'BULK_MAX_ITEMS', 1000)
+        if len(items) > max_items:
+            return None, Response(
+                {"detail": f"No more than {max_items} items per request."},
+                status=status.HTTP_400_BAD_REQUEST)
+        return items, None
+
+    def get_related_objects(self, items):
+        """
+        Загружает объекты, на которые ссылаются элементы пакета, по одному
+        запросу на модель
+        """
+        ids_by_field = {}
+        for name, field in self.get_serializer().fields.items():
+            if isinstance(field, PrimaryKeyRelatedField) \
+                    and not field.read_only:
+                ids = set()
+                for item in items:
+                    try:
+                        ids.add(int(item.get(name)))
+                    except (AttributeError, TypeError, ValueError):
+                        continue
+                ids_by_field[field] = ids
+
+        related = {}
+        for field, ids in ids_by_field.items():
+            queryset = field.get_queryset()
+            related.setdefault(queryset.model, {}).update(
+                queryset.in_bulk(ids))
+        return related
+
+    def get_bulk_serializer(self, related, *args, **kwargs):
+        context = self.get_serializer_context()
+        context['related_objects'] = related
+        return self.get_serializer_class()(*args, context=context, **kwargs)
+
+    def bulk_response(self, key, objects, errors):
+        if errors:
+            return Response({key: [], 'errors': errors},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {key: self.get_serializer(objects, many=True).data,
+             'errors': errors},
+            status=status.HTTP_200_OK if key == 'updated'
+            else status.HTTP_201_CREATED
+        )
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request):
+        """
+        Создает объекты из списка. Ошибки возвращаются для каждого элемента
+        отдельно; при любой ошибке ничего не создается
+        """
+        items, error = self.get_bulk_items(request)
+        if error:
+            return error
+
+        related = self.get_related_objects(items)
+        objects, errors = [], []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors.append({'index': index,
+                               'errors': {"detail": "Object expected."}})
+                continue
+            if not is_responsible(request, item.get('creator'),
+                                  item.get('organization')):
+                errors.append({'index': index, 'errors': {
+                    "detail": "Вы не ответственны за организацию"}})
+                continue
+            serializer = self.get_bulk_serializer(related, data=item)
+            if not serializer.is_valid():
+                errors.append({'index': index, 'errors': serializer.errors})
+                continue
+            objects.append(self.queryset.model(**serializer.validated_data))
+
+        if objects and not errors:
+            with transaction.atomic():
+                objects = self.queryset.model.objects.bulk_create(objects)
+                record_created(objects)
+                publish('created', objects, self.get_serializer_class())
+        return self.bulk_response('created', objects, errors)
+
+    @bulk_create.mapping.patch
+    def bulk_update(self, request):
+        """
+        Частично изменяет объекты из списка. Каждый элемент содержит id,
+        изменяемые поля, creator и, при необходимости, expected_version.
+        Снимки предыдущих версий сохраняются одной пакетной вставкой; при
+        любой ошибке ничего не изменяется
+        """
+        items, error = self.get_bulk_items(request)
+        if error:
+            return error
+
+        ids = set()
+        for item in items:
+            try:
+                ids.add(int(item.get('id')))
+            except (AttributeError, TypeError, ValueError):
+                continue
+
+        related = self.get_related_objects(items)
+        model = self.queryset.model
+        objects, versions, errors, keys = [], [], [], []
+        seen = set()
+        fields = {'version', 'updated_at'}
+        now = timezone.now()
+
+        with transaction.atomic():
+            instances = model.objects.select_for_update().in_bulk(ids)
+            keyframes = load_keyframes(model, list(instances))
+            for index, item in enumerate(items):
+                if not isinstance(item, dict):
+                    errors.append({'index': index,
+                                   'errors': {"detail": "Object expected."}})
+                    continue
+                try:
+                    instance = instances.get(int(item.get('id')))
+                except (TypeError, ValueError):
+                    instance = None
+                if instance is None:
+                    errors.append({'index': index,
+                                   'errors': {"detail": "Not found."}})
+                    continue
+                if instance.pk in seen:
+                    errors.append({'index': index,
+                                   'errors': {"detail": "Duplicate id."}})
+                    continue
+
+                creator_id = item.get('creator')
+                if instance.creator_id != creator_id and not is_responsible(
+                        request, creator_id, instance.organization_id):
+                    errors.append({'index': index, 'errors': {
+                        "detail": "Вы не ответственны за организацию"}})
+                    continue
+
+                expected_version = item.get('expected_version')
+                if expected_version not in (None, '') \
+                        and str(expected_version) != str(instance.version):
+                    errors.append({'index': index, 'errors': {
+                        "detail": "Version conflict."}})
+                    continue
+
+                serializer = self.get_bulk_serializer(
+                    related, instance, data=item, partial=True)
+                if not serializer.is_valid():
+                    errors.append({'index': index,
+                                   'errors': serializer.errors})
+                    continue
+
+                versions.append(self.build_version(
+                    instance, keyframes.get(instance.pk),
+                    load_keyframe=False))
+                changes = dict(serializer.validated_data)
+                changes.pop('version', None)
+                keys.append((stats_key(instance),
+                             stats_key(instance, changes)))
+                for field, value in changes.items():
+                    setattr(instance, field, value)
+                fields.update(changes)
+                instance.version += 1
+                instance.updated_at = now
+                objects.append(instance)
+                seen.add(instance.pk)
+
+            if objects and not errors:
+                versions[0].__class__.objects.bulk_create(versions)
+                model.objects.bulk_update(objects, sorted(fields))
+                record_changes(keys)
+                publish('updated', objects, self.get_serializer_class())
+
+        return self.bulk_response('updated', objects, errors)
@@ -0,0 +1,340 @@
+"""
+Журнал изменений (outbox) для инкрементальной синхронизации клиентов.
+
+Создание, изменение, смена статуса, откат и удаление тендеров и
+предложений и создание отзывов добавляют записи Change в той же
+транзакции, поэтому журнал не расходится с данными. Клиент читает
+/api/changes?since=<курсор> и получает изменения после курсора вместе с
+представлением объекта, вместо повторной загрузки полных списков.
+
+Курсор — номер (seq) последней полученной записи. Номер нельзя выдать
+при вставке: запись медленной транзакции с меньшим номером появилась бы
+после того, как курсор клиента его прошел. Поэтому транзакции добавляют
+записи без номера и без блокировок, а номера выдает читатель журнала
+(assign_sequence) уже зафиксированным записям в порядке id, по одному
+процессу за раз. Время записи (created_at) ставит база, а не часы
+воркера. Новые изменения можно ждать
+long-poll запросом (?wait=) или получать под ASGI потоком Server-Sent
+Events (/api/changes/stream). Старые записи удаляет команда compact_changes
+"""
+import asyncio
+import datetime
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import Exists, Max, OuterRef
+from django.db.models.functions import Now
+from django.http import StreamingHttpResponse
+from django.views.decorators.http import require_safe
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+
+from .models import Bid, Change, Tender
+from .renderers import json_response
+from .throttling import acheck, throttled_detail
+
+FIELDS = ('id', 'seq', 'kind', 'object_id', 'action', 'version', 'data',
+          'created_at')
+# Ключ advisory lock, под которым процесс PostgreSQL нумерует записи
+SEQUENCE_LOCK_ID = 0x6368616e676573
+# Сколько записей нумеруется за один раз
+SEQUENCE_BATCH = 1000
+
+
+class CursorExpired(Exception):
+    """Изменения после курсора уже удалены из журнала"""
+
+
+def publish(action, objects, serializer_class=None):
+    """
+    Добавляет в журнал записи об изменении objects. Представление объекта
+    сохраняется, если передан serializer_class
+    """
+    objects = list(objects)
+    if not objects:
+        return
+    data = serializer_class(objects, many=True).data \
+        if serializer_class is not None else [None] * len(objects)
+    Change.objects.bulk_create(
+        Change(kind=obj._meta.model_name, object_id=obj.pk, action=action,
+               version=getattr(obj, 'version', None), data=item)
+        for obj, item in zip(objects, data))
+
+
+def _pending():
+    return Change.objects.using(router.db_for_write(Change)) \
+        .filter(seq=None)
+
+
+def _try_lock(using):
+    """
+    Блокировка нумерации до конца транзакции (PostgreSQL). False, если
+    записи уже нумерует другой процесс
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return True
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_xact_lock(%s)',
+                       [SEQUENCE_LOCK_ID])
+        return cursor.fetchone()[0]
+
+
+def assign_sequence():
+    """
+    Выдает номера seq записям зафиксированных транзакций, у которых его
+    еще нет, в порядке id. Изменения одного объекта выполняются по
+    очереди (блокировка строки), поэтому их записи получают номера по
+    порядку. Пока нумерует другой процесс, функция ничего не делает:
+    новые записи получат номера при следующем чтении
+    """
+    if not _pending().exists():
+        return
+    using = router.db_for_write(Change)
+    try:
+        with transaction.atomic(using=using):
+            if not _try_lock(using):
+                return
+            pending = list(_pending().order_by('id')
+                           .values_list('id', flat=True)[:SEQUENCE_BATCH])
+            last = Change.objects.using(using) \
+                .aggregate(last=Max('seq'))['last'] or 0
+            Change.objects.using(using).bulk_update(
+                [Change(id=pk, seq=last + number)
+                 for number, pk in enumerate(pending, 1)], ['seq'])
+    except IntegrityError:
+        # Без advisory lock (SQLite) номера одновременно выдал другой
+        # процесс
+        pass
+
+
+def publish_deleted(instance):
+    """
+    Добавляет записи об удалении объекта, а для тендера и о каскадном
+    удалении его предложений
+    """
+    objects = [instance]
+    if isinstance(instance, Tender):
+        objects += Bid.objects.filter(tender=instance).only('id', 'version')
+    publish('deleted', objects)
+
+
+def visible(since, kind=None):
+    """Записи после курсора"""
+    queryset = Change.objects.filter(seq__gt=since)
+    if kind:
+        queryset = queryset.filter(kind=kind)
+    return queryset.order_by('seq').values(*FIELDS)
+
+
+def _check_cursor(since, oldest):
+    """
+    Курсор устарел, если записи сразу после него удалены по сроку
+    хранения. Самую старую запись compact не удаляет как замененную,
+    поэтому по ней видна граница удаления
+    """
+    if since and oldest is not None and since < oldest - 1:
+        raise CursorExpired()
+
+
+def _oldest():
+    return Change.objects.exclude(seq=None).order_by('seq') \
+        .values_list('seq', flat=True)
+
+
+def fetch(since, kind=None, limit=100):
+    assign_sequence()
+    _check_cursor(since, _oldest().first())
+    return list(visible(since, kind)[:limit])
+
+
+async def afetch(since, kind=None, limit=100):
+    """Асинхронный вариант fetch"""
+    if await _pending().aexists():
+        await sync_to_async(assign_sequence)()
+    _check_cursor(since, await _oldest().afirst())
+    return [row async for row in visible(since, kind)[:limit]]
+
+
+def compact(retention_days, superseded_after=None):
+    """
+    Удаляет записи старше retention_days дней, а если задан
+    superseded_after (timedelta), и записи старше него, для объекта
+    которых в журнале есть более новая запись. Клиенту для синхронизации
+    достаточно последнего состояния объекта. Возвращает число удаленных
+    записей
+    """
+    now = Now()
+    deleted, _ = Change.objects.filter(
+        created_at__lt=now - datetime.timedelta(days=retention_days)
+    ).delete()
+    oldest = _oldest().first()
+    if superseded_after is not None and oldest is not None:
+        newer = Change.objects.filter(kind=OuterRef('kind'),
+                                      object_id=OuterRef('object_id'),
+                                      id__gt=OuterRef('id'))
+        count, _ = Change.objects.filter(
+            created_at__lt=now - superseded_after
+        ).filter(Exists(newer)).exclude(seq=oldest).delete()
+        deleted += count
+    return deleted
+
+
+def _params(request):
+    """Курсор, вид объектов и размер пакета из параметров запроса"""
+    try:
+        since = int(request.GET.get('since')
+                    or request.headers.get('Last-Event-ID') or 0)
+        limit = int(request.GET.get('limit', 100))
+    except ValueError:
+        raise ValueError('since and limit must be integers.') from None
+    if since < 0 or limit <= 0:
+        raise ValueError('since and limit must be positive.')
+    kind = request.GET.get('kind') or None
+    if kind is not None and kind not in dict(Change.KIND_CHOICES):
+        raise ValueError(
+            f'kind must be one of: '
+            f'{", ".join(dict(Change.KIND_CHOICES))}.')
+    return since, kind, min(limit, getattr(settings, 'CHANGES_MAX_LIMIT',
+                                           1000))
+
+
+async def _prepare(request):
+    """Параметры запроса или ответ с ошибкой"""
+    wait = await acheck(request)
+    if wait:
+        detail, retry_after = throttled_detail(wait)
+        response = json_response({'detail': detail},
+                                 status.HTTP_429_TOO_MANY_REQUESTS)
+        response['Retry-After'] = retry_after
+        return None, response
+    try:
+        return _params(request), None
+    except ValueError as exc:
+        return None, json_response({'detail': str(exc)},
+                                   status.HTTP_400_BAD_REQUEST)
+
+
+def _expired():
+    return json_response(
+        {'detail': 'Cursor is too old, resynchronize from full lists.'},
+        status.HTTP_410_GONE)
+
+
+def _poll_interval():
+    return getattr(settings, 'CHANGES_POLL_INTERVAL', 0.5)
+
+
+@require_safe
+async def changes_feed(request):
+    """
+    GET /api/changes?since=<курсор>: изменения после курсора и курсор
+    next для следующего запроса. С параметром wait (секунды, не больше
+    CHANGES_MAX_WAIT) запрос ждет появления изменений (long-poll)
+    """
+    params, error = await _prepare(request)
+    if error:
+        return error
+    since, kind, limit = params
+    try:
+        wait = min(float(request.GET.get('wait', 0)),
+                   getattr(settings, 'CHANGES_MAX_WAIT', 30))
+    except ValueError:
+        return json_response({'detail': 'wait must be a number.'},
+                             status.HTTP_400_BAD_REQUEST)
+
+    deadline = time.monotonic() + wait
+    while True:
+        try:
+            rows = await afetch(since, kind, limit)
+        except CursorExpired:
+            return _expired()
+        remaining = deadline - time.monotonic()
+        if rows or remaining <= 0:
+            break
+        await asyncio.sleep(min(_poll_interval(), remaining))
+    return json_response({
+        'changes': rows,
+        'next': str(rows[-1]['seq'] if rows else since),
+    })
+
+
+class EventStream:
+    """
+    Состояние потока Server-Sent Events: курсор, срок жизни соединения и
+    время следующего keepalive. Клиент переподключается с заголовком
+    Last-Event-ID и продолжает с того же места
+    """
+
+    def __init__(self, since, kind, limit):
+        self.since = since
+        self.kind = kind
+        self.limit = limit
+        now = time.monotonic()
+        self.deadline = now + getattr(settings, 'CHANGES_STREAM_SECONDS',
+                                      300)
+        self.heartbeat = getattr(settings, 'CHANGES_HEARTBEAT_SECONDS', 15)
+        self.heartbeat_at = now + self.heartbeat
+
+    @property
+    def finished(self):
+        return time.monotonic() >= self.deadline
+
+    def render(self, rows):
+        chunks = []
+        for row in rows:
+            data = JSONRenderer().render(row).decode()
+            chunks.append(f'id: {row["seq"]}\nevent: change\n'
+                          f'data: {data}\n\n')
+            self.since = row['seq']
+        now = time.monotonic()
+        if chunks:
+            self.heartbeat_at = now + self.heartbeat
+        elif now >= self.heartbeat_at:
+            chunks.append(': keepalive\n\n')
+            self.heartbeat_at = now + self.heartbeat
+        return ''.join(chunks)
+
+    async def events(self, rows):
+        while True:
+            chunk = self.render(rows)
+            if chunk:
+                yield chunk
+            if self.finished:
+                return
+            await asyncio.sleep(_poll_interval())
+            try:
+                rows = await afetch(self.since, self.kind, self.limit)
+            except CursorExpired:
+                yield 'event: expired\ndata: {}\n\n'
+                return
+
+
+@require_safe
+async def changes_stream(request):
+    """
+    GET /api/changes/stream: изменения после курсора (since или
+    Last-Event-ID) в виде Server-Sent Events. Соединение закрывается
+    через CHANGES_STREAM_SECONDS. Только под ASGI: под WSGI поток занял
+    бы синхронный воркер целиком, и клиенту предлагается long-poll
+    """
+    if not isinstance(request, ASGIRequest):
+        return json_response(
+            {'detail': 'Event stream requires ASGI, '
+                       'use GET /api/changes?wait=<seconds>.'},
+            status.HTTP_501_NOT_IMPLEMENTED)
+    params, error = await _prepare(request)
+    if error:
+        return error
+    try:
+        rows = await afetch(*params)
+    except CursorExpired:
+        return _expired()
+    response = StreamingHttpResponse(EventStream(*params).events(rows),
+                                     content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
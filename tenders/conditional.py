@@ -0,0 +1,114 @@
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from .metrics import measure_serialization
+
+
+def version_etag(instance):
+    """ETag объекта. Совпадает с номером версии, который принимает If-Match"""
+    return quote_etag(str(instance.version))
+
+
+def _timestamp(value):
+    return int(value.timestamp()) if value is not None else None
+
+
+def _list_aggregate(queryset):
+    return queryset.order_by(), {
+        'last_modified': Max('updated_at'), 'count': Count('id')}
+
+
+def _list_etag(aggregate):
+    last_modified = aggregate['last_modified']
+    stamp = last_modified.timestamp() if last_modified else 0
+    return 'W/' + quote_etag(f'{aggregate["count"]}-{stamp}'), last_modified
+
+
+def list_validators(queryset):
+    """Слабый ETag и дата изменения для списка по одному агрегату"""
+    queryset, aggregates = _list_aggregate(queryset)
+    return _list_etag(queryset.aggregate(**aggregates))
+
+
+async def alist_validators(queryset):
+    """Асинхронный вариант list_validators"""
+    queryset, aggregates = _list_aggregate(queryset)
+    return _list_etag(await queryset.aaggregate(**aggregates))
+
+
+def not_modified(request, etag, last_modified):
+    """Ответ 304 (или 412), если валидаторы клиента актуальны, иначе None"""
+    return get_conditional_response(
+        request, etag=etag, last_modified=_timestamp(last_modified))
+
+
+def list_not_modified(request, etag):
+    """
+    not_modified для списка только по ETag. If-Modified-Since не
+    проверяется: удаление объекта не увеличивает максимальный updated_at,
+    и клиент получил бы 304 со списком, в котором остался удаленный объект
+    """
+    return not_modified(request, etag, None)
+
+
+def set_validators(response, etag, last_modified):
+    """Добавляет ETag и Last-Modified к успешному ответу"""
+    if 200 <= response.status_code < 300:
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(_timestamp(last_modified))
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Условные GET-запросы (If-None-Match / If-Modified-Since). Для объекта
+    валидаторы — номер версии и updated_at, для списка — ETag из числа
+    объектов и максимального updated_at по отфильтрованному queryset
+    (If-Modified-Since для списка не проверяется, см. list_not_modified).
+    Если данные не изменились, возвращается 304 без выборки и сериализации
+    """
+
+    def conditional_response(self, request, etag, last_modified, build):
+        """
+        Возвращает 304, если клиент прислал актуальные валидаторы, иначе
+        ответ build() с заголовками ETag и Last-Modified
+        """
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        return set_validators(build(), etag, last_modified)
+
+    def conditional_list(self, request, queryset, build):
+        etag, last_modified = list_validators(queryset)
+        response = list_not_modified(request, etag)
+        if response is not None:
+            return response
+        return set_validators(build(), etag, last_modified)
+
+    def paginated_response(self, queryset):
+        """
+        Страница списка через values() и ValuesSerializer вместо
+        сериализации объектов моделей. get_values_serializer задает
+        tenders.fieldsets.FieldsetMixin
+        """
+        reader = self.get_values_serializer()
+        page = self.paginate_queryset(reader.values(queryset))
+        return self.get_paginated_response(reader.represent(page))
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional_list(
+            request, queryset, lambda: self.paginated_response(queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+
+        def build():
+            with measure_serialization():
+                return Response(self.get_serializer(instance).data)
+
+        return self.conditional_response(
+            request, version_etag(instance), instance.updated_at, build)
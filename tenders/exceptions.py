@@ -0,0 +1,10 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class VersionConflict(APIException):
+    """Объект был изменен другим запросом после чтения клиентом"""
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Version conflict.'
+    default_code = 'version_conflict'
@@ -0,0 +1,132 @@
+import csv
+import datetime
+import json
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .history import iter_full_versions
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+class Echo:
+    """Объект с интерфейсом файла, возвращающий записанную строку"""
+
+    def write(self, value):
+        return value
+
+
+def _default(value):
+    if isinstance(value, datetime.datetime):
+        value = value.isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def ndjson_rows(rows, fields):
+    """Построчная выгрузка в NDJSON"""
+    for row in rows:
+        yield json.dumps(row, default=_default, ensure_ascii=False) + '\n'
+
+
+def csv_rows(rows, fields):
+    """Построчная выгрузка в CSV. Заголовок отдается до запроса к базе"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(
+            [_default(row[field]) if isinstance(row[field], datetime.datetime)
+             else row[field] for field in fields]
+        )
+
+
+def export_chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+def pinned(queryset):
+    """
+    Queryset, привязанный к базе, выбранной для чтения в запросе. Поток
+    читается уже после ReplicaRoutingMiddleware.process_response, который
+    сбрасывает выбранную реплику: без привязки выгрузка ушла бы в
+    основную базу
+    """
+    return queryset.using(queryset.db)
+
+
+def streaming_export(rows, fields, export_format, filename):
+    """
+    StreamingHttpResponse поверх ленивого итератора строк (словарей).
+    Память не зависит от размера таблицы
+    """
+    render = csv_rows if export_format == 'csv' else ndjson_rows
+    response = StreamingHttpResponse(
+        render(rows, fields),
+        content_type=EXPORT_FORMATS[export_format],
+    )
+    response['Content-Disposition'] = \
+        f'attachment; filename="{filename}.{export_format}"'
+    return response
+
+
+class ExportMixin:
+    """
+    Потоковая выгрузка объектов и их истории версий в NDJSON или CSV.
+    Учитывает параметры фильтра вьюсета (TenderFilter, BidFilter)
+    """
+
+    version_model = None
+    version_parent_field = None
+
+    def get_export_format(self, request):
+        export_format = request.query_params.get('output', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return None
+        return export_format
+
+    def invalid_export_format(self):
+        return Response(
+            {"detail": "output must be one of: "
+                       f"{', '.join(EXPORT_FORMATS)}."},
+            status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """Выгружает объекты, подходящие под фильтр"""
+        export_format = self.get_export_format(request)
+        if export_format is None:
+            return self.invalid_export_format()
+        queryset = pinned(self.filter_queryset(self.get_queryset()))
+        reader = self.get_values_serializer()
+        rows = reader.iter_represent(
+            reader.values(queryset.order_by('id')).iterator(
+                chunk_size=export_chunk_size()))
+        return streaming_export(rows, reader.names, export_format,
+                                queryset.model._meta.model_name + 's')
+
+    @action(detail=False, methods=['get'], url_path='versions/export')
+    def export_versions(self, request):
+        """Выгружает историю версий объектов, подходящих под фильтр"""
+        export_format = self.get_export_format(request)
+        if export_format is None:
+            return self.invalid_export_format()
+        parents = self.filter_queryset(self.get_queryset())
+        queryset = pinned(self.version_model.objects.filter(**{
+            f'{self.version_parent_field}__in': parents.values('id')
+        }))
+        fields = [field.name for field in self.version_model._meta.fields
+                  if field.name not in ('base_version', 'delta')]
+        rows = iter_full_versions(queryset, fields, export_chunk_size())
+        return streaming_export(rows, fields, export_format,
+                                self.version_model._meta.model_name + 's')
@@ -0,0 +1,116 @@
+"""
+Выборочные поля ответа: ?fields=id,name,status оставляет только
+перечисленные поля, ?exclude=description убирает перечисленные.
+
+Поддерживаются списками, объектами, /my, /board, bids/{id}/list,
+bids/{id}/reviews и export (в том числе асинхронными обработчиками
+чтения). Списки выбирают через values() только колонки выбранных полей
+(и колонки курсора), объект загружается с only() по колонкам полей и
+валидаторов ETag и Last-Modified, поэтому невыбранные колонки, например
+description, из базы не читаются. Неизвестное поле — ответ 400
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+
+from .serializers import (BidBoardSerializer, ReviewSerializer,
+                          values_serializer)
+
+FIELDS_PARAM = 'fields'
+EXCLUDE_PARAM = 'exclude'
+# Действия вьюсетов, которые отдают объекты с выборочными полями
+FIELDSET_ACTIONS = ('list', 'retrieve', 'list_my_items', 'bid_board',
+                    'list_bids_for_tender', 'list_reviews_for_bid', 'export')
+# Колонки, которые объект загружает всегда: ETag и Last-Modified ответа
+# и состояние на момент ?as_of=
+REQUIRED_COLUMNS = ('id', 'version', 'created_at', 'updated_at')
+
+
+def _names(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def requested_fields(query_params, serializer_classes):
+    """
+    Набор имен полей ответа (frozenset) из ?fields= и ?exclude= или None,
+    если параметров нет. Имена проверяются по полям serializer_classes
+    """
+    fields = query_params.get(FIELDS_PARAM)
+    exclude = query_params.get(EXCLUDE_PARAM)
+    if not fields and not exclude:
+        return None
+    known = set()
+    for serializer_class in serializer_classes:
+        known.update(values_serializer(serializer_class).names)
+
+    selected = set(known)
+    for param, value in ((FIELDS_PARAM, fields), (EXCLUDE_PARAM, exclude)):
+        if not value:
+            continue
+        names = _names(value)
+        unknown = names - known
+        if unknown:
+            raise ValidationError(
+                {param: f'Unknown fields: {", ".join(sorted(unknown))}.'})
+        selected = selected & names if param == FIELDS_PARAM \
+            else selected - names
+    if not selected:
+        raise ValidationError(
+            {FIELDS_PARAM: 'At least one field must be selected.'})
+    return frozenset(selected)
+
+
+def only_fields(queryset, serializer_class, fields, *required):
+    """
+    queryset.only() по колонкам модели для полей fields сериализатора и
+    колонкам required. Без fields queryset не меняется
+    """
+    if fields is None:
+        return queryset
+    model = queryset.model
+    columns = []
+    for source in values_serializer(serializer_class, fields).sources:
+        try:
+            model._meta.get_field(source)
+        except FieldDoesNotExist:
+            # Аннотация запроса, например organization_name на доске
+            continue
+        columns.append(source)
+    return queryset.only(*dict.fromkeys([*columns, *required]))
+
+
+class FieldsetMixin:
+    """?fields= и ?exclude= для действий FIELDSET_ACTIONS вьюсета"""
+
+    response_fields = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in FIELDSET_ACTIONS:
+            self.response_fields = requested_fields(
+                request.query_params, self.get_fieldset_serializers())
+
+    def get_fieldset_serializers(self):
+        """Сериализаторы, поля которых отдает действие"""
+        if self.action == 'list_reviews_for_bid':
+            return (ReviewSerializer,)
+        if self.action == 'bid_board':
+            return (self.get_serializer_class(), BidBoardSerializer)
+        return (self.get_serializer_class(),)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('retrieve', 'bid_board'):
+            queryset = only_fields(queryset, self.get_serializer_class(),
+                                   self.response_fields, *REQUIRED_COLUMNS)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        if self.response_fields is not None:
+            kwargs.setdefault('fields', self.response_fields)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_values_serializer(self, serializer_class=None):
+        """ValuesSerializer с выбранными полями"""
+        return values_serializer(
+            serializer_class or self.get_serializer_class(),
+            self.response_fields)
@@ -1,28 +1,82 @@
-import django_filters
-from .models import Tender, Bid
-
-
-class TenderFilter(django_filters.FilterSet):
-    """Фильтр для модели тендера. Позволяет фильтровать тендеры по типу услуги
-     и статусу
-    """
-
-    service_type = django_filters.ChoiceFilter(
-        choices=Tender.SERVICE_TYPE_CHOICES)
-    status = django_filters.ChoiceFilter(
-        choices=Tender.STATUS_CHOICES)
-
-    class Meta:
-        model = Tender
-        fields = ['service_type', 'status']
-
-
-class BidFilter(django_filters.FilterSet):
-    """Фильтр для модели заявки. Позволяет фильтровать заявки по статусу"""
-
-    status = django_filters.ChoiceFilter(
-        choices=Bid.STATUS_CHOICES)
-
-    class Meta:
-        model = Bid
-        fields = ['status']
+import django_filters
+from .as_of import parse_as_of
+from .history import value_as_of
+from .models import Tender, Bid, TenderWithArchive, BidWithArchive
+from .search import search
+
+
+class SearchFilterMixin(django_filters.FilterSet):
+    """Полнотекстовый поиск по названию и описанию (параметр q)"""
+
+    q = django_filters.CharFilter(method='filter_search')
+
+    def filter_search(self, queryset, name, value):
+        return search(queryset, value)
+
+
+class TenderFilter(SearchFilterMixin):
+    """Фильтр для модели тендера. Позволяет фильтровать тендеры по типу услуги
+     и статусу
+    """
+
+    service_type = django_filters.ChoiceFilter(
+        choices=Tender.SERVICE_TYPE_CHOICES)
+    status = django_filters.ChoiceFilter(
+        choices=Tender.STATUS_CHOICES)
+
+    class Meta:
+        model = Tender
+        fields = ['service_type', 'status']
+
+
+class BidFilter(SearchFilterMixin):
+    """Фильтр для модели заявки. Позволяет фильтровать заявки по статусу"""
+
+    status = django_filters.ChoiceFilter(
+        choices=Bid.STATUS_CHOICES)
+
+    class Meta:
+        model = Bid
+        fields = ['status']
+
+
+class TenderWithArchiveFilter(TenderFilter):
+    """Фильтр тендеров в режиме ?include_archived=true"""
+
+    class Meta(TenderFilter.Meta):
+        model = TenderWithArchive
+
+
+class BidWithArchiveFilter(BidFilter):
+    """Фильтр предложений в режиме ?include_archived=true"""
+
+    class Meta(BidFilter.Meta):
+        model = BidWithArchive
+
+
+class AsOfFilterMixin(django_filters.FilterSet):
+    """
+    Фильтры по состоянию на момент ?as_of= (см. tenders.history.value_as_of).
+    Параметр as_of уже проверен вьюсетом (tenders.as_of.AsOfMixin)
+    """
+
+    def filter_as_of(self, queryset, name, value):
+        as_of = parse_as_of(self.data['as_of'])
+        return queryset.filter(value_as_of(queryset.model, as_of, name,
+                                           value))
+
+
+class TenderAsOfFilter(AsOfFilterMixin, TenderFilter):
+    """Фильтр тендеров по состоянию на момент ?as_of="""
+
+    service_type = django_filters.ChoiceFilter(
+        method='filter_as_of', choices=Tender.SERVICE_TYPE_CHOICES)
+    status = django_filters.ChoiceFilter(
+        method='filter_as_of', choices=Tender.STATUS_CHOICES)
+
+
+class BidAsOfFilter(AsOfFilterMixin, BidFilter):
+    """Фильтр предложений по состоянию на момент ?as_of="""
+
+    status = django_filters.ChoiceFilter(
+        method='filter_as_of', choices=Bid.STATUS_CHOICES)
@@ -0,0 +1,337 @@
+"""
+Хранение истории версий тендеров и предложений.
+
+Текстовые поля (name, description) хранятся полностью только в опорных
+версиях (keyframe). Остальные версии хранят сжатую разницу с ближайшей
+предыдущей опорной версией (delta) и номер этой версии (base_version),
+поэтому восстановление любой версии требует одну опорную версию и одну
+разницу. Опорная версия создается каждые VERSION_KEYFRAME_INTERVAL версий
+или когда разница получается слишком большой.
+
+Версия N сохраняется в момент изменения объекта, поэтому ее saved_at —
+время, до которого действовало состояние N. Состояние объекта на момент
+as_of — первая версия, сохраненная позже as_of, или текущая строка, если
+таких версий нет
+"""
+import difflib
+import json
+import re
+import zlib
+
+from django.conf import settings
+from django.db.models import F, OuterRef, Q, Subquery, Window
+from django.db.models.functions import RowNumber
+
+from .models import Tender, Bid, TenderVersion, BidVersion
+
+TEXT_FIELDS = ('name', 'description')
+TOKEN_RE = re.compile(r'\s*\S+|\s+')
+
+VERSION_MODELS = {
+    Tender: (TenderVersion, 'tender', ('status', 'service_type')),
+    Bid: (BidVersion, 'bid', ('status',)),
+}
+VERSION_SPECS = {
+    version_model: (parent_field, plain_fields)
+    for version_model, parent_field, plain_fields in VERSION_MODELS.values()
+}
+
+
+def keyframe_interval():
+    return getattr(settings, 'VERSION_KEYFRAME_INTERVAL', 20)
+
+
+def version_model_for(model):
+    """(модель версий, имя поля родителя, поля без сжатия) для модели"""
+    return VERSION_MODELS[model]
+
+
+def _diff(base, target):
+    """
+    Операции, превращающие base в target: [начало, конец) — фрагмент base,
+    строка — вставка. Сравнение идет по словам, а не по символам, чтобы
+    разница для длинных описаний считалась быстро
+    """
+    if target is None:
+        return None
+    if not base:
+        return [target]
+    base_tokens = TOKEN_RE.findall(base)
+    target_tokens = TOKEN_RE.findall(target)
+    offsets = [0]
+    for token in base_tokens:
+        offsets.append(offsets[-1] + len(token))
+
+    ops = []
+    matcher = difflib.SequenceMatcher(None, base_tokens, target_tokens,
+                                      autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([offsets[i1], offsets[i2]])
+        elif tag in ('replace', 'insert'):
+            ops.append(''.join(target_tokens[j1:j2]))
+    return ops
+
+
+def _patch(base, ops):
+    if ops is None:
+        return None
+    parts = []
+    for op in ops:
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.append(base[op[0]:op[1]])
+    return ''.join(parts)
+
+
+def encode_delta(base, target):
+    """Сжатая разница текстовых полей target относительно base"""
+    data = {field: _diff(base.get(field), target.get(field))
+            for field in TEXT_FIELDS}
+    return zlib.compress(
+        json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+        .encode('utf-8'))
+
+
+def apply_delta(base, delta, fields=TEXT_FIELDS):
+    """Восстанавливает текстовые поля по опорной версии и разнице"""
+    data = json.loads(zlib.decompress(bytes(delta)).decode('utf-8'))
+    return {field: _patch(base.get(field) or '', data.get(field))
+            for field in fields}
+
+
+def _text_size(state):
+    return sum(len((state.get(field) or '').encode('utf-8'))
+               for field in TEXT_FIELDS)
+
+
+def load_keyframes(model, parent_ids):
+    """
+    Последние опорные версии для набора объектов одним запросом.
+    Возвращает {id объекта: опорная версия}
+    """
+    version_model, parent_field, _ = version_model_for(model)
+    latest = version_model.objects.filter(
+        **{parent_field: OuterRef(parent_field)}, base_version__isnull=True
+    ).order_by('-version').values('version')[:1]
+    keyframes = version_model.objects.filter(
+        **{f'{parent_field}__in': parent_ids}, base_version__isnull=True,
+        version=Subquery(latest)
+    )
+    return {getattr(kf, f'{parent_field}_id'): kf for kf in keyframes}
+
+
+def build_version(instance, keyframe=None, load_keyframe=True):
+    """
+    Несохраненный снимок текущего состояния объекта. Если передана опорная
+    версия (или она загружена), снимок сохраняется как сжатая разница
+    """
+    model = type(instance)
+    version_model, parent_field, plain_fields = version_model_for(model)
+    state = {field: getattr(instance, field) for field in TEXT_FIELDS}
+    data = {field: getattr(instance, field) for field in plain_fields}
+    data[parent_field] = instance
+    data['version'] = instance.version
+
+    if keyframe is None and load_keyframe:
+        keyframe = load_keyframes(model, [instance.pk]).get(instance.pk)
+
+    return version_model(**pack(state, instance.version, keyframe), **data)
+
+
+def pack(state, version, keyframe):
+    """
+    Текстовые поля версии в виде для хранения: полностью (опорная версия)
+    или разницей с keyframe. Возвращает значения полей name, description,
+    base_version и delta
+    """
+    if keyframe is not None and version - keyframe.version < \
+            keyframe_interval():
+        delta = encode_delta(
+            {field: getattr(keyframe, field) for field in TEXT_FIELDS},
+            state)
+        if len(delta) * 2 < _text_size(state):
+            return {'name': None, 'description': None,
+                    'base_version': keyframe.version, 'delta': delta}
+    return {**state, 'base_version': None, 'delta': None}
+
+
+def stored_size(version_obj):
+    """Размер текстовых данных версии в хранилище, байт"""
+    return _text_size({field: getattr(version_obj, field)
+                       for field in TEXT_FIELDS}) \
+        + len(version_obj.delta or b'')
+
+
+def reconstruct(version_obj, keyframe=None):
+    """
+    Полное состояние версии: текстовые поля и поля без сжатия.
+    keyframe можно передать, если он уже загружен
+    """
+    version_model = type(version_obj)
+    parent_field, plain_fields = VERSION_SPECS[version_model]
+    state = {field: getattr(version_obj, field) for field in plain_fields}
+
+    if version_obj.base_version is None:
+        state.update({field: getattr(version_obj, field)
+                      for field in TEXT_FIELDS})
+        return state
+
+    if keyframe is None:
+        keyframe = version_model.objects.only(*TEXT_FIELDS).get(**{
+            f'{parent_field}_id': getattr(version_obj, f'{parent_field}_id'),
+            'version': version_obj.base_version,
+        })
+    state.update(apply_delta(
+        {field: getattr(keyframe, field) for field in TEXT_FIELDS},
+        version_obj.delta))
+    return state
+
+
+def iter_full_versions(queryset, fields, chunk_size):
+    """
+    Потоковый обход версий с восстановлением текстовых полей. Версии
+    читаются упорядоченными по (объект, версия), поэтому опорная версия
+    всегда встречается раньше зависящих от нее
+    """
+    parent_field, _ = VERSION_SPECS[queryset.model]
+    parent_id = f'{parent_field}_id'
+    current_parent, keyframes = None, {}
+    queryset = queryset.order_by(parent_field, 'version')
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        if getattr(obj, parent_id) != current_parent:
+            current_parent, keyframes = getattr(obj, parent_id), {}
+        if obj.base_version is None:
+            keyframes[obj.version] = obj
+        state = reconstruct(obj, keyframes.get(obj.base_version))
+        row = {}
+        for field in fields:
+            if field in state:
+                row[field] = state[field]
+            elif field == parent_field:
+                row[field] = getattr(obj, parent_id)
+            else:
+                row[field] = getattr(obj, field)
+        yield row
+
+
+def summarize(versions):
+    """
+    Краткое описание версий без description. Названия версий, хранящихся
+    разницей, восстанавливаются по опорным версиям, загруженным одним
+    запросом (только поле name)
+    """
+    if not versions:
+        return []
+    version_model = type(versions[0])
+    parent_field, plain_fields = VERSION_SPECS[version_model]
+    parent_id = f'{parent_field}_id'
+    needed = {(getattr(obj, parent_id), obj.base_version)
+              for obj in versions if obj.base_version is not None}
+    keyframes = {}
+    if needed:
+        rows = version_model.objects.filter(**{
+            f'{parent_id}__in': {key[0] for key in needed},
+            'version__in': {key[1] for key in needed},
+        }).values_list(parent_id, 'version', 'name')
+        keyframes = {(parent, version): name
+                     for parent, version, name in rows}
+
+    result = []
+    for obj in versions:
+        if obj.base_version is None:
+            name = obj.name
+        else:
+            base_name = keyframes.get((getattr(obj, parent_id),
+                                       obj.base_version))
+            name = apply_delta({'name': base_name}, obj.delta,
+                               fields=('name',))['name']
+        item = {'version': obj.version, 'name': name}
+        item.update({field: getattr(obj, field) for field in plain_fields})
+        item['saved_at'] = obj.saved_at
+        result.append(item)
+    return result
+
+
+def _versions_after(model, as_of):
+    version_model, _, _ = version_model_for(model)
+    return version_model.objects.filter(saved_at__gt=as_of)
+
+
+def ranked_versions_after(model, as_of, ids=None):
+    """
+    Версии объектов ids (всех объектов, если ids не задан), сохраненные
+    позже as_of, с номером по порядку (position) среди версий своего
+    объекта
+    """
+    _, parent_field, _ = version_model_for(model)
+    parent_id = f'{parent_field}_id'
+    versions = _versions_after(model, as_of)
+    if ids is not None:
+        versions = versions.filter(**{f'{parent_id}__in': ids})
+    return versions.annotate(position=Window(
+        RowNumber(), partition_by=F(parent_id), order_by=F('version').asc()
+    ))
+
+
+def first_versions_after(model, as_of, ids=None):
+    """
+    Первая версия каждого из объектов ids, сохраненная позже as_of: один
+    запрос с ROW_NUMBER() по индексу (объект, saved_at)
+    """
+    return ranked_versions_after(model, as_of, ids).filter(position=1)
+
+
+def value_as_of(model, as_of, field, value):
+    """
+    Условие фильтрации списка: поле без сжатия (status, service_type) на
+    момент as_of равно value. Значение берется из первой версии после
+    as_of (first_versions_after), а если таких версий нет — из строки
+    объекта. Подзапросы не зависят от строки списка и выполняются один
+    раз, а не для каждого объекта
+    """
+    version_model, parent_field, _ = version_model_for(model)
+    parent_id = f'{parent_field}_id'
+    changed = version_model.objects.filter(
+        pk__in=first_versions_after(model, as_of).values('pk'),
+        **{field: value})
+    unchanged = Q(**{field: value}) & ~Q(
+        pk__in=_versions_after(model, as_of).values(parent_id))
+    return Q(pk__in=changed.values(parent_id)) | unchanged
+
+
+def states_as_of(model, as_of, ids):
+    """
+    Состояния объектов ids на момент as_of, которые отличаются от
+    текущих. Первые версии после as_of выбираются одним запросом
+    (first_versions_after), опорные и предыдущие версии — вторым.
+    Возвращает {id объекта: состояние};
+    updated_at равен None, если состояние действует с создания объекта
+    """
+    version_model, parent_field, _ = version_model_for(model)
+    parent_id = f'{parent_field}_id'
+    versions = list(first_versions_after(model, as_of, ids))
+    if not versions:
+        return {}
+
+    # Опорные версии для восстановления текста и предыдущие версии, время
+    # сохранения которых — начало действия найденного состояния
+    needed = {(getattr(obj, parent_id), number) for obj in versions
+              for number in (obj.base_version, obj.version - 1) if number}
+    related = version_model.objects.filter(**{
+        f'{parent_id}__in': {key[0] for key in needed},
+        'version__in': {key[1] for key in needed},
+    }).only(parent_id, 'version', 'saved_at', *TEXT_FIELDS)
+    related = {(getattr(obj, parent_id), obj.version): obj
+               for obj in related}
+
+    states = {}
+    for obj in versions:
+        parent = getattr(obj, parent_id)
+        state = reconstruct(obj, related.get((parent, obj.base_version)))
+        previous = related.get((parent, obj.version - 1))
+        state['version'] = obj.version
+        state['updated_at'] = previous.saved_at if previous else None
+        states[parent] = state
+    return states
@@ -0,0 +1,152 @@
+"""
+Повтор запросов с заголовком Idempotency-Key.
+
+Первый ответ на запрос с ключом сохраняется в IdempotencyKey в той же
+транзакции, что и изменения, сделанные запросом. Ключ действует в
+пределах клиента (IP) и эндпоинта (метод и путь): одинаковые ключи
+разных клиентов не пересекаются. Повтор с тем же ключом отдается из
+таблицы одним запросом к базе, без проверки прав, ограничения частоты и
+бизнес-логики, с заголовком Idempotent-Replayed. Одновременный повтор
+ждет на уникальном индексе, пока первый запрос не завершится. Ключ,
+использованный на том же эндпоинте с другими параметрами или телом,
+дает ответ 422. При ответах 429 и 5xx транзакция откатывается вместе с
+изменениями запроса, и повтор выполняется заново. Запись действует
+IDEMPOTENCY_KEY_TTL секунд, устаревшие записи удаляет команда
+purge_idempotency_keys
+"""
+import datetime
+import hashlib
+import zlib
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.throttling import BaseThrottle
+
+from .models import IdempotencyKey
+from .renderers import json_response
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+# Заголовки первого ответа, которые отдаются при повторе
+STORED_HEADERS = ('ETag', 'Location')
+
+
+def fingerprint(request):
+    """sha256 метода, адреса и тела запроса"""
+    digest = hashlib.sha256(
+        f'{request.method} {request.get_full_path()}\n'.encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def scope(request):
+    """Клиент, метод и путь запроса, в пределах которых действует ключ"""
+    return {'client': BaseThrottle().get_ident(request)[:255],
+            'method': request.method, 'path': request.path[:255]}
+
+
+def expires_at(now):
+    return now + datetime.timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+
+
+def claim(key, key_scope, request_hash):
+    """
+    Создает запись для ключа. None, если ключ занят действующей записью
+    """
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                key=key, **key_scope, request_hash=request_hash,
+                expires_at=expires_at(now))
+    except IntegrityError:
+        pass
+    # Ключ занят одновременным запросом, который уже завершился, или
+    # устаревшей записью
+    deleted, _ = IdempotencyKey.objects.filter(
+        key=key, **key_scope, expires_at__lte=now).delete()
+    if not deleted:
+        return None
+    return IdempotencyKey.objects.create(
+        key=key, **key_scope, request_hash=request_hash,
+        expires_at=expires_at(now))
+
+
+def save_response(record, response):
+    """
+    Сохраняет ответ в запись ключа. False, если ответ 429/5xx не
+    сохраняется
+    """
+    if response.status_code >= 500 \
+            or response.status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+        return False
+    if hasattr(response, 'render'):
+        response.render()
+    record.status_code = response.status_code
+    record.content_type = response.get('Content-Type', '')
+    record.headers = {name: response[name] for name in STORED_HEADERS
+                      if response.has_header(name)}
+    record.body = zlib.compress(response.content)
+    record.save(update_fields=['status_code', 'content_type', 'headers',
+                               'body'])
+    return True
+
+
+def replay(record, request_hash):
+    """Сохраненный ответ для повтора запроса"""
+    if record.request_hash != request_hash:
+        return json_response(
+            {'detail': f'{HEADER} was already used for a different request.'},
+            status.HTTP_422_UNPROCESSABLE_ENTITY)
+    response = HttpResponse(zlib.decompress(record.body),
+                            status=record.status_code,
+                            content_type=record.content_type)
+    for name, value in record.headers.items():
+        response[name] = value
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+class IdempotencyMixin:
+    """Заголовок Idempotency-Key для действий idempotent_actions вьюсета"""
+
+    idempotent_actions = ('create', 'create_obj', 'update_status',
+                          'create_review_for_bid')
+
+    def dispatch(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None or self.action_map.get(request.method.lower()) \
+                not in self.idempotent_actions:
+            return super().dispatch(request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return json_response(
+                {'detail': f'{HEADER} must be 1 to {MAX_KEY_LENGTH} '
+                           f'characters long.'},
+                status.HTTP_400_BAD_REQUEST)
+
+        request_hash = fingerprint(request)
+        key_scope = scope(request)
+        record = IdempotencyKey.objects.filter(
+            key=key, **key_scope, expires_at__gt=timezone.now()).first()
+        if record is None:
+            with transaction.atomic():
+                created = claim(key, key_scope, request_hash)
+                if created is not None:
+                    response = super().dispatch(request, *args, **kwargs)
+                    if not save_response(created, response):
+                        # Изменения запроса откатываются вместе с записью
+                        # ключа, чтобы повтор не создал их второй раз
+                        transaction.set_rollback(True)
+                    return response
+                record = IdempotencyKey.objects.get(key=key, **key_scope)
+        return replay(record, request_hash)
+
+
+def purge():
+    """Удаляет устаревшие записи. Возвращает их число"""
+    deleted, _ = IdempotencyKey.objects.filter(
+        expires_at__lte=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tenders import archive
+
+
+class Command(BaseCommand):
+    help = ('Переносит закрытые тендеры, не менявшиеся заданное число '
+            'дней, вместе с предложениями, версиями и отзывами в архивные '
+            'таблицы')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int,
+            default=getattr(settings, 'ARCHIVE_AFTER_DAYS', 180),
+            help='Минимальный срок без изменений')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Число тендеров в одной транзакции')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только посчитать тендеры для переноса')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count = archive.archive_candidates(options['days']).count()
+            self.stdout.write(f'Тендеров для переноса в архив: {count}')
+            return
+
+        total = 0
+        for count in archive.archive(options['days'],
+                                     options['batch_size']):
+            total += count
+            self.stdout.write(f'Перенесено в архив: {total}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово, перенесено тендеров: {total}'))
@@ -0,0 +1,97 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.request import urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = ('/api/tenders', '/api/bids')
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочное сравнение запущенных серверов (например, WSGI и '
+            'ASGI): число запросов в секунду и задержки p50/p99 при '
+            'заданной конкурентности')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target', action='append', required=True,
+            help='Сервер в виде имя=адрес, например '
+                 'wsgi=http://127.0.0.1:8080. Можно указать несколько раз')
+        parser.add_argument(
+            '--path', action='append',
+            help='Адрес для запросов (по умолчанию /api/tenders и '
+                 '/api/bids). Можно указать несколько раз')
+        parser.add_argument('--concurrency', type=int, action='append',
+                            help='Число одновременных клиентов '
+                                 '(по умолчанию 1, 16 и 64)')
+        parser.add_argument('--requests', type=int, default=2000,
+                            help='Число запросов на каждый прогон')
+        parser.add_argument('--warmup', type=int, default=50)
+        parser.add_argument('--timeout', type=float, default=30)
+
+    def handle(self, *args, **options):
+        targets = []
+        for value in options['target']:
+            name, sep, url = value.partition('=')
+            if not sep or not url:
+                raise CommandError(f'Неверный --target: {value}')
+            targets.append((name, url.rstrip('/')))
+        paths = options['path'] or DEFAULT_PATHS
+        levels = options['concurrency'] or [1, 16, 64]
+
+        self.stdout.write(f'{"target":>8} {"path":<28} {"conc":>5} '
+                          f'{"rps":>9} {"p50 ms":>8} {"p99 ms":>8} '
+                          f'{"errors":>7}')
+        for path in paths:
+            for concurrency in levels:
+                for name, base_url in targets:
+                    url = base_url + path
+                    self.run(url, options['warmup'], concurrency,
+                             options['timeout'])
+                    rps, timings, errors = self.run(
+                        url, options['requests'], concurrency,
+                        options['timeout'])
+                    self.stdout.write(
+                        f'{name:>8} {path:<28} {concurrency:>5} '
+                        f'{rps:>9.1f} '
+                        f'{self.percentile(timings, 50) * 1000:>8.1f} '
+                        f'{self.percentile(timings, 99) * 1000:>8.1f} '
+                        f'{errors:>7}')
+
+    def run(self, url, total, concurrency, timeout):
+        """(запросов в секунду, задержки успешных запросов, число ошибок)"""
+        timings = []
+        errors = 0
+        lock = threading.Lock()
+
+        def request(_):
+            nonlocal errors
+            started = time.perf_counter()
+            try:
+                with urlopen(url, timeout=timeout) as response:
+                    response.read()
+            except (HTTPError, URLError, OSError):
+                with lock:
+                    errors += 1
+                return
+            elapsed = time.perf_counter() - started
+            with lock:
+                timings.append(elapsed)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(request, range(total)))
+        duration = time.perf_counter() - started
+        return len(timings) / duration, timings, errors
+
+    @staticmethod
+    def percentile(values, percent):
+        if not values:
+            return 0.0
+        if len(values) == 1:
+            return values[0]
+        return statistics.quantiles(values, n=100,
+                                    method='inclusive')[percent - 1]
@@ -0,0 +1,282 @@
+import json
+import statistics
+import time
+from urllib.parse import quote
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from tenders import responsibility
+from tenders.synthetic import generate
+
+# Бюджет маршрута: p95 времени ответа в мс при масштабе по умолчанию,
+# умножается на --time-factor. Число запросов к базе для каждого маршрута
+# проверяют тесты (RouteQueryCountTests в tenders.tests), команда только
+# сообщает его. Маршруты с ?fields= и ?exclude= сравниваются с полными
+# ответами по размеру и времени
+BUDGETS = {
+    'GET /tenders': 60,
+    'GET /tenders?status=': 60,
+    'GET /tenders?service_type=&status=': 60,
+    'GET /tenders?q=': 150,
+    'GET /tenders?limit=&offset=': 60,
+    'GET /tenders?cursor=': 60,
+    'GET /tenders?exclude=description': 60,
+    'GET /tenders?fields=id,name,status': 60,
+    'GET /tenders/{id}': 30,
+    'GET /tenders/{id}?exclude=description': 30,
+    'GET /tenders?as_of=': 80,
+    'GET /tenders/{id}?as_of=': 30,
+    'GET /tenders/my': 60,
+    'POST /tenders/new': 60,
+    'POST /tenders/new (replay)': 30,
+    'POST /tenders/bulk': 100,
+    'PATCH /tenders/{id}/edit': 60,
+    'PUT /tenders/{id}': 60,
+    'PATCH /tenders/{id}/status': 60,
+    'PUT /tenders/{id}/rollback/{version}': 60,
+    'GET /tenders/{id}/versions': 60,
+    'GET /tenders/{id}/diff': 60,
+    'GET /tenders/{id}/board': 60,
+    'GET /tenders/stats': 30,
+    'GET /tenders/export': 1000,
+    'GET /bids': 60,
+    'GET /bids?exclude=description': 60,
+    'GET /bids?fields=id,name,status': 60,
+    'GET /bids?status=': 60,
+    'GET /bids/{id}': 30,
+    'GET /bids?as_of=': 80,
+    'GET /bids/my': 60,
+    'POST /bids/new': 60,
+    'PATCH /bids/{id}/edit': 60,
+    'PATCH /bids/{id}/status': 60,
+    'PUT /bids/{id}/rollback/{version}': 60,
+    'GET /bids/{tender_id}/list': 60,
+    'GET /bids/{id}/reviews': 60,
+    'POST /bids/{id}/feedback': 60,
+    'POST /bids/{id}/feedback (replay)': 30,
+}
+
+
+def routes(data):
+    """
+    Сценарии (имя, метод, адрес, тело запроса[, заголовки]) для набора
+    данных. Изменения выполняет ответственный за организацию объекта
+    """
+    tender = data.tenders[len(data.tenders) // 2]
+    bid = data.bids[len(data.bids) // 2]
+    review = data.reviews[len(data.reviews) // 2]
+    tender_creator = tender.creator
+    bid_creator = bid.creator
+    author = review.author
+    author_organization = data.responsibles[author.id]
+
+    def tender_data(index=0):
+        return {'name': f'benchmark {index}', 'description': 'benchmark',
+                'service_type': 'IT', 'creator': tender_creator.id,
+                'organization': tender.organization_id}
+
+    first_page = APIClient().get('/api/tenders').json()
+    # Моменты после создания всех тендеров (предложений), но до
+    # сохранения их истории: состояние восстанавливается по версиям
+    tenders_as_of = quote(data.tenders[-1].created_at.isoformat())
+    bids_as_of = quote(data.bids[-1].created_at.isoformat())
+    feedback_url = f'/api/bids/{review.bid_id}/feedback'
+    feedback = {'authorUsername': author.username,
+                'organizationId': author_organization.id,
+                'content': 'benchmark'}
+    # Повторы запросов с Idempotency-Key: первый ответ сохраняется до
+    # замеров
+    tender_key = {'HTTP_IDEMPOTENCY_KEY': 'benchmark-tender'}
+    feedback_key = {'HTTP_IDEMPOTENCY_KEY': 'benchmark-feedback'}
+    APIClient().post('/api/tenders/new', tender_data(), format='json',
+                     **tender_key)
+    APIClient().post(feedback_url, feedback, format='json', **feedback_key)
+    return [
+        ('GET /tenders', 'get', '/api/tenders', None),
+        ('GET /tenders?status=', 'get', '/api/tenders?status=PUBLISHED',
+         None),
+        ('GET /tenders?service_type=&status=', 'get',
+         '/api/tenders?service_type=IT&status=PUBLISHED', None),
+        ('GET /tenders?q=', 'get', '/api/tenders?q=монтаж', None),
+        ('GET /tenders?limit=&offset=', 'get',
+         '/api/tenders?limit=50&offset=200', None),
+        ('GET /tenders?cursor=', 'get', first_page['next'] or '/api/tenders',
+         None),
+        ('GET /tenders?exclude=description', 'get',
+         '/api/tenders?exclude=description', None),
+        ('GET /tenders?fields=id,name,status', 'get',
+         '/api/tenders?fields=id,name,status', None),
+        ('GET /tenders/{id}', 'get', f'/api/tenders/{tender.id}', None),
+        ('GET /tenders/{id}?exclude=description', 'get',
+         f'/api/tenders/{tender.id}?exclude=description', None),
+        ('GET /tenders?as_of=', 'get',
+         f'/api/tenders?as_of={tenders_as_of}', None),
+        ('GET /tenders/{id}?as_of=', 'get',
+         f'/api/tenders/{tender.id}?as_of={tenders_as_of}', None),
+        ('GET /tenders/my', 'get',
+         f'/api/tenders/my?username={tender_creator.username}', None),
+        ('POST /tenders/new', 'post', '/api/tenders/new', tender_data()),
+        ('POST /tenders/new (replay)', 'post',
+         '/api/tenders/new', tender_data(), tender_key),
+        ('POST /tenders/bulk', 'post', '/api/tenders/bulk',
+         [tender_data(index) for index in range(10)]),
+        ('PATCH /tenders/{id}/edit', 'patch',
+         f'/api/tenders/{tender.id}/edit',
+         {'description': 'benchmark edit', 'creator': tender_creator.id}),
+        ('PUT /tenders/{id}', 'put', f'/api/tenders/{tender.id}',
+         tender_data()),
+        ('PATCH /tenders/{id}/status', 'patch',
+         f'/api/tenders/{tender.id}/status',
+         {'status': 'PUBLISHED', 'creator': tender_creator.id}),
+        ('PUT /tenders/{id}/rollback/{version}', 'put',
+         f'/api/tenders/{tender.id}/rollback/1',
+         {'creator': tender_creator.id}),
+        ('GET /tenders/{id}/versions', 'get',
+         f'/api/tenders/{tender.id}/versions', None),
+        ('GET /tenders/{id}/diff', 'get',
+         f'/api/tenders/{tender.id}/diff?from=1&to={tender.version}', None),
+        ('GET /tenders/{id}/board', 'get',
+         f'/api/tenders/{tender.id}/board', None),
+        ('GET /tenders/stats', 'get', '/api/tenders/stats', None),
+        ('GET /tenders/export', 'get', '/api/tenders/export?status=CLOSED',
+         None),
+        ('GET /bids', 'get', '/api/bids', None),
+        ('GET /bids?exclude=description', 'get',
+         '/api/bids?exclude=description', None),
+        ('GET /bids?fields=id,name,status', 'get',
+         '/api/bids?fields=id,name,status', None),
+        ('GET /bids?status=', 'get', '/api/bids?status=PUBLISHED', None),
+        ('GET /bids/{id}', 'get', f'/api/bids/{bid.id}', None),
+        ('GET /bids?as_of=', 'get', f'/api/bids?as_of={bids_as_of}',
+         None),
+        ('GET /bids/my', 'get',
+         f'/api/bids/my?username={bid_creator.username}', None),
+        ('POST /bids/new', 'post', '/api/bids/new',
+         {'name': 'benchmark', 'description': 'benchmark',
+          'tender': tender.id, 'creator': bid_creator.id,
+          'organization': bid.organization_id}),
+        ('PATCH /bids/{id}/edit', 'patch', f'/api/bids/{bid.id}/edit',
+         {'description': 'benchmark edit', 'creator': bid_creator.id}),
+        ('PATCH /bids/{id}/status', 'patch', f'/api/bids/{bid.id}/status',
+         {'status': 'PUBLISHED', 'creator': bid_creator.id}),
+        ('PUT /bids/{id}/rollback/{version}', 'put',
+         f'/api/bids/{bid.id}/rollback/1', {'creator': bid_creator.id}),
+        ('GET /bids/{tender_id}/list', 'get',
+         f'/api/bids/{tender.id}/list', None),
+        ('GET /bids/{id}/reviews', 'get',
+         f'/api/bids/{review.bid_id}/reviews?authorUsername='
+         f'{author.username}&organizationId={author_organization.id}', None),
+        ('POST /bids/{id}/feedback', 'post', feedback_url, feedback),
+        ('POST /bids/{id}/feedback (replay)', 'post',
+         feedback_url, feedback, feedback_key),
+    ]
+
+
+class Command(BaseCommand):
+    help = ('Бенчмарк эндпоинтов на синтетических данных: время ответа и '
+            'число запросов к базе для каждого маршрута. Завершается с '
+            'ошибкой, если превышен бюджет времени маршрута. Данные '
+            'создаются во временной транзакции и откатываются')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=1000,
+                            help='Число тендеров (предложений втрое больше)')
+        parser.add_argument('--versions', type=int, default=5,
+                            help='Число версий каждого объекта')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--route', action='append',
+                            help='Запустить только маршруты, имя которых '
+                                 'начинается с указанной строки')
+        parser.add_argument('--time-factor', type=float, default=1.0,
+                            help='Множитель бюджетов времени (для '
+                                 'медленных машин CI)')
+        parser.add_argument('--skip-time', action='store_true',
+                            help='Не проверять бюджеты времени (только '
+                                 'отчет)')
+        parser.add_argument('--json', help='Сохранить результаты в файл')
+
+    def handle(self, *args, **options):
+        # Реплики не видят данных незавершенной транзакции; ограничение
+        # частоты не должно отклонять повторы замеров
+        with override_settings(ALLOWED_HOSTS=['testserver'],
+                               DATABASE_REPLICAS=[], THROTTLE_RATES={}):
+            with transaction.atomic():
+                started = time.perf_counter()
+                data = generate(options['scale'], options['seed'],
+                                options['versions'], prefix='benchmark')
+                self.stdout.write(
+                    f'{connection.vendor}: данные созданы за '
+                    f'{time.perf_counter() - started:.1f} с')
+                try:
+                    results = self.run(routes(data), options)
+                finally:
+                    transaction.set_rollback(True)
+                    responsibility.cache.clear()
+
+        if options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as file:
+                json.dump({'vendor': connection.vendor,
+                           'scale': options['scale'], 'routes': results},
+                          file, ensure_ascii=False, indent=2)
+
+        failed = [result['route'] for result in results
+                  if result['failures']]
+        if failed:
+            raise CommandError(f'Превышен бюджет: {", ".join(failed)}')
+
+    def run(self, cases, options):
+        prefixes = options['route']
+        client = APIClient()
+        results = []
+        self.stdout.write(f'{"route":<40} {"queries":>8} {"median ms":>10} '
+                          f'{"p95 ms":>8} {"KB":>7}  budget')
+        for name, method, url, body, *headers in cases:
+            if prefixes and not any(name.startswith(prefix)
+                                    for prefix in prefixes):
+                continue
+            if name not in BUDGETS:
+                raise CommandError(f'Нет бюджета для маршрута {name}')
+            time_budget = BUDGETS[name] * options['time_factor']
+
+            timings, queries = [], 0
+            for _ in range(options['repeat']):
+                # Холодный кэш ответственности: число запросов не зависит
+                # от порядка маршрутов
+                responsibility.cache.clear()
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = getattr(client, method)(
+                        url, body, format='json', **dict(*headers))
+                    if response.streaming:
+                        size = len(b''.join(response.streaming_content))
+                    else:
+                        size = len(response.content)
+                    timings.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    raise CommandError(
+                        f'{name}: статус {response.status_code} '
+                        f'{response.content[:200]!r}')
+                queries = max(queries, len(captured))
+
+            median = statistics.median(timings) * 1000
+            p95 = sorted(timings)[max(0, int(len(timings) * 0.95) - 1)] \
+                * 1000
+            failures = []
+            if not options['skip_time'] and p95 > time_budget:
+                failures.append(f'p95 {p95:.1f} > {time_budget:.0f} ms')
+            line = (f'{name:<40} {queries:>8} {median:>10.1f} {p95:>8.1f} '
+                    f'{size / 1024:>7.1f}  {time_budget:.0f}ms')
+            if failures:
+                self.stdout.write(self.style.ERROR(
+                    f'{line}  FAIL: {"; ".join(failures)}'))
+            else:
+                self.stdout.write(line)
+            results.append({'route': name, 'queries': queries,
+                            'median_ms': round(median, 2),
+                            'p95_ms': round(p95, 2), 'bytes': size,
+                            'budget_ms': time_budget, 'failures': failures})
+        return results
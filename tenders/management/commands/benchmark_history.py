@@ -0,0 +1,94 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from tenders.history import build_version, reconstruct, stored_size
+from tenders.models import Employee, Organization, Tender, TenderVersion
+
+WORDS = ('поставка', 'монтаж', 'оборудование', 'срок', 'гарантия', 'объект',
+         'работы', 'смета', 'договор', 'услуги', 'материалы', 'проект')
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает размер истории версий и время отката при полном '
+            'хранении версий и при хранении разниц. Данные создаются во '
+            'временной транзакции и откатываются')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--revisions', type=int, default=200)
+        parser.add_argument('--size', type=int, default=4000,
+                            help='Длина описания тендера, символов')
+        parser.add_argument('--samples', type=int, default=100,
+                            help='Число восстановлений случайных версий')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        description = self.text(rng, options['size'])
+        revisions = [description]
+        for _ in range(options['revisions'] - 1):
+            revisions.append(self.edit(rng, revisions[-1]))
+
+        with transaction.atomic():
+            employee = Employee.objects.create(username='benchmark_history')
+            organization = Organization.objects.create(
+                name='benchmark_history', type='LLC')
+            with override_settings(VERSION_KEYFRAME_INTERVAL=1):
+                full = self.run(rng, revisions, employee, organization,
+                                options['samples'])
+            delta = self.run(rng, revisions, employee, organization,
+                             options['samples'])
+            transaction.set_rollback(True)
+
+        for name, (size, timings) in (('full', full), ('delta', delta)):
+            self.stdout.write(
+                f'{name:>5}: {size / 1024:10.1f} KiB, rollback '
+                f'mean {statistics.mean(timings) * 1000:.2f} ms, '
+                f'p95 {self.p95(timings) * 1000:.2f} ms')
+        self.stdout.write(f'ratio: {full[0] / max(delta[0], 1):.1f}x')
+
+    def run(self, rng, revisions, employee, organization, samples):
+        tender = Tender.objects.create(
+            name='benchmark', description=revisions[0],
+            organization=organization, creator=employee, service_type='IT')
+        size = 0
+        for number, text in enumerate(revisions, start=1):
+            tender.description = text
+            tender.version = number
+            version = build_version(tender)
+            version.save()
+            size += stored_size(version)
+
+        timings = []
+        for _ in range(samples):
+            number = rng.randint(1, len(revisions))
+            started = time.perf_counter()
+            version = TenderVersion.objects.get(tender=tender, version=number)
+            state = reconstruct(version)
+            timings.append(time.perf_counter() - started)
+            assert state['description'] == revisions[number - 1]
+        return size, timings
+
+    @staticmethod
+    def text(rng, size):
+        words = []
+        while sum(len(word) + 1 for word in words) < size:
+            words.append(rng.choice(WORDS))
+        return ' '.join(words)
+
+    @staticmethod
+    def edit(rng, text):
+        words = text.split(' ')
+        position = rng.randrange(len(words))
+        words[position:position + 3] = [rng.choice(WORDS)
+                                        for _ in range(rng.randint(1, 4))]
+        return ' '.join(words)
+
+    @staticmethod
+    def p95(values):
+        ordered = sorted(values)
+        return ordered[int(len(ordered) * 0.95) - 1]
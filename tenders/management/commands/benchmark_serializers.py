@@ -0,0 +1,116 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from tenders.models import Bid, Employee, Organization, Review, Tender
+from tenders.serializers import (BidSerializer, ReviewSerializer,
+                                 TenderSerializer, values_serializer)
+
+WORDS = ('поставка', 'монтаж', 'оборудование', 'срок', 'гарантия', 'объект',
+         'работы', 'смета', 'договор', 'услуги', 'материалы', 'проект')
+
+
+class Command(BaseCommand):
+    help = ('Проверяет, что ValuesSerializer выдает тот же JSON, что и '
+            'сериализаторы моделей (в том числе с выборочными полями '
+            '?fields=), и сравнивает время сериализации списков. Данные '
+            'создаются во временной транзакции и откатываются')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            employee = self.create_data(rng, options['rows'])
+            tenders = Tender.objects.filter(creator=employee)
+            bids = Bid.objects.filter(creator=employee)
+            cases = (
+                ('tenders', tenders, TenderSerializer, None),
+                ('bids', bids, BidSerializer, None),
+                ('reviews', Review.objects.filter(author=employee),
+                 ReviewSerializer, None),
+                ('tenders?fields=id,name,status', tenders, TenderSerializer,
+                 frozenset({'id', 'name', 'status'})),
+                ('bids?exclude=description', bids, BidSerializer,
+                 frozenset(values_serializer(BidSerializer).names)
+                 - {'description'}),
+            )
+            results = [
+                self.compare(name, queryset.order_by('-created_at', '-id'),
+                             serializer_class, fields, options['repeat'])
+                for name, queryset, serializer_class, fields in cases
+            ]
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'{"list":>30} {"rows":>7} {"serializer ms":>14} '
+                          f'{"values ms":>10} {"speedup":>8}')
+        for name, rows, model_time, values_time in results:
+            self.stdout.write(
+                f'{name:>30} {rows:>7} {model_time * 1000:>14.1f} '
+                f'{values_time * 1000:>10.1f} '
+                f'{model_time / values_time:>7.1f}x')
+
+    def compare(self, name, queryset, serializer_class, fields, repeat):
+        """
+        Проверяет побайтовое совпадение JSON и возвращает медианное время
+        выборки и сериализации для обоих способов
+        """
+        renderer = JSONRenderer()
+        reader = values_serializer(serializer_class, fields)
+
+        def by_serializer():
+            return renderer.render(serializer_class(
+                list(queryset), many=True, fields=fields).data)
+
+        def by_values():
+            return renderer.render(
+                reader.represent(list(reader.values(queryset))))
+
+        expected, actual = by_serializer(), by_values()
+        if expected != actual:
+            raise CommandError(f'{name}: JSON ValuesSerializer отличается '
+                               f'от {serializer_class.__name__}')
+        return (name, queryset.count(), self.timing(by_serializer, repeat),
+                self.timing(by_values, repeat))
+
+    @staticmethod
+    def timing(func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
+
+    @staticmethod
+    def create_data(rng, count):
+        employee = Employee.objects.create(username='benchmark_serializers')
+        organization = Organization.objects.create(
+            name='benchmark_serializers', type='LLC')
+
+        def text():
+            return ' '.join(rng.choice(WORDS)
+                            for _ in range(rng.randint(5, 40)))
+
+        tenders = Tender.objects.bulk_create(
+            Tender(name=f'benchmark {i}', description=text(),
+                   status=rng.choice(Tender.STATUS_CHOICES)[0],
+                   service_type=rng.choice(Tender.SERVICE_TYPE_CHOICES)[0],
+                   organization=organization, creator=employee)
+            for i in range(count))
+        bids = Bid.objects.bulk_create(
+            Bid(name=f'benchmark {i}', description=text(),
+                tender=rng.choice(tenders), organization=organization,
+                creator=employee)
+            for i in range(count))
+        Review.objects.bulk_create(
+            Review(bid=rng.choice(bids), author=employee, content=text())
+            for _ in range(count))
+        return employee
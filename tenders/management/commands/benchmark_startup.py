@@ -0,0 +1,141 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PROFILES = ('tender_service.settings',
+                    'tender_service.settings_production')
+
+# Выполняется в новом процессе: импорт приложения и первый запрос /api/ping
+# без сервера. Печатает статус ответа и время импорта и запроса в секундах
+PROBE = '''
+import sys
+import time
+
+start = time.perf_counter()
+if sys.argv[1] == 'wsgi':
+    from tender_service.wsgi import application
+else:
+    from tender_service.asgi import application
+imported = time.perf_counter()
+
+if sys.argv[1] == 'wsgi':
+    from wsgiref.util import setup_testing_defaults
+
+    environ = {'PATH_INFO': '/api/ping', 'HTTP_HOST': 'localhost'}
+    setup_testing_defaults(environ)
+    statuses = []
+    b''.join(application(environ, lambda status, headers, exc_info=None:
+                         statuses.append(status)))
+    status = statuses[0].split()[0]
+else:
+    import asyncio
+
+    messages = []
+    requests = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        # Клиент не отключается, пока не получит ответ
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(application({
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': '/api/ping',
+        'raw_path': b'/api/ping', 'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'localhost')],
+        'server': ('localhost', 80), 'client': ('127.0.0.1', 0),
+    }, receive, send))
+    status = messages[0]['status']
+print(status, imported - start, time.perf_counter() - imported)
+'''
+
+
+class Command(BaseCommand):
+    help = ('Время запуска воркера для профилей настроек: импорт приложения '
+            'и время до первого ответа /api/ping в новом процессе. '
+            'Завершается с ошибкой, если время до ответа больше --budget')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profile', action='append',
+            help='Модуль настроек (DJANGO_SETTINGS_MODULE). Можно указать '
+                 'несколько раз; по умолчанию tender_service.settings и '
+                 'tender_service.settings_production')
+        parser.add_argument('--interface', choices=('asgi', 'wsgi'),
+                            default='asgi')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--top', type=int, default=0,
+            help='Показать столько самых долгих импортов верхнего уровня '
+                 '(python -X importtime)')
+        parser.add_argument(
+            '--budget', type=float,
+            help='Максимальное время до первого ответа, мс (медиана)')
+
+    def handle(self, *args, **options):
+        profiles = options['profile'] or DEFAULT_PROFILES
+        self.stdout.write(f'{"profile":<40} {"import ms":>10} '
+                          f'{"ping ms":>8} {"process ms":>11}')
+        over_budget = []
+        for profile in profiles:
+            runs = [self.probe(profile, options['interface'])
+                    for _ in range(options['repeat'])]
+            imported, ping, total = (
+                statistics.median(run[index] for run in runs) * 1000
+                for index in range(3))
+            self.stdout.write(f'{profile:<40} {imported:>10.1f} '
+                              f'{ping:>8.1f} {total:>11.1f}')
+            if options['budget'] is not None \
+                    and imported + ping > options['budget']:
+                over_budget.append(profile)
+            if options['top']:
+                self.show_imports(profile, options['interface'],
+                                  options['top'])
+
+        if over_budget:
+            raise CommandError(
+                f'Время до первого ответа больше {options["budget"]} мс: '
+                f'{", ".join(over_budget)}')
+
+    def run_probe(self, profile, interface, *python_options):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': profile}
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, *python_options, '-c', PROBE, interface],
+            env=env, capture_output=True, text=True)
+        elapsed = time.perf_counter() - started
+        if result.returncode != 0:
+            raise CommandError(f'{profile}: процесс завершился с ошибкой\n'
+                               f'{result.stderr[-2000:]}')
+        return result, elapsed
+
+    def probe(self, profile, interface):
+        """(импорт, первый ответ, весь процесс) в секундах"""
+        result, elapsed = self.run_probe(profile, interface)
+        status, imported, ping = result.stdout.split()
+        if status != '200':
+            raise CommandError(f'{profile}: /api/ping ответил {status}')
+        return float(imported), float(ping), elapsed
+
+    def show_imports(self, profile, interface, count):
+        result, _ = self.run_probe(profile, interface, '-X', 'importtime')
+        imports = []
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:'):
+                continue
+            _, cumulative, name = line.split('|')
+            if not cumulative.strip().isdigit():
+                continue
+            # Импорты верхнего уровня записаны без отступа
+            if name.startswith(' ') and not name.startswith('  '):
+                imports.append((int(cumulative), name.strip()))
+        for cumulative, name in sorted(imports, reverse=True)[:count]:
+            self.stdout.write(f'    {name:<50} {cumulative / 1000:>8.1f} ms')
@@ -0,0 +1,29 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tenders import changes
+
+
+class Command(BaseCommand):
+    help = ('Удаляет из журнала изменений записи старше срока хранения и, '
+            'при необходимости, записи, замененные более новыми записями '
+            'того же объекта')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-days', type=int,
+            default=getattr(settings, 'CHANGES_RETENTION_DAYS', 7))
+        parser.add_argument(
+            '--superseded-after-minutes', type=int,
+            help='Удалять замененные записи старше указанного числа минут')
+
+    def handle(self, *args, **options):
+        minutes = options['superseded_after_minutes']
+        deleted = changes.compact(
+            options['retention_days'],
+            datetime.timedelta(minutes=minutes) if minutes is not None
+            else None)
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено записей журнала: {deleted}'))
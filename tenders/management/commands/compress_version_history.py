@@ -0,0 +1,80 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tenders.history import VERSION_MODELS, TEXT_FIELDS, pack, reconstruct, \
+    stored_size
+
+
+class Command(BaseCommand):
+    help = ('Переводит существующую историю версий в формат опорных версий '
+            'и сжатых разниц (см. tenders.history)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только посчитать экономию места')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Число объектов, обрабатываемых в одной '
+                                 'транзакции')
+
+    def handle(self, *args, **options):
+        for model, (version_model, parent_field, _) in VERSION_MODELS.items():
+            parent_ids = list(
+                version_model.objects.values_list(f'{parent_field}_id',
+                                                  flat=True)
+                .order_by(f'{parent_field}_id').distinct()
+            )
+            before = after = rows = 0
+            batch_size = options['batch_size']
+            for start in range(0, len(parent_ids), batch_size):
+                batch = parent_ids[start:start + batch_size]
+                with transaction.atomic():
+                    # Блокировка объектов не дает параллельно дописывать
+                    # историю, пока она переписывается
+                    list(model.objects.select_for_update()
+                         .filter(id__in=batch).values_list('id', flat=True))
+                    stats = self.convert(version_model, parent_field, batch)
+                    if options['dry_run']:
+                        transaction.set_rollback(True)
+                before += stats[0]
+                after += stats[1]
+                rows += stats[2]
+
+            self.stdout.write(
+                f'{version_model.__name__}: {rows} версий, '
+                f'{before} -> {after} байт'
+                + (' (dry run)' if options['dry_run'] else ''))
+
+    def convert(self, version_model, parent_field, parent_ids):
+        versions = list(
+            version_model.objects.filter(
+                **{f'{parent_field}_id__in': parent_ids})
+            .order_by(f'{parent_field}_id', 'version')
+        )
+        before = sum(stored_size(obj) for obj in versions)
+
+        states, by_key = [], {}
+        for obj in versions:
+            by_key[(getattr(obj, f'{parent_field}_id'), obj.version)] = obj
+        for obj in versions:
+            keyframe = None
+            if obj.base_version is not None:
+                keyframe = by_key.get(
+                    (getattr(obj, f'{parent_field}_id'), obj.base_version))
+            states.append(reconstruct(obj, keyframe))
+
+        current_parent, keyframe = None, None
+        for obj, state in zip(versions, states):
+            if getattr(obj, f'{parent_field}_id') != current_parent:
+                current_parent, keyframe = \
+                    getattr(obj, f'{parent_field}_id'), None
+            text = {field: state[field] for field in TEXT_FIELDS}
+            for field, value in pack(text, obj.version, keyframe).items():
+                setattr(obj, field, value)
+            if obj.base_version is None:
+                keyframe = obj
+
+        version_model.objects.bulk_update(
+            versions, ['name', 'description', 'base_version', 'delta'],
+            batch_size=1000)
+        after = sum(stored_size(obj) for obj in versions)
+        return before, after, len(versions)
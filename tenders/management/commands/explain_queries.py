@@ -0,0 +1,141 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from tenders import responsibility
+from tenders.management.commands.benchmark_endpoints import routes
+from tenders.synthetic import generate
+
+EXPLAIN_PREFIXES = {
+    'postgresql': 'EXPLAIN ',
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+}
+SEQ_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)(?! USING)\s*$'),
+}
+# Запросы, для которых строится план. Управление транзакциями и
+# INSERT без подзапросов таблицы не сканируют
+EXPLAINED_STATEMENTS = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+# Таблицы, которые читаются целиком намеренно: счетчики ObjectStats
+# (несколько строк на организацию) отдаются без фильтра
+FULL_SCAN_TABLES = {'tenders_objectstats'}
+
+
+def endpoint_queries(cases):
+    """
+    Запросы, которые выполняют эндпоинты приложения, в том виде, в котором
+    они доходят до базы: каждый сценарий выполняется через тестовый
+    клиент, запросы перехватываются CaptureQueriesContext. Повторы одного
+    запроса в сценарии не дублируются
+    """
+    client = APIClient()
+    for name, method, url, body, *headers in cases:
+        # Холодный кэш ответственности: в план попадает и проверка прав
+        responsibility.cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            response = getattr(client, method)(url, body, format='json',
+                                               **dict(*headers))
+            if response.streaming:
+                b''.join(response.streaming_content)
+        if response.status_code >= 400:
+            raise CommandError(
+                f'{name}: ответ {response.status_code} '
+                f'{response.content[:200]!r}')
+        statements = dict.fromkeys(
+            query['sql'] for query in captured
+            if query['sql'].lstrip().upper().startswith(EXPLAINED_STATEMENTS))
+        yield name, list(statements)
+
+
+def explain(sql):
+    """План запроса в виде текста"""
+    with connection.cursor() as cursor:
+        cursor.execute(EXPLAIN_PREFIXES[connection.vendor] + sql)
+        return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+
+
+class Command(BaseCommand):
+    help = ('Выполняет сценарии эндпоинтов на синтетических данных, строит '
+            'EXPLAIN для каждого выполненного запроса и сообщает о '
+            'последовательном сканировании таблиц. Данные создаются во '
+            'временной транзакции и откатываются')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=200,
+                            help='Число тендеров (предложений втрое больше)')
+        parser.add_argument('--versions', type=int, default=3,
+                            help='Число версий каждого объекта')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--route', action='append',
+                            help='Проверить только маршруты, имя которых '
+                                 'начинается с указанной строки')
+        parser.add_argument(
+            '--fail', action='store_true',
+            help='Завершиться с ошибкой, если найдено последовательное '
+                 'сканирование')
+        parser.add_argument(
+            '--force-index', action='store_true',
+            help='PostgreSQL: отключить seq scan в планировщике, чтобы '
+                 'проверить наличие индексов на маленьких таблицах')
+        parser.add_argument(
+            '--verbose-plan', action='store_true',
+            help='Печатать запрос и полный план каждого запроса')
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        pattern = SEQ_SCAN_PATTERNS.get(vendor)
+        if pattern is None:
+            raise CommandError(f'EXPLAIN для {vendor} не поддерживается')
+
+        # Реплики не видят данных незавершенной транзакции
+        with override_settings(ALLOWED_HOSTS=['testserver'],
+                               DATABASE_REPLICAS=[], THROTTLE_RATES={}):
+            with transaction.atomic():
+                try:
+                    data = generate(options['scale'], options['seed'],
+                                    options['versions'], prefix='explain')
+                    cases = [case for case in routes(data)
+                             if not options['route'] or any(
+                                 case[0].startswith(prefix)
+                                 for prefix in options['route'])]
+                    if options['force_index'] and vendor == 'postgresql':
+                        with connection.cursor() as cursor:
+                            cursor.execute('SET LOCAL enable_seqscan = off')
+                    flagged = self.report(cases, pattern, options)
+                finally:
+                    transaction.set_rollback(True)
+                    responsibility.cache.clear()
+
+        if flagged and options['fail']:
+            raise CommandError(
+                f'Последовательное сканирование в {len(flagged)} маршрутах')
+
+    def report(self, cases, pattern, options):
+        """Печатает результат по маршрутам и возвращает отмеченные"""
+        # План называет и подзапросы (например, qualify у оконных функций);
+        # отмечаются только таблицы
+        tables = set(connection.introspection.table_names()) \
+            - FULL_SCAN_TABLES
+        flagged = []
+        for name, statements in endpoint_queries(cases):
+            scans = set()
+            for sql in statements:
+                plan = explain(sql)
+                scans.update(
+                    match.group(1) for line in plan.splitlines()
+                    for match in [pattern.search(line)]
+                    if match and match.group(1) in tables)
+                if options['verbose_plan']:
+                    self.stdout.write(f'{sql}\n{plan}\n')
+            if scans:
+                flagged.append(name)
+                self.stdout.write(self.style.WARNING(
+                    f'SEQ SCAN  {name}: {", ".join(sorted(scans))}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f'OK        {name} ({len(statements)} запросов)'))
+        return flagged
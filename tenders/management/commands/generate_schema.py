@@ -0,0 +1,26 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tender_service import schema
+
+
+class Command(BaseCommand):
+    help = ('Генерирует OpenAPI-схему API в файлы openapi-<версия кода>.json '
+            'и .yaml, которые отдают /swagger/ и /redoc/. Запускается при '
+            'сборке образа')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output-dir', default=settings.SCHEMA_DIR,
+            help='Каталог для файлов схемы (по умолчанию SCHEMA_DIR)')
+
+    def handle(self, *args, **options):
+        directory = Path(options['output_dir'])
+        directory.mkdir(parents=True, exist_ok=True)
+        for extension in schema.FORMATS:
+            path = schema.schema_path(extension, directory)
+            path.write_bytes(schema.generate(extension))
+            self.stdout.write(self.style.SUCCESS(
+                f'{path} ({path.stat().st_size} байт)'))
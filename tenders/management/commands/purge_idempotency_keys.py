@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from tenders import idempotency
+
+
+class Command(BaseCommand):
+    help = ('Удаляет сохраненные ответы на запросы с Idempotency-Key, срок '
+            'хранения которых истек')
+
+    def handle(self, *args, **options):
+        deleted = idempotency.purge()
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено ключей идемпотентности: {deleted}'))
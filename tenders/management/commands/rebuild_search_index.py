@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction, DEFAULT_DB_ALIAS
+
+from tenders import search
+
+
+class Command(BaseCommand):
+    help = ('Переустанавливает триггеры полнотекстового поиска и заново '
+            'строит индекс по тендерам и предложениям')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        with transaction.atomic(using=options['database']):
+            if not search.rebuild(connection):
+                raise CommandError(
+                    f'Полнотекстовый индекс для {connection.vendor} '
+                    f'не поддерживается')
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс перестроен'))
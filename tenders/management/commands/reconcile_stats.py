@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tenders import stats
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает сводную статистику тендеров и предложений с '
+            'таблицами, печатает расхождения и перестраивает статистику '
+            'с нуля')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только сообщить о расхождениях')
+        parser.add_argument('--fail', action='store_true',
+                            help='Завершиться с ошибкой, если найдены '
+                                 'расхождения')
+
+    def handle(self, *args, **options):
+        drift = stats.reconcile(fix=not options['dry_run'])
+        for (kind, organization_id, status, service_type), stored, actual \
+                in drift:
+            self.stdout.write(self.style.WARNING(
+                f'{kind} organization={organization_id} status={status} '
+                f'service_type={service_type or "-"}: {stored} -> {actual}'))
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Расхождений нет'))
+        elif options['dry_run']:
+            self.stdout.write(f'Расхождений: {len(drift)}')
+        else:
+            self.stdout.write(f'Расхождений: {len(drift)}, статистика '
+                              f'перестроена')
+        if drift and options['fail']:
+            raise CommandError('Статистика расходится с таблицами')
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tenders import archive
+
+
+class Command(BaseCommand):
+    help = ('Возвращает тендеры из архива вместе с предложениями, версиями '
+            'и отзывами')
+
+    def add_arguments(self, parser):
+        parser.add_argument('tender_ids', nargs='+', type=int)
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Число тендеров в одной транзакции')
+
+    def handle(self, *args, **options):
+        requested = set(options['tender_ids'])
+        total = sum(archive.restore(requested, options['batch_size']))
+        self.stdout.write(self.style.SUCCESS(
+            f'Восстановлено тендеров: {total}'))
+        if total < len(requested):
+            raise CommandError(
+                f'Не найдено в архиве: {len(requested) - total}')
@@ -0,0 +1,155 @@
+"""
+Метрики запросов: число и время SQL-запросов, время сериализации, размер
+ответа и гистограммы по маршрутам в памяти процесса. Выдаются в формате
+Prometheus на /api/metrics (у каждого воркера свои значения)
+"""
+import bisect
+import contextlib
+import contextvars
+import threading
+import time
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                    10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestStats:
+    """Показатели одного запроса"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.route = 'unmatched'
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serialization_time = 0.0
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Обертка выполнения SQL (connection.execute_wrappers): время и число
+    запросов текущего запроса
+    """
+    stats = current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.sql_time += time.perf_counter() - started
+
+
+@contextlib.contextmanager
+def measure_serialization():
+    """Добавляет время блока к времени сериализации текущего запроса"""
+    stats = current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats.serialization_time += time.perf_counter() - started
+
+
+class Histogram:
+    """Гистограмма Prometheus с метками"""
+
+    def __init__(self, name, documentation, buckets, labels):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                series = self._values[label_values] = {
+                    'buckets': [0] * (len(self.buckets) + 1),
+                    'sum': 0.0, 'count': 0}
+            series['buckets'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}',
+                 f'# TYPE {self.name} histogram']
+        with self._lock:
+            values = sorted((key, dict(series, buckets=list(
+                series['buckets']))) for key, series in self._values.items())
+        for label_values, series in values:
+            labels = ','.join(f'{name}="{_escape(value)}"'
+                              for name, value in zip(self.labels,
+                                                     label_values))
+            prefix = f'{labels},' if labels else ''
+            cumulative = 0
+            bounds = [_format(bound) for bound in self.buckets] + ['+Inf']
+            for bound, count in zip(bounds, series['buckets']):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} '
+                             f'{cumulative}')
+            suffix = f'{{{labels}}}' if labels else ''
+            lines.append(f'{self.name}_sum{suffix} {_format(series["sum"])}')
+            lines.append(f'{self.name}_count{suffix} {series["count"]}')
+        return '\n'.join(lines)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"') \
+        .replace('\n', '\\n')
+
+
+def _format(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+LABELS = ('route', 'method')
+REQUEST_DURATION = Histogram(
+    'tender_api_request_duration_seconds',
+    'Время обработки запроса', DURATION_BUCKETS, LABELS + ('status',))
+DB_QUERIES = Histogram(
+    'tender_api_db_queries', 'Число SQL-запросов на запрос', QUERY_BUCKETS,
+    LABELS)
+DB_DURATION = Histogram(
+    'tender_api_db_duration_seconds', 'Суммарное время SQL-запросов',
+    DURATION_BUCKETS, LABELS)
+SERIALIZATION_DURATION = Histogram(
+    'tender_api_serialization_duration_seconds',
+    'Время сериализации и рендеринга ответа', DURATION_BUCKETS, LABELS)
+RESPONSE_SIZE = Histogram(
+    'tender_api_response_size_bytes', 'Размер тела ответа', SIZE_BUCKETS,
+    LABELS)
+HISTOGRAMS = (REQUEST_DURATION, DB_QUERIES, DB_DURATION,
+              SERIALIZATION_DURATION, RESPONSE_SIZE)
+
+
+def observe(stats, method, status_code, size):
+    """Добавляет показатели завершенного запроса в гистограммы"""
+    labels = (stats.route, method)
+    REQUEST_DURATION.observe(stats.elapsed, *labels, str(status_code))
+    DB_QUERIES.observe(stats.queries, *labels)
+    DB_DURATION.observe(stats.sql_time, *labels)
+    SERIALIZATION_DURATION.observe(stats.serialization_time, *labels)
+    if size is not None:
+        RESPONSE_SIZE.observe(size, *labels)
+
+
+def render():
+    """Все гистограммы в текстовом формате Prometheus"""
+    return '\n'.join(histogram.render() for histogram in HISTOGRAMS) + '\n'
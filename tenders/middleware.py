@@ -0,0 +1,168 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.throttling import BaseThrottle
+
+from . import metrics
+from .routers import choose_replica, read_replica, replica_aliases
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """
+    Направляет чтение GET-запросов к представлениям с replica_reads = True
+    на реплики. После успешного изменения клиент в течение
+    REPLICA_STICKY_SECONDS читает из основной базы, чтобы сразу видеть
+    результат своих изменений (read-your-writes). Клиент узнается по
+    cookie и по IP (запись в кэше REPLICA_STICKY_CACHE), поэтому
+    клиенты без cookie тоже читают свои изменения
+    """
+
+    cookie_name = 'db_primary_until'
+    cache_prefix = 'replica:primary:'
+
+    def process_request(self, request):
+        read_replica.set(None)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None) \
+            or getattr(view_func, 'view_class', None)
+        if request.method in SAFE_METHODS and replica_aliases() \
+                and getattr(view_class, 'replica_reads', False) \
+                and not self.is_sticky(request):
+            read_replica.set(choose_replica())
+
+    def process_response(self, request, response):
+        read_replica.set(None)
+        # Отклоненный запрос ничего не изменил: читать из основной базы
+        # незачем
+        if request.method not in SAFE_METHODS \
+                and response.status_code < 400:
+            seconds = getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+            until = int(time.time()) + seconds
+            response.set_cookie(self.cookie_name, str(until),
+                                max_age=seconds, httponly=True,
+                                samesite='Lax')
+            if replica_aliases():
+                sticky_cache().set(self.client_key(request), until, seconds)
+        return response
+
+    def client_key(self, request):
+        return self.cache_prefix + BaseThrottle().get_ident(request)
+
+    def is_sticky(self, request):
+        """Клиент недавно изменял данные и должен читать из основной базы"""
+        try:
+            until = int(request.COOKIES[self.cookie_name])
+        except (KeyError, ValueError):
+            until = sticky_cache().get(self.client_key(request), 0)
+        return until > time.time()
+
+
+def sticky_cache():
+    return caches[getattr(settings, 'REPLICA_STICKY_CACHE', 'default')]
+
+
+class RequestMetricsMiddleware(MiddlewareMixin):
+    """
+    Записывает для каждого запроса маршрут (вьюсет и действие), число и
+    время SQL-запросов, время сериализации и размер ответа. Показатели
+    отдаются в заголовке Server-Timing и добавляются в гистограммы
+    tenders.metrics. Должен стоять первым в MIDDLEWARE
+    """
+
+    def process_request(self, request):
+        request._metrics = metrics.RequestStats()
+        metrics.current.set(request._metrics)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = getattr(request, '_metrics', None)
+        if stats is not None:
+            stats.route = self.route_name(view_func, request.method)
+
+    def process_response(self, request, response):
+        stats = getattr(request, '_metrics', None)
+        if stats is None:
+            return response
+        metrics.current.set(None)
+        size = None if response.streaming else len(response.content)
+        response['Server-Timing'] = (
+            f'db;dur={stats.sql_time * 1000:.2f};'
+            f'desc="{stats.queries} queries", '
+            f'serialize;dur={stats.serialization_time * 1000:.2f}, '
+            f'total;dur={stats.elapsed * 1000:.2f}')
+        metrics.observe(stats, request.method, response.status_code, size)
+        return response
+
+    @staticmethod
+    def route_name(view_func, method):
+        """
+        Имя маршрута: <вьюсет>.<действие> для вьюсетов и асинхронных
+        обработчиков чтения, иначе имя функции представления
+        """
+        initkwargs = getattr(view_func, 'view_initkwargs', None) or {}
+        viewset = initkwargs.get('viewset')
+        if viewset is not None:
+            if method in SAFE_METHODS:
+                return f'{viewset.__name__}.{view_func.view_class.action}'
+            view_func = initkwargs.get('fallback') or view_func
+        actions = getattr(view_func, 'actions', None)
+        if actions:
+            action = actions.get(method.lower(), method.lower())
+            return f'{view_func.cls.__name__}.{action}'
+        view_class = getattr(view_func, 'cls', None) \
+            or getattr(view_func, 'view_class', None)
+        if view_class is not None:
+            return view_class.__name__
+        return view_func.__name__
+
+
+class LoadSheddingMiddleware(MiddlewareMixin):
+    """
+    Ограничивает число одновременно обрабатываемых запросов в процессе.
+    Сверх MAX_IN_FLIGHT_REQUESTS сервер сразу отвечает 503 с Retry-After,
+    не занимая базу и воркер. Проверки работоспособности, метрики и
+    журнал изменений (ожидающие соединения почти не нагружают сервер) не
+    ограничиваются. Для потоковых ответов запрос считается завершенным,
+    когда начинается передача тела
+    """
+
+    exempt_paths = ('/api/ping', '/api/metrics', '/api/changes',
+                    '/api/changes/stream')
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def process_request(self, request):
+        limit = getattr(settings, 'MAX_IN_FLIGHT_REQUESTS', 0)
+        if not limit or request.path in self.exempt_paths:
+            return None
+        with self._lock:
+            if self.in_flight >= limit:
+                return self.overloaded()
+            self.in_flight += 1
+        request._in_flight = True
+        return None
+
+    def process_response(self, request, response):
+        if getattr(request, '_in_flight', False):
+            request._in_flight = False
+            with self._lock:
+                self.in_flight -= 1
+        return response
+
+    @staticmethod
+    def overloaded():
+        response = JsonResponse(
+            {"detail": "Service is overloaded, retry later."},
+            status=503)
+        response['Retry-After'] = str(
+            getattr(settings, 'LOAD_SHEDDING_RETRY_AFTER', 1))
+        return response
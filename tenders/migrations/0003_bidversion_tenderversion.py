@@ -1,39 +1,39 @@
-# Generated by Django 5.1.1 on 2024-09-13 06:54
-
-import django.db.models.deletion
-from django.db import migrations, models
-
-
-class Migration(migrations.Migration):
-
-    dependencies = [
-        ('tenders', '0002_tender_service_type'),
-    ]
-
-    operations = [
-        migrations.CreateModel(
-            name='BidVersion',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('name', models.CharField(max_length=255)),
-                ('description', models.TextField(blank=True, null=True)),
-                ('status', models.CharField(max_length=10)),
-                ('version', models.PositiveIntegerField()),
-                ('saved_at', models.DateTimeField(auto_now_add=True)),
-                ('bid', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='tenders.bid')),
-            ],
-        ),
-        migrations.CreateModel(
-            name='TenderVersion',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('name', models.CharField(max_length=255)),
-                ('description', models.TextField(blank=True, null=True)),
-                ('status', models.CharField(max_length=10)),
-                ('service_type', models.CharField(max_length=50)),
-                ('version', models.PositiveIntegerField()),
-                ('saved_at', models.DateTimeField(auto_now_add=True)),
-                ('tender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='tenders.tender')),
-            ],
-        ),
-    ]
+# Generated by Django 5.1.1 on 2024-09-13 06:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenders', '0002_tender_service_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BidVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(max_length=10)),
+                ('version', models.PositiveIntegerField()),
+                ('saved_at', models.DateTimeField(auto_now_add=True)),
+                ('bid', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='tenders.bid')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TenderVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(max_length=10)),
+                ('service_type', models.CharField(max_length=50)),
+                ('version', models.PositiveIntegerField()),
+                ('saved_at', models.DateTimeField(auto_now_add=True)),
+                ('tender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='tenders.tender')),
+            ],
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.1 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenders', '0004_review'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tender',
+            index=models.Index(fields=['-created_at', '-id'], name='tender_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['-created_at', '-id'], name='bid_created_id_idx'),
+        ),
+    ]
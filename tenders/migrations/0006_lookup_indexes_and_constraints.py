@@ -0,0 +1,101 @@
+# Generated by Django 5.1.1 on 2026-10-18 09:40
+
+from django.db import IntegrityError, migrations, models
+
+# Сколько групп дубликатов показывать в отчете
+REPORT_LIMIT = 50
+
+
+def check_duplicates(apps, schema_editor):
+    """
+    Проверяет, что нет дубликатов, мешающих созданию уникальных
+    ограничений. Если они есть, миграция завершается с ошибкой и списком
+    дубликатов: какие записи оставить, решает администратор базы
+    """
+    report = []
+    for model_name, fields in (
+            ('TenderVersion', ('tender_id', 'version')),
+            ('BidVersion', ('bid_id', 'version')),
+            ('OrganizationResponsible', ('user_id', 'organization_id')),
+    ):
+        model = apps.get_model('tenders', model_name)
+        duplicates = (
+            model.objects.values(*fields)
+            .annotate(cnt=models.Count('id'))
+            .filter(cnt__gt=1)
+            .order_by(*fields)
+        )
+        for row in duplicates:
+            lookup = {field: row[field] for field in fields}
+            ids = list(model.objects.filter(**lookup).order_by('id')
+                       .values_list('id', flat=True))
+            key = ', '.join(f'{field}={value}'
+                            for field, value in lookup.items())
+            report.append(f'{model._meta.db_table} ({key}): id {ids}')
+    if report:
+        shown = '\n'.join(report[:REPORT_LIMIT])
+        more = f'\n... и еще {len(report) - REPORT_LIMIT}' \
+            if len(report) > REPORT_LIMIT else ''
+        raise IntegrityError(
+            f'Найдены дубликаты (групп: {len(report)}), уникальные '
+            f'ограничения не созданы. Удалите или объедините лишние '
+            f'записи и повторите migrate:\n{shown}{more}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenders', '0005_tender_bid_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicates, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='bid_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['tender', '-created_at', '-id'], name='bid_tender_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['creator', '-created_at', '-id'], name='bid_creator_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(condition=models.Q(('status', 'PUBLISHED')), fields=['tender', '-created_at', '-id'], name='bid_tender_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['bid', 'author'], name='review_bid_author_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tender',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='tender_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tender',
+            index=models.Index(fields=['service_type', 'status', '-created_at', '-id'], name='tender_type_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tender',
+            index=models.Index(fields=['creator', '-created_at', '-id'], name='tender_creator_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tender',
+            index=models.Index(condition=models.Q(('status', 'PUBLISHED')), fields=['-created_at', '-id'], name='tender_published_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='bidversion',
+            constraint=models.UniqueConstraint(fields=('bid', 'version'), name='bid_version_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='tenderversion',
+            constraint=models.UniqueConstraint(fields=('tender', 'version'), name='tender_version_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='organizationresponsible',
+            constraint=models.UniqueConstraint(fields=('user', 'organization'), name='org_responsible_user_org_uniq'),
+        ),
+    ]
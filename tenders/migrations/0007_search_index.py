@@ -0,0 +1,24 @@
+# Generated by Django 5.1.1 on 2026-10-18 11:05
+
+from django.db import migrations
+
+from tenders import search
+
+
+def install_search_index(apps, schema_editor):
+    search.rebuild(schema_editor.connection)
+
+
+def uninstall_search_index(apps, schema_editor):
+    search.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenders', '0006_lookup_indexes_and_constraints'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.1 on 2026-10-18 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenders', '0007_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bidversion',
+            name='base_version',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='bidversion',
+            name='delta',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tenderversion',
+            name='base_version',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tenderversion',
+            name='delta',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='bidversion',
+            name='name',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AlterField(
+            model_name='tenderversion',
+            name='name',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+    ]
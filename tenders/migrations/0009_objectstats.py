@@ -0,0 +1,51 @@
+# Generated by Django 5.1.1 on 2026-10-18 14:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_stats(apps, schema_editor):
+    ObjectStats = apps.get_model('tenders', 'ObjectStats')
+    Tender = apps.get_model('tenders', 'Tender')
+    Bid = apps.get_model('tenders', 'Bid')
+    rows = [
+        ObjectStats(kind='tender', organization_id=organization_id,
+                    status=status, service_type=service_type, count=count)
+        for organization_id, status, service_type, count
+        in Tender.objects.order_by().values_list(
+            'organization_id', 'status', 'service_type').annotate(Count('id'))
+    ]
+    rows += [
+        ObjectStats(kind='bid', organization_id=organization_id,
+                    status=status, service_type='', count=count)
+        for organization_id, status, count
+        in Bid.objects.order_by().values_list(
+            'organization_id', 'status').annotate(Count('id'))
+    ]
+    ObjectStats.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenders', '0008_version_delta_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ObjectStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('tender', 'Tender'), ('bid', 'Bid')], max_length=10)),
+                ('status', models.CharField(max_length=10)),
+                ('service_type', models.CharField(blank=True, default='', max_length=50)),
+                ('count', models.IntegerField(default=0)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tenders.organization')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'organization', 'status', 'service_type'), name='object_stats_key_uniq')],
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
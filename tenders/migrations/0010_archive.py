@@ -0,0 +1,152 @@
+# Generated by Django 5.1.1 on 2026-10-18 15:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+TENDER_COLUMNS = ('id, name, description, organization_id, status, '
+                  'service_type, version, creator_id, created_at, updated_at')
+BID_COLUMNS = ('id, name, description, status, version, tender_id, '
+               'creator_id, organization_id, created_at, updated_at')
+
+
+def union_view(view, table, archive_table, columns):
+    return (f'CREATE VIEW {view} AS '
+            f'SELECT {columns} FROM {table} '
+            f'UNION ALL SELECT {columns} FROM {archive_table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenders', '0009_objectstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTender',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(max_length=10)),
+                ('service_type', models.CharField(max_length=50)),
+                ('version', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tenders.employee')),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tenders.organization')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-created_at', '-id'], name='archived_tender_created_idx'), models.Index(fields=['creator', '-created_at', '-id'], name='archived_tender_creator_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedTenderVersion',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(blank=True, max_length=255, null=True)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(max_length=10)),
+                ('service_type', models.CharField(max_length=50)),
+                ('version', models.PositiveIntegerField()),
+                ('base_version', models.PositiveIntegerField(blank=True, null=True)),
+                ('delta', models.BinaryField(blank=True, null=True)),
+                ('saved_at', models.DateTimeField()),
+                ('tender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='tenders.archivedtender')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('tender', 'version'), name='archived_tender_version_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedBid',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(max_length=10)),
+                ('version', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tenders.employee')),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tenders.organization')),
+                ('tender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tenders.archivedtender')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-created_at', '-id'], name='archived_bid_created_idx'), models.Index(fields=['tender', '-created_at', '-id'], name='archived_bid_tender_idx'), models.Index(fields=['creator', '-created_at', '-id'], name='archived_bid_creator_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedBidVersion',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(blank=True, max_length=255, null=True)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(max_length=10)),
+                ('version', models.PositiveIntegerField()),
+                ('base_version', models.PositiveIntegerField(blank=True, null=True)),
+                ('delta', models.BinaryField(blank=True, null=True)),
+                ('saved_at', models.DateTimeField()),
+                ('bid', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='tenders.archivedbid')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('bid', 'version'), name='archived_bid_version_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedReview',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('content', models.TextField()),
+                ('created_at', models.DateTimeField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tenders.employee')),
+                ('bid', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='tenders.archivedbid')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TenderWithArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(max_length=10)),
+                ('service_type', models.CharField(max_length=50)),
+                ('version', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='tenders.employee')),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='tenders.organization')),
+            ],
+            options={
+                'db_table': 'tenders_tender_all',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='BidWithArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(max_length=10)),
+                ('version', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='tenders.employee')),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='tenders.organization')),
+                ('tender', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='tenders.tenderwitharchive')),
+            ],
+            options={
+                'db_table': 'tenders_bid_all',
+                'managed': False,
+            },
+        ),
+        migrations.RunSQL(
+            union_view('tenders_tender_all', 'tenders_tender',
+                       'tenders_archivedtender', TENDER_COLUMNS),
+            'DROP VIEW tenders_tender_all'),
+        migrations.RunSQL(
+            union_view('tenders_bid_all', 'tenders_bid',
+                       'tenders_archivedbid', BID_COLUMNS),
+            'DROP VIEW tenders_bid_all'),
+    ]
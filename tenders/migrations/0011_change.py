@@ -0,0 +1,28 @@
+# Generated by Django 5.1.1 on 2026-10-18 16:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenders', '0010_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('tender', 'Tender'), ('bid', 'Bid'), ('review', 'Review')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('status', 'Status changed'), ('rollback', 'Rolled back'), ('deleted', 'Deleted')], max_length=10)),
+                ('version', models.PositiveIntegerField(blank=True, null=True)),
+                ('data', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at'], name='change_created_idx'), models.Index(fields=['kind', 'object_id', 'id'], name='change_object_idx')],
+            },
+        ),
+    ]
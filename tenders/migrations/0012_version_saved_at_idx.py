@@ -0,0 +1,21 @@
+# Generated by Django 5.1.1 on 2026-10-18 17:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenders', '0011_change'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tenderversion',
+            index=models.Index(fields=['tender', 'saved_at'], name='tender_version_saved_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bidversion',
+            index=models.Index(fields=['bid', 'saved_at'], name='bid_version_saved_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.1 on 2026-10-18 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenders', '0013_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='idempotencykey',
+            name='key',
+            field=models.CharField(max_length=255),
+        ),
+        # Существующие записи получают пустую область и больше не
+        # совпадают с запросами; их удалит purge_idempotency_keys
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='client',
+            field=models.CharField(default='', max_length=255),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='method',
+            field=models.CharField(default='', max_length=10),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='path',
+            field=models.CharField(default='', max_length=255),
+            preserve_default=False,
+        ),
+        migrations.AddConstraint(
+            model_name='idempotencykey',
+            constraint=models.UniqueConstraint(fields=('key', 'client', 'method', 'path'), name='idempotency_key_scope_uniq'),
+        ),
+    ]
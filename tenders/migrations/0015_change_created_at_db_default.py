@@ -0,0 +1,19 @@
+# Generated by Django 5.1.1 on 2026-10-18 21:40
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenders', '0014_idempotencykey_scope'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='change',
+            name='created_at',
+            field=models.DateTimeField(db_default=django.db.models.functions.datetime.Now()),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.1 on 2026-10-19 10:20
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def number_changes(apps, schema_editor):
+    Change = apps.get_model('tenders', 'Change')
+    Change.objects.update(seq=F('id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenders', '0015_change_created_at_db_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='change',
+            name='seq',
+            field=models.BigIntegerField(blank=True, null=True, unique=True),
+        ),
+        # Существующие записи добавлены под advisory lock, их id уже идут
+        # в порядке фиксации
+        migrations.RunPython(number_changes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(condition=models.Q(('seq', None)), fields=['id'], name='change_pending_idx'),
+        ),
+    ]
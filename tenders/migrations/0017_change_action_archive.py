@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-19 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenders', '0016_change_seq'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='change',
+            name='action',
+            field=models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('status', 'Status changed'), ('rollback', 'Rolled back'), ('deleted', 'Deleted'), ('archived', 'Archived'), ('restored', 'Restored')], max_length=10),
+        ),
+    ]
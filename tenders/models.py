@@ -1,151 +1,498 @@
-from django.db import models
-
-
-class Employee(models.Model):
-    """Модель пользователя"""
-
-    username = models.CharField(max_length=50, unique=True)
-    first_name = models.CharField(max_length=50, blank=True, null=True)
-    last_name = models.CharField(max_length=50, blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
-
-    def __str__(self):
-        return self.username
-
-    class Meta:
-        managed = False
-        db_table = 'employee'
-
-
-class Organization(models.Model):
-    """Модель организации"""
-
-    ORGANIZATION_TYPES = [
-        ('IE', 'IE'),
-        ('LLC', 'LLC'),
-        ('JSC', 'JSC'),
-    ]
-    name = models.CharField(max_length=100)
-    description = models.TextField(blank=True, null=True)
-    type = models.CharField(max_length=3, choices=ORGANIZATION_TYPES)
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
-
-    def __str__(self):
-        return self.name
-
-    class Meta:
-        managed = False
-        db_table = 'organization'
-
-
-class OrganizationResponsible(models.Model):
-    """Модель для связи организации с ответственным пользователем"""
-
-    organization = models.ForeignKey(Organization, on_delete=models.CASCADE)
-    user = models.ForeignKey(Employee, on_delete=models.CASCADE)
-
-    def __str__(self):
-        return f'{self.user.username} - {self.organization.name}'
-
-    class Meta:
-        managed = False
-        db_table = 'organization_responsible'
-
-
-class Tender(models.Model):
-    """Модель тендера"""
-
-    STATUS_CHOICES = [
-        ('CREATED', 'Created'),
-        ('PUBLISHED', 'Published'),
-        ('CLOSED', 'Closed'),
-    ]
-
-    SERVICE_TYPE_CHOICES = [
-        ('Construction', 'Construction'),
-        ('Consulting', 'Consulting'),
-        ('IT', 'IT'),
-        ('Other', 'Other'),
-    ]
-
-    name = models.CharField(max_length=255)
-    description = models.TextField(blank=True, null=True)
-    organization = models.ForeignKey(Organization, on_delete=models.CASCADE)
-    status = models.CharField(max_length=10, choices=STATUS_CHOICES,
-                              default='CREATED')
-    service_type = models.CharField(max_length=50,
-                                    choices=SERVICE_TYPE_CHOICES)
-    version = models.PositiveIntegerField(default=1)
-    creator = models.ForeignKey(Employee, on_delete=models.CASCADE)
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
-
-    def __str__(self):
-        return self.name
-
-
-class TenderVersion(models.Model):
-    """Модель для хранения версий тендера"""
-    tender = models.ForeignKey(Tender, related_name='versions',
-                               on_delete=models.CASCADE)
-    name = models.CharField(max_length=255)
-    description = models.TextField(blank=True, null=True)
-    status = models.CharField(max_length=10)
-    service_type = models.CharField(max_length=50)
-    version = models.PositiveIntegerField()
-    saved_at = models.DateTimeField(auto_now_add=True)
-
-    def __str__(self):
-        return f"Version {self.version} of {self.tender.name}"
-
-
-class Bid(models.Model):
-    """Модель предложения на тендер"""
-
-    STATUS_CHOICES = [
-        ('CREATED', 'Created'),
-        ('PUBLISHED', 'Published'),
-        ('CANCELED', 'Canceled'),
-    ]
-
-    name = models.CharField(max_length=255)
-    description = models.TextField(blank=True, null=True)
-    status = models.CharField(max_length=10, choices=STATUS_CHOICES,
-                              default='CREATED')
-    version = models.PositiveIntegerField(default=1)
-    tender = models.ForeignKey(Tender, on_delete=models.CASCADE)
-    creator = models.ForeignKey(Employee, on_delete=models.CASCADE)
-    organization = models.ForeignKey(Organization, on_delete=models.CASCADE)
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
-
-    def __str__(self):
-        return self.name
-
-
-class BidVersion(models.Model):
-    """Модель для хранения версий предложения"""
-    bid = models.ForeignKey(Bid, related_name='versions',
-                            on_delete=models.CASCADE)
-    name = models.CharField(max_length=255)
-    description = models.TextField(blank=True, null=True)
-    status = models.CharField(max_length=10)
-    version = models.PositiveIntegerField()
-    saved_at = models.DateTimeField(auto_now_add=True)
-
-    def __str__(self):
-        return f"Version {self.version} of {self.bid.name}"
-
-
-class Review(models.Model):
-    """Модель для хранения отзывов на предложения"""
-    bid = models.ForeignKey(Bid, related_name='reviews',
-                            on_delete=models.CASCADE)
-    author = models.ForeignKey(Employee, on_delete=models.CASCADE)
-    content = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
-
-    def __str__(self):
-        return f"Review by {self.author.username} on {self.bid.name}"
+from django.db import models
+from django.db.models.functions import Now
+
+
+class Employee(models.Model):
+    """Модель пользователя"""
+
+    username = models.CharField(max_length=50, unique=True)
+    first_name = models.CharField(max_length=50, blank=True, null=True)
+    last_name = models.CharField(max_length=50, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.username
+
+    class Meta:
+        managed = False
+        db_table = 'employee'
+
+
+class Organization(models.Model):
+    """Модель организации"""
+
+    ORGANIZATION_TYPES = [
+        ('IE', 'IE'),
+        ('LLC', 'LLC'),
+        ('JSC', 'JSC'),
+    ]
+    name = models.CharField(max_length=100)
+    description = models.TextField(blank=True, null=True)
+    type = models.CharField(max_length=3, choices=ORGANIZATION_TYPES)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        managed = False
+        db_table = 'organization'
+
+
+class OrganizationResponsible(models.Model):
+    """Модель для связи организации с ответственным пользователем"""
+
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE)
+    user = models.ForeignKey(Employee, on_delete=models.CASCADE)
+
+    def __str__(self):
+        return f'{self.user.username} - {self.organization.name}'
+
+    class Meta:
+        managed = False
+        db_table = 'organization_responsible'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'organization'],
+                                    name='org_responsible_user_org_uniq'),
+        ]
+
+
+class Tender(models.Model):
+    """Модель тендера"""
+
+    STATUS_CHOICES = [
+        ('CREATED', 'Created'),
+        ('PUBLISHED', 'Published'),
+        ('CLOSED', 'Closed'),
+    ]
+
+    SERVICE_TYPE_CHOICES = [
+        ('Construction', 'Construction'),
+        ('Consulting', 'Consulting'),
+        ('IT', 'IT'),
+        ('Other', 'Other'),
+    ]
+
+    name = models.CharField(max_length=255)
+    description = models.TextField(blank=True, null=True)
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES,
+                              default='CREATED')
+    service_type = models.CharField(max_length=50,
+                                    choices=SERVICE_TYPE_CHOICES)
+    version = models.PositiveIntegerField(default=1)
+    creator = models.ForeignKey(Employee, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'],
+                         name='tender_created_id_idx'),
+            models.Index(fields=['status', '-created_at', '-id'],
+                         name='tender_status_created_idx'),
+            models.Index(fields=['service_type', 'status', '-created_at',
+                                 '-id'],
+                         name='tender_type_status_idx'),
+            models.Index(fields=['creator', '-created_at', '-id'],
+                         name='tender_creator_created_idx'),
+            models.Index(fields=['-created_at', '-id'],
+                         condition=models.Q(status='PUBLISHED'),
+                         name='tender_published_idx'),
+        ]
+
+
+class TenderVersion(models.Model):
+    """
+    Модель для хранения версий тендера. Если задан base_version, name и
+    description хранятся в delta как разница с версией base_version
+    (см. tenders.history)
+    """
+    tender = models.ForeignKey(Tender, related_name='versions',
+                               on_delete=models.CASCADE)
+    name = models.CharField(max_length=255, blank=True, null=True)
+    description = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=10)
+    service_type = models.CharField(max_length=50)
+    version = models.PositiveIntegerField()
+    base_version = models.PositiveIntegerField(blank=True, null=True)
+    delta = models.BinaryField(blank=True, null=True)
+    saved_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Version {self.version} of {self.tender.name}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tender', 'version'],
+                                    name='tender_version_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['tender', 'saved_at'],
+                         name='tender_version_saved_idx'),
+        ]
+
+
+class Bid(models.Model):
+    """Модель предложения на тендер"""
+
+    STATUS_CHOICES = [
+        ('CREATED', 'Created'),
+        ('PUBLISHED', 'Published'),
+        ('CANCELED', 'Canceled'),
+    ]
+
+    name = models.CharField(max_length=255)
+    description = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES,
+                              default='CREATED')
+    version = models.PositiveIntegerField(default=1)
+    tender = models.ForeignKey(Tender, on_delete=models.CASCADE)
+    creator = models.ForeignKey(Employee, on_delete=models.CASCADE)
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'],
+                         name='bid_created_id_idx'),
+            models.Index(fields=['status', '-created_at', '-id'],
+                         name='bid_status_created_idx'),
+            models.Index(fields=['tender', '-created_at', '-id'],
+                         name='bid_tender_created_idx'),
+            models.Index(fields=['creator', '-created_at', '-id'],
+                         name='bid_creator_created_idx'),
+            models.Index(fields=['tender', '-created_at', '-id'],
+                         condition=models.Q(status='PUBLISHED'),
+                         name='bid_tender_published_idx'),
+        ]
+
+
+class BidVersion(models.Model):
+    """
+    Модель для хранения версий предложения. Если задан base_version, name и
+    description хранятся в delta как разница с версией base_version
+    (см. tenders.history)
+    """
+    bid = models.ForeignKey(Bid, related_name='versions',
+                            on_delete=models.CASCADE)
+    name = models.CharField(max_length=255, blank=True, null=True)
+    description = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=10)
+    version = models.PositiveIntegerField()
+    base_version = models.PositiveIntegerField(blank=True, null=True)
+    delta = models.BinaryField(blank=True, null=True)
+    saved_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Version {self.version} of {self.bid.name}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['bid', 'version'],
+                                    name='bid_version_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['bid', 'saved_at'],
+                         name='bid_version_saved_idx'),
+        ]
+
+
+class Review(models.Model):
+    """Модель для хранения отзывов на предложения"""
+    bid = models.ForeignKey(Bid, related_name='reviews',
+                            on_delete=models.CASCADE)
+    author = models.ForeignKey(Employee, on_delete=models.CASCADE)
+    content = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Review by {self.author.username} on {self.bid.name}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['bid', 'author'],
+                         name='review_bid_author_idx'),
+        ]
+
+
+class ObjectStats(models.Model):
+    """
+    Число тендеров и предложений по организации, статусу и типу услуг.
+    Обновляется в той же транзакции, что и изменение объектов
+    (см. tenders.stats). У предложений service_type пустой
+    """
+
+    KIND_CHOICES = [
+        ('tender', 'Tender'),
+        ('bid', 'Bid'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE)
+    status = models.CharField(max_length=10)
+    service_type = models.CharField(max_length=50, blank=True, default='')
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return (f'{self.kind} {self.organization_id} {self.status} '
+                f'{self.service_type}: {self.count}')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind', 'organization', 'status', 'service_type'],
+                name='object_stats_key_uniq'),
+        ]
+
+
+class Change(models.Model):
+    """
+    Запись журнала изменений (outbox) для /api/changes. Пишется в той же
+    транзакции, что и изменение объекта (см. tenders.changes)
+    """
+
+    KIND_CHOICES = [
+        ('tender', 'Tender'),
+        ('bid', 'Bid'),
+        ('review', 'Review'),
+    ]
+    ACTION_CHOICES = [
+        ('created', 'Created'),
+        ('updated', 'Updated'),
+        ('status', 'Status changed'),
+        ('rollback', 'Rolled back'),
+        ('deleted', 'Deleted'),
+        ('archived', 'Archived'),
+        ('restored', 'Restored'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    version = models.PositiveIntegerField(blank=True, null=True)
+    data = models.JSONField(blank=True, null=True)
+    # Время базы, а не воркера: часы воркеров могут расходиться
+    created_at = models.DateTimeField(db_default=Now())
+    # Номер записи в журнале (курсор). Выдается после фиксации транзакции
+    # (tenders.changes.assign_sequence)
+    seq = models.BigIntegerField(blank=True, null=True, unique=True)
+
+    def __str__(self):
+        return f'{self.id}: {self.kind} {self.object_id} {self.action}'
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='change_created_idx'),
+            models.Index(fields=['kind', 'object_id', 'id'],
+                         name='change_object_idx'),
+            models.Index(fields=['id'], condition=models.Q(seq=None),
+                         name='change_pending_idx'),
+        ]
+
+
+class IdempotencyKey(models.Model):
+    """
+    Первый ответ на запрос с заголовком Idempotency-Key (см.
+    tenders.idempotency). Тело ответа хранится сжатым zlib
+    """
+
+    key = models.CharField(max_length=255)
+    # Клиент (IP), метод и путь запроса: одинаковые ключи разных клиентов
+    # и эндпоинтов не пересекаются
+    client = models.CharField(max_length=255)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=255)
+    # sha256 метода, адреса и тела запроса
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(blank=True, null=True)
+    content_type = models.CharField(max_length=100, blank=True, default='')
+    headers = models.JSONField(blank=True, default=dict)
+    body = models.BinaryField(blank=True, default=b'')
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.key}: {self.status_code}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['key', 'client', 'method', 'path'],
+                name='idempotency_key_scope_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'],
+                         name='idempotency_expires_idx'),
+        ]
+
+
+class ArchivedTender(models.Model):
+    """
+    Архивный тендер. Колонки совпадают с Tender, id сохраняется
+    (см. tenders.archive)
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    name = models.CharField(max_length=255)
+    description = models.TextField(blank=True, null=True)
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE,
+                                     related_name='+')
+    status = models.CharField(max_length=10)
+    service_type = models.CharField(max_length=50)
+    version = models.PositiveIntegerField()
+    creator = models.ForeignKey(Employee, on_delete=models.CASCADE,
+                                related_name='+')
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'],
+                         name='archived_tender_created_idx'),
+            models.Index(fields=['creator', '-created_at', '-id'],
+                         name='archived_tender_creator_idx'),
+        ]
+
+
+class ArchivedTenderVersion(models.Model):
+    """Версия архивного тендера. Колонки совпадают с TenderVersion"""
+
+    id = models.BigIntegerField(primary_key=True)
+    tender = models.ForeignKey(ArchivedTender, related_name='versions',
+                               on_delete=models.CASCADE)
+    name = models.CharField(max_length=255, blank=True, null=True)
+    description = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=10)
+    service_type = models.CharField(max_length=50)
+    version = models.PositiveIntegerField()
+    base_version = models.PositiveIntegerField(blank=True, null=True)
+    delta = models.BinaryField(blank=True, null=True)
+    saved_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tender', 'version'],
+                                    name='archived_tender_version_uniq'),
+        ]
+
+
+class ArchivedBid(models.Model):
+    """Предложение архивного тендера. Колонки совпадают с Bid"""
+
+    id = models.BigIntegerField(primary_key=True)
+    name = models.CharField(max_length=255)
+    description = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=10)
+    version = models.PositiveIntegerField()
+    tender = models.ForeignKey(ArchivedTender, on_delete=models.CASCADE)
+    creator = models.ForeignKey(Employee, on_delete=models.CASCADE,
+                                related_name='+')
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE,
+                                     related_name='+')
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'],
+                         name='archived_bid_created_idx'),
+            models.Index(fields=['tender', '-created_at', '-id'],
+                         name='archived_bid_tender_idx'),
+            models.Index(fields=['creator', '-created_at', '-id'],
+                         name='archived_bid_creator_idx'),
+        ]
+
+
+class ArchivedBidVersion(models.Model):
+    """Версия архивного предложения. Колонки совпадают с BidVersion"""
+
+    id = models.BigIntegerField(primary_key=True)
+    bid = models.ForeignKey(ArchivedBid, related_name='versions',
+                            on_delete=models.CASCADE)
+    name = models.CharField(max_length=255, blank=True, null=True)
+    description = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=10)
+    version = models.PositiveIntegerField()
+    base_version = models.PositiveIntegerField(blank=True, null=True)
+    delta = models.BinaryField(blank=True, null=True)
+    saved_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['bid', 'version'],
+                                    name='archived_bid_version_uniq'),
+        ]
+
+
+class ArchivedReview(models.Model):
+    """Отзыв на архивное предложение. Колонки совпадают с Review"""
+
+    id = models.BigIntegerField(primary_key=True)
+    bid = models.ForeignKey(ArchivedBid, related_name='reviews',
+                            on_delete=models.CASCADE)
+    author = models.ForeignKey(Employee, on_delete=models.CASCADE,
+                               related_name='+')
+    content = models.TextField()
+    created_at = models.DateTimeField()
+
+
+class TenderWithArchive(models.Model):
+    """
+    Представление (VIEW) tenders_tender_all: действующие и архивные
+    тендеры. Только для чтения в режиме ?include_archived=true
+    """
+
+    name = models.CharField(max_length=255)
+    description = models.TextField(blank=True, null=True)
+    organization = models.ForeignKey(Organization, on_delete=models.DO_NOTHING,
+                                     related_name='+')
+    status = models.CharField(max_length=10)
+    service_type = models.CharField(max_length=50)
+    version = models.PositiveIntegerField()
+    creator = models.ForeignKey(Employee, on_delete=models.DO_NOTHING,
+                                related_name='+')
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = 'tenders_tender_all'
+
+
+class BidWithArchive(models.Model):
+    """
+    Представление (VIEW) tenders_bid_all: предложения действующих и
+    архивных тендеров. Только для чтения в режиме ?include_archived=true
+    """
+
+    name = models.CharField(max_length=255)
+    description = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=10)
+    version = models.PositiveIntegerField()
+    tender = models.ForeignKey(TenderWithArchive,
+                               on_delete=models.DO_NOTHING, related_name='+')
+    creator = models.ForeignKey(Employee, on_delete=models.DO_NOTHING,
+                                related_name='+')
+    organization = models.ForeignKey(Organization, on_delete=models.DO_NOTHING,
+                                     related_name='+')
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = 'tenders_bid_all'
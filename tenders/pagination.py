@@ -0,0 +1,262 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .search import RANK
+
+
+class LegacyOffsetPagination(LimitOffsetPagination):
+    """
+    Постраничный вывод через limit/offset для старых клиентов.
+    Результаты полнотекстового поиска сортируются по релевантности
+    """
+
+    max_limit = 200
+
+    def order(self, queryset):
+        ordering = ('-created_at', '-id')
+        if RANK in queryset.query.annotations:
+            ordering = (f'-{RANK}',) + ordering
+        return queryset.order_by(*ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return super().paginate_queryset(self.order(queryset), request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Асинхронный вариант paginate_queryset для async ORM"""
+        queryset = self.order(queryset)
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.count = await queryset.acount()
+        self.offset = self.get_offset(request)
+        if self.count == 0 or self.offset > self.count:
+            return []
+        return [obj async for obj in
+                queryset[self.offset:self.offset + self.limit]]
+
+
+class KeysetPagination(BasePagination):
+    """
+    Постраничный вывод по курсору. Позиция задается парой (created_at, id),
+    а для результатов поиска — тройкой (search_rank, created_at, id):
+    страницы идут по убыванию релевантности. Стоимость запроса не зависит
+    от глубины страницы. Если в запросе переданы limit или offset,
+    используется LegacyOffsetPagination
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 50
+    max_page_size = 200
+    invalid_cursor_message = 'Invalid cursor'
+    legacy_class = LegacyOffsetPagination
+    ordering = ('-created_at', '-id')
+
+    def get_ordering(self, queryset):
+        """Порядок страниц: результаты поиска — по релевантности"""
+        self.ranked = RANK in queryset.query.annotations
+        if self.ranked:
+            return (f'-{RANK}',) + self.ordering
+        return self.ordering
+
+    def get_position(self, obj):
+        """
+        Позиция объекта для курсора. Страница может состоять из объектов
+        моделей или из словарей values()
+        """
+        if isinstance(obj, dict):
+            position = {'c': obj['created_at'].isoformat(), 'i': obj['id']}
+            rank = obj.get(RANK)
+        else:
+            position = {'c': obj.created_at.isoformat(), 'i': obj.pk}
+            rank = getattr(obj, RANK, None)
+        if self.ranked:
+            position['s'] = rank
+        return position
+
+    def parse_position(self, data):
+        created_at = parse_datetime(data['c'])
+        if created_at is None:
+            raise ValueError(data['c'])
+        if not self.ranked:
+            return created_at, int(data['i'])
+        # Курсор результатов поиска содержит релевантность
+        return created_at, int(data['i']), float(data['s'])
+
+    def filter_after(self, queryset, position, reverse):
+        """
+        Объекты после позиции в порядке ordering (или перед ней, если
+        reverse)
+        """
+        created_at, pk, *rank = position
+        if reverse:
+            after = Q(created_at__gt=created_at) \
+                | Q(created_at=created_at, id__gt=pk)
+        else:
+            after = Q(created_at__lt=created_at) \
+                | Q(created_at=created_at, id__lt=pk)
+        if rank:
+            rank, = rank
+            lookup = f'{RANK}__gt' if reverse else f'{RANK}__lt'
+            after = Q(**{lookup: rank}) | Q(after, **{RANK: rank})
+        return queryset.filter(after)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_legacy(request):
+            return self.legacy.paginate_queryset(queryset, request, view)
+        return self.finish(list(self.prepare(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Асинхронный вариант paginate_queryset для async ORM"""
+        if self.use_legacy(request):
+            return await self.legacy.apaginate_queryset(queryset, request,
+                                                        view)
+        return self.finish(
+            [obj async for obj in self.prepare(queryset, request)])
+
+    def use_legacy(self, request):
+        self.legacy = None
+        if self.legacy_class is not None and (
+                LegacyOffsetPagination.limit_query_param
+                in request.query_params
+                or LegacyOffsetPagination.offset_query_param
+                in request.query_params):
+            self.legacy = self.legacy_class()
+        return self.legacy is not None
+
+    def prepare(self, queryset, request):
+        """Срез queryset для текущей страницы (с одним лишним объектом)"""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        ordering = self.get_ordering(queryset)
+        limit = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        self.has_cursor = cursor is not None
+        self.limit = limit
+
+        if cursor is None:
+            self.reverse = False
+            queryset = queryset.order_by(*ordering)
+        else:
+            position, self.reverse = cursor
+            queryset = self.filter_after(queryset, position, self.reverse)
+            if self.reverse:
+                queryset = queryset.order_by(*[
+                    field[1:] if field.startswith('-') else f'-{field}'
+                    for field in ordering])
+            else:
+                queryset = queryset.order_by(*ordering)
+        return queryset[:limit + 1]
+
+    def finish(self, results):
+        """Формирует страницу из результатов среза prepare"""
+        has_more = len(results) > self.limit
+        results = results[:self.limit]
+        if self.reverse:
+            results.reverse()
+
+        if self.reverse:
+            self.has_next = self.has_cursor
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.has_cursor
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        """Размер страницы из запроса, ограниченный max_page_size"""
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        """Разбирает непрозрачный курсор в (позиция, reverse)"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode('ascii'))
+            data = json.loads(raw)
+            position = self.parse_position(data)
+            reverse = bool(data.get('r', False))
+        except (TypeError, ValueError, KeyError, AttributeError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, obj, reverse):
+        """Строит ссылку на страницу, начинающуюся после объекта obj"""
+        data = self.get_position(obj)
+        if reverse:
+            data['r'] = True
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(data, separators=(',', ':')).encode('ascii')
+        ).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param,
+                                   encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        if self.legacy is not None:
+            return self.legacy.get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True,
+                         'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True,
+                             'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class VersionPagination(KeysetPagination):
+    """
+    Постраничный вывод истории версий одного объекта по курсору на номере
+    версии, от новых к старым
+    """
+
+    legacy_class = None
+    ordering = ('-version',)
+
+    def get_position(self, obj):
+        return {'v': obj.version}
+
+    def parse_position(self, data):
+        return int(data['v'])
+
+    def filter_after(self, queryset, position, reverse):
+        if reverse:
+            return queryset.filter(version__gt=position)
+        return queryset.filter(version__lt=position)
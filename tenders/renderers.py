@@ -0,0 +1,22 @@
+from django.http import HttpResponse
+from rest_framework import renderers, status
+
+from .metrics import measure_serialization
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    """JSONRenderer, время работы которого учитывается в метриках запроса"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with measure_serialization():
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    """
+    JSON-ответ в том же виде, что отдает JSONRenderer вьюсетов, для
+    обработчиков вне DRF
+    """
+    return HttpResponse(JSONRenderer().render(data), status=status_code,
+                        content_type='application/json')
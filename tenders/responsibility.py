@@ -0,0 +1,150 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .models import OrganizationResponsible, Employee
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Потокобезопасный кэш процесса с ограниченным временем жизни записей и
+    ограниченным размером. При переполнении вытесняются давно не
+    использованные записи. Время жизни и размер читаются из настроек
+    ttl_setting и size_setting при каждом обращении, а не при импорте
+    модуля, поэтому действуют и настройки, измененные позже
+    """
+
+    def __init__(self, ttl_setting, size_setting, ttl=30, max_size=10000):
+        self.ttl_setting = ttl_setting
+        self.size_setting = size_setting
+        self.default_ttl = ttl
+        self.default_max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        return getattr(settings, self.ttl_setting, self.default_ttl)
+
+    @property
+    def max_size(self):
+        return getattr(settings, self.size_setting, self.default_max_size)
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        ttl, max_size = self.ttl, self.max_size
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_prefix(self, prefix):
+        """Удаляет все ключи-кортежи, начинающиеся с prefix"""
+        with self._lock:
+            for key in [k for k in self._data if k[0] == prefix]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+cache = TTLCache('RESPONSIBILITY_CACHE_TTL', 'RESPONSIBILITY_CACHE_SIZE')
+
+
+def _memo(request):
+    """Словарь для запоминания результатов в рамках одного запроса"""
+    memo = getattr(request, '_responsibility_memo', None)
+    if memo is None:
+        memo = {}
+        request._responsibility_memo = memo
+    return memo
+
+
+def _resolve(request, key, loader):
+    memo = _memo(request) if request is not None else {}
+    value = memo.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = loader()
+        cache.set(key, value)
+    memo[key] = value
+    return value
+
+
+def _to_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def organizations_for_user(request, user_id):
+    """Множество id организаций, за которые отвечает пользователь"""
+    user_id = _to_id(user_id)
+    if user_id is None:
+        return frozenset()
+    return _resolve(
+        request, ('orgs', user_id),
+        lambda: frozenset(
+            OrganizationResponsible.objects.filter(user_id=user_id)
+            .values_list('organization_id', flat=True)
+        )
+    )
+
+
+def employee_id_for_username(request, username):
+    """id пользователя по username или None, если пользователь не найден"""
+    if not username:
+        return None
+    return _resolve(
+        request, ('employee', username),
+        lambda: Employee.objects.filter(username=username)
+        .values_list('id', flat=True).first()
+    )
+
+
+def is_responsible(request, user_id, organization_id):
+    """Проверяет, что пользователь отвечает за организацию"""
+    organization_id = _to_id(organization_id)
+    if organization_id is None:
+        return False
+    return organization_id in organizations_for_user(request, user_id)
+
+
+def is_responsible_by_username(request, username, organization_id):
+    """То же, что is_responsible, но пользователь задан через username"""
+    user_id = employee_id_for_username(request, username)
+    if user_id is None:
+        return False
+    return is_responsible(request, user_id, organization_id)
+
+
+def invalidate_user(user_id):
+    cache.delete(('orgs', user_id))
+
+
+def invalidate_employees():
+    cache.delete_prefix('employee')
@@ -0,0 +1,75 @@
+"""
+Маршрутизация запросов к базе между основной базой и репликами.
+
+Чтение уходит на реплику только внутри запроса, для которого
+ReplicaRoutingMiddleware выбрал реплику (GET к вьюсетам тендеров и
+предложений от клиента без недавних изменений). Все запросы одного
+HTTP-запроса читают из одной реплики. Все остальное, включая
+запись, миграции и команды управления, работает с основной базой.
+Недоступная реплика исключается из выбора на REPLICA_RETRY_SECONDS
+"""
+import contextvars
+import random
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+# Реплика, выбранная для чтения в текущем запросе (None — основная база)
+read_replica = contextvars.ContextVar('read_replica', default=None)
+
+_unavailable = {}
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+def _available(alias):
+    retry_at = _unavailable.get(alias)
+    if retry_at is None:
+        return True
+    if retry_at > time.monotonic():
+        return False
+    _unavailable.pop(alias, None)
+    return True
+
+
+def _connect(alias):
+    """
+    Проверяет соединение с репликой. Открытое соединение повторно не
+    проверяется: его состояние проверяет Django (CONN_HEALTH_CHECKS)
+    """
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError:
+        _unavailable[alias] = time.monotonic() + getattr(
+            settings, 'REPLICA_RETRY_SECONDS', 30)
+        return False
+    return True
+
+
+def choose_replica():
+    """Случайная доступная реплика или None"""
+    aliases = [alias for alias in replica_aliases() if _available(alias)]
+    random.shuffle(aliases)
+    for alias in aliases:
+        if _connect(alias):
+            return alias
+    return None
+
+
+class ReplicaRouter:
+    """Роутер Django: чтение из реплики, выбранной для запроса"""
+
+    def db_for_read(self, model, **hints):
+        return read_replica.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in replica_aliases()
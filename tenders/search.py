@@ -0,0 +1,166 @@
+"""
+Полнотекстовый поиск по названию и описанию тендеров и предложений.
+
+На PostgreSQL таблица содержит колонку search_vector (tsvector) с GIN
+индексом, которую заполняет триггер tsvector_update_trigger. На SQLite
+используется теневая таблица FTS5 <таблица>_fts, синхронизируемая
+триггерами. Триггеры срабатывают при любой записи (в том числе при
+bulk_create/bulk_update и QuerySet.update) и откатываются вместе с
+транзакцией. На остальных базах используется поиск через icontains
+"""
+from django.db import connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Tender, Bid
+
+SEARCH_MODELS = (Tender, Bid)
+SEARCH_CONFIG = 'simple'
+# Аннотация релевантности, по которой сортируются результаты поиска
+RANK = 'search_rank'
+
+
+def _postgresql_install(table):
+    return [
+        f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector '
+        f'tsvector',
+        f'CREATE INDEX IF NOT EXISTS {table}_search_idx ON {table} '
+        f'USING GIN (search_vector)',
+        f'DROP TRIGGER IF EXISTS {table}_search_update ON {table}',
+        f'CREATE TRIGGER {table}_search_update '
+        f'BEFORE INSERT OR UPDATE OF name, description ON {table} '
+        f'FOR EACH ROW EXECUTE FUNCTION tsvector_update_trigger('
+        f'search_vector, \'pg_catalog.{SEARCH_CONFIG}\', name, description)',
+    ]
+
+
+def _postgresql_uninstall(table):
+    return [
+        f'DROP TRIGGER IF EXISTS {table}_search_update ON {table}',
+        f'DROP INDEX IF EXISTS {table}_search_idx',
+        f'ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector',
+    ]
+
+
+def _postgresql_rebuild(table):
+    return [
+        f'UPDATE {table} SET search_vector = to_tsvector('
+        f'\'pg_catalog.{SEARCH_CONFIG}\', '
+        f'coalesce(name, \'\') || \' \' || coalesce(description, \'\'))',
+    ]
+
+
+def _sqlite_install(table):
+    fts = f'{table}_fts'
+    insert = (f'INSERT INTO {fts}(rowid, name, description) '
+              f'VALUES (new.id, new.name, new.description);')
+    delete = (f'INSERT INTO {fts}({fts}, rowid, name, description) '
+              f'VALUES (\'delete\', old.id, old.name, old.description);')
+    return [
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5('
+        f'name, description, content=\'{table}\', content_rowid=\'id\')',
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} '
+        f'BEGIN {insert} END',
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} '
+        f'BEGIN {delete} END',
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF name, '
+        f'description ON {table} BEGIN {delete} {insert} END',
+    ]
+
+
+def _sqlite_uninstall(table):
+    fts = f'{table}_fts'
+    return [
+        f'DROP TRIGGER IF EXISTS {fts}_ai',
+        f'DROP TRIGGER IF EXISTS {fts}_ad',
+        f'DROP TRIGGER IF EXISTS {fts}_au',
+        f'DROP TABLE IF EXISTS {fts}',
+    ]
+
+
+def _sqlite_rebuild(table):
+    fts = f'{table}_fts'
+    return [f'INSERT INTO {fts}({fts}) VALUES (\'rebuild\')']
+
+
+STATEMENTS = {
+    'postgresql': (_postgresql_install, _postgresql_uninstall,
+                   _postgresql_rebuild),
+    'sqlite': (_sqlite_install, _sqlite_uninstall, _sqlite_rebuild),
+}
+
+
+def _execute(connection, builder_index, tables):
+    builders = STATEMENTS.get(connection.vendor)
+    if builders is None:
+        return False
+    with connection.cursor() as cursor:
+        for table in tables:
+            for sql in builders[builder_index](table):
+                cursor.execute(sql)
+    return True
+
+
+def _tables():
+    return [model._meta.db_table for model in SEARCH_MODELS]
+
+
+def install(connection, tables=None):
+    """Создает индекс и триггеры синхронизации (идемпотентно)"""
+    return _execute(connection, 0, tables or _tables())
+
+
+def uninstall(connection, tables=None):
+    return _execute(connection, 1, tables or _tables())
+
+
+def rebuild(connection, tables=None):
+    """Переустанавливает триггеры и полностью перестраивает индекс"""
+    if not install(connection, tables):
+        return False
+    return _execute(connection, 2, tables or _tables())
+
+
+def _fts5_query(query):
+    """Экранирует слова запроса, чтобы они не разбирались как синтаксис"""
+    return ' '.join(
+        '"' + word.replace('"', '""') + '"' for word in query.split()
+    )
+
+
+def search(queryset, query):
+    """
+    Оставляет в queryset объекты, подходящие под поисковый запрос, и
+    добавляет аннотацию search_rank (чем больше, тем релевантнее)
+    """
+    query = query.strip()
+    if not query:
+        return queryset
+    table = queryset.model._meta.db_table
+    # Представления с архивом (tenders.archive) не индексируются
+    vendor = connections[queryset.db].vendor \
+        if queryset.model in SEARCH_MODELS else None
+
+    if vendor == 'postgresql':
+        tsquery = f'websearch_to_tsquery(\'{SEARCH_CONFIG}\', %s)'
+        return queryset.filter(id__in=RawSQL(
+            f'SELECT id FROM {table} WHERE search_vector @@ {tsquery}',
+            (query,)
+        )).annotate(**{RANK: RawSQL(
+            f'ts_rank({table}.search_vector, {tsquery})', (query,),
+            output_field=FloatField()
+        )})
+
+    if vendor == 'sqlite':
+        fts = f'{table}_fts'
+        fts_query = _fts5_query(query)
+        return queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', (fts_query,)
+        )).annotate(**{RANK: RawSQL(
+            f'(SELECT -bm25({fts}) FROM {fts} WHERE {fts} MATCH %s '
+            f'AND rowid = {table}.id)', (fts_query,),
+            output_field=FloatField()
+        )})
+
+    return queryset.filter(
+        Q(name__icontains=query) | Q(description__icontains=query))
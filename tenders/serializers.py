@@ -1,34 +1,203 @@
-from rest_framework import serializers
-from .models import Tender, Bid, Review
-
-
-class BaseSerializer(serializers.ModelSerializer):
-    """Базовый сериализатор для тендеров и предложений"""
-
-    class Meta:
-        fields = ['id', 'name', 'description', 'status', 'version', 'creator',
-                  'organization', 'created_at', 'updated_at']
-
-
-class TenderSerializer(BaseSerializer):
-    """Сериализатор для тендеров"""
-
-    class Meta(BaseSerializer.Meta):
-        model = Tender
-        fields = BaseSerializer.Meta.fields + ['service_type']
-
-
-class BidSerializer(BaseSerializer):
-    """Сериализатор для предложений."""
-
-    class Meta(BaseSerializer.Meta):
-        model = Bid
-
-
-class ReviewSerializer(serializers.ModelSerializer):
-    """Сериализатор для отзывов на предложения"""
-
-    class Meta:
-        model = Review
-        fields = ['id', 'bid', 'author', 'content', 'created_at']
-        read_only_fields = ['author', 'created_at']
+import datetime
+import functools
+
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from .metrics import measure_serialization
+from .models import Tender, Bid, Review
+from .search import RANK
+
+# Поля, представление которых совпадает со значением из базы
+PASSTHROUGH_FIELDS = (serializers.CharField, serializers.IntegerField,
+                      serializers.BooleanField, serializers.ChoiceField)
+# Колонки, которые values() выбирает и без соответствующих полей в ответе:
+# по ним строятся курсор страницы и состояние на момент ?as_of=
+KEY_COLUMNS = ('id', 'created_at')
+
+
+class CachedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField, который берет объекты из заранее загруженного
+    context['related_objects'] ({модель: {pk: объект}}) вместо запроса к
+    базе на каждое значение
+    """
+
+    def to_internal_value(self, data):
+        objects = self.context.get('related_objects', {}).get(
+            self.get_queryset().model)
+        if objects is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            obj = objects.get(int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if obj is None:
+            self.fail('does_not_exist', pk_value=data)
+        return obj
+
+
+class SparseFieldsMixin:
+    """
+    Сериализатор с аргументом fields: набором имен полей ответа
+    (см. tenders.fieldsets). Остальные поля удаляются
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class BaseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Базовый сериализатор для тендеров и предложений"""
+
+    serializer_related_field = CachedPrimaryKeyRelatedField
+
+    class Meta:
+        fields = ['id', 'name', 'description', 'status', 'version', 'creator',
+                  'organization', 'created_at', 'updated_at']
+
+
+class TenderSerializer(BaseSerializer):
+    """Сериализатор для тендеров"""
+
+    class Meta(BaseSerializer.Meta):
+        model = Tender
+        fields = BaseSerializer.Meta.fields + ['service_type']
+
+
+class BidSerializer(BaseSerializer):
+    """Сериализатор для предложений."""
+
+    class Meta(BaseSerializer.Meta):
+        model = Bid
+        fields = BaseSerializer.Meta.fields + ['tender']
+
+
+class BidBoardSerializer(BidSerializer):
+    """
+    Предложение на доске тендера. Дополнительные поля заполняются
+    аннотациями запроса (см. TenderViewSet.bid_board)
+    """
+
+    organization_name = serializers.CharField(read_only=True)
+    review_count = serializers.IntegerField(read_only=True)
+    latest_review_at = serializers.DateTimeField(read_only=True)
+    version_count = serializers.IntegerField(read_only=True)
+
+    class Meta(BidSerializer.Meta):
+        fields = BidSerializer.Meta.fields + [
+            'organization_name', 'review_count', 'latest_review_at',
+            'version_count']
+
+
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Сериализатор для отзывов на предложения"""
+
+    class Meta:
+        model = Review
+        fields = ['id', 'bid', 'author', 'content', 'created_at']
+        read_only_fields = ['author', 'created_at']
+
+
+class ValuesSerializer:
+    """
+    Быстрое представление списков только для чтения. Объекты выбираются
+    через values() ровно по колонкам полей serializer_class, а строки
+    собираются в тот же JSON без объектов полей на каждую строку.
+    Преобразуются только значения, которые сериализатор не отдает как есть
+    (даты), остальные копируются из строки результата. fields — набор
+    имен полей ответа или None для всех полей
+    """
+
+    def __init__(self, serializer_class, fields=None):
+        self.fields = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only or fields is not None and name not in fields:
+                continue
+            if field.source == '*' or '.' in field.source:
+                raise ValueError(
+                    f'{serializer_class.__name__}.{name}: поле должно '
+                    f'соответствовать колонке модели')
+            self.fields.append(field)
+        self.names = [field.field_name for field in self.fields]
+        self.sources = [field.source for field in self.fields]
+        self.columns = list(dict.fromkeys([*self.sources, *KEY_COLUMNS]))
+
+    @staticmethod
+    def get_converter(field):
+        """
+        Функция преобразования значения колонки или None, если значение
+        отдается как есть. Вызывается один раз на пакет строк: часовой пояс
+        для дат определяется заранее, а не для каждого значения
+        """
+        if isinstance(field, serializers.PrimaryKeyRelatedField) \
+                and field.pk_field is None:
+            return None
+        if isinstance(field, PASSTHROUGH_FIELDS):
+            return None
+        if isinstance(field, serializers.DateTimeField):
+            output_format = getattr(field, 'format',
+                                    api_settings.DATETIME_FORMAT)
+            field_timezone = getattr(field, 'timezone', None) \
+                or field.default_timezone()
+            if isinstance(output_format, str) \
+                    and output_format.lower() == ISO_8601 \
+                    and field_timezone is not None:
+                return functools.partial(_iso_datetime, field_timezone,
+                                         field.to_representation)
+        return field.to_representation
+
+    def values(self, queryset):
+        """
+        Queryset словарей с колонками полей сериализатора. Результаты
+        поиска включают релевантность: по ней строится курсор страницы
+        """
+        if RANK in queryset.query.annotations:
+            return queryset.values(*self.columns, RANK)
+        return queryset.values(*self.columns)
+
+    def iter_represent(self, rows):
+        """Строки values() в формате serializer_class(obj).data"""
+        columns = [(field.field_name, field.source,
+                    self.get_converter(field)) for field in self.fields]
+        for row in rows:
+            item = {}
+            for name, source, convert in columns:
+                value = row[source]
+                if convert is not None and value is not None:
+                    value = convert(value)
+                item[name] = value
+            yield item
+
+    def represent(self, rows):
+        """Список в формате serializer_class(rows, many=True).data"""
+        with measure_serialization():
+            return list(self.iter_represent(rows))
+
+
+def _iso_datetime(field_timezone, fallback, value):
+    """
+    DateTimeField.to_representation для ISO 8601 с заранее известным
+    часовым поясом
+    """
+    if not isinstance(value, datetime.datetime) \
+            or timezone.is_naive(value):
+        return fallback(value)
+    value = value.astimezone(field_timezone).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+@functools.cache
+def values_serializer(serializer_class, fields=None):
+    """
+    ValuesSerializer для класса сериализатора и набора полей fields
+    (frozenset или None). Создается один раз
+    """
+    return ValuesSerializer(serializer_class, fields)
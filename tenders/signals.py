@@ -0,0 +1,51 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from .models import OrganizationResponsible, Employee
+from . import metrics, responsibility
+
+
+@receiver(pre_save, sender=OrganizationResponsible)
+def remember_responsible_user(sender, instance, **kwargs):
+    """Запоминает прежнего пользователя связи, если связь уже сохранена"""
+    instance._previous_user_id = None
+    if instance.pk is not None:
+        instance._previous_user_id = sender.objects.filter(
+            pk=instance.pk).values_list('user_id', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=OrganizationResponsible)
+def invalidate_responsible(sender, instance, **kwargs):
+    """
+    Сбрасывает кэш организаций прежнего и нового пользователя связи.
+    Сброс повторяется после фиксации транзакции: до нее параллельный
+    запрос мог снова закэшировать права по незафиксированным данным
+    """
+    user_ids = {instance.user_id,
+                getattr(instance, '_previous_user_id', None)} - {None}
+
+    def invalidate():
+        for user_id in user_ids:
+            responsibility.invalidate_user(user_id)
+
+    invalidate()
+    transaction.on_commit(invalidate, using=kwargs.get('using'))
+
+
+@receiver([post_save, post_delete], sender=Employee)
+def invalidate_employee(sender, instance, **kwargs):
+    """
+    Сбрасывает кэш username -> id. Username мог измениться, поэтому
+    очищаются все записи о пользователях
+    """
+    responsibility.invalidate_employees()
+    responsibility.invalidate_user(instance.id)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    """Подключает учет SQL-запросов для метрик к новому соединению"""
+    if metrics.record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(metrics.record_query)
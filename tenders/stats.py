@@ -0,0 +1,146 @@
+"""
+Сводная статистика тендеров и предложений по организации, статусу и типу
+услуг (ObjectStats).
+
+Счетчики меняются приращениями в транзакции, которая создает, изменяет
+или удаляет объект, поэтому /tenders/stats читает несколько строк вместо
+COUNT(*) ... GROUP BY по всей таблице. Приращения применяются в порядке
+ключей, чтобы параллельные транзакции блокировали строки в одном порядке.
+Изменения в обход вьюсетов (QuerySet.update, удаление организации)
+счетчики не учитывают: расхождения находит и исправляет команда
+reconcile_stats
+"""
+import collections
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import (Bid, BidWithArchive, ObjectStats, Tender,
+                     TenderWithArchive)
+
+KINDS = {Tender: 'tender', Bid: 'bid'}
+KEY_FIELDS = ('kind', 'organization_id', 'status', 'service_type')
+
+
+def stats_key(obj, changes=None):
+    """
+    Ключ (вид, организация, статус, тип услуг) объекта с учетом
+    изменений changes, еще не примененных к объекту
+    """
+    changes = changes or {}
+    kind = KINDS[type(obj)]
+    organization = changes.get('organization')
+    organization_id = organization.pk if organization is not None \
+        else obj.organization_id
+    service_type = changes.get('service_type', obj.service_type) \
+        if kind == 'tender' else ''
+    return kind, organization_id, changes.get('status', obj.status), \
+        service_type
+
+
+def apply(deltas):
+    """Применяет приращения {ключ: изменение} к счетчикам"""
+    for key, delta in sorted(deltas.items()):
+        if delta:
+            _increment(key, delta)
+
+
+def _increment(key, delta):
+    rows = ObjectStats.objects.filter(**dict(zip(KEY_FIELDS, key)))
+    if rows.update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            ObjectStats.objects.create(**dict(zip(KEY_FIELDS, key)),
+                                       count=delta)
+    except IntegrityError:
+        # Строку создала параллельная транзакция
+        rows.update(count=F('count') + delta)
+
+
+def record_created(objects):
+    apply(collections.Counter(stats_key(obj) for obj in objects))
+
+
+def record_changes(pairs):
+    """Учитывает изменения объектов по парам (ключ до, ключ после)"""
+    deltas = collections.Counter()
+    for before, after in pairs:
+        if before != after:
+            deltas[before] -= 1
+            deltas[after] += 1
+    apply(deltas)
+
+
+def record_update(instance, changes):
+    record_changes([(stats_key(instance), stats_key(instance, changes))])
+
+
+def record_deleted(instance):
+    """
+    Учитывает удаление объекта, а для тендера и каскадное удаление его
+    предложений. Строки блокируются до конца транзакции, чтобы счетчики
+    считались по текущим значениям
+    """
+    model = type(instance)
+    locked = model.objects.select_for_update().get(pk=instance.pk)
+    deltas = collections.Counter({stats_key(locked): -1})
+    if model is Tender:
+        bids = Bid.objects.select_for_update().filter(tender=locked) \
+            .values_list('organization_id', 'status')
+        for organization_id, bid_status in bids:
+            deltas['bid', organization_id, bid_status, ''] -= 1
+    apply(deltas)
+
+
+def summary(organization_id=None):
+    """Ненулевые счетчики тендеров и предложений"""
+    rows = ObjectStats.objects.filter(count__gt=0)
+    if organization_id is not None:
+        rows = rows.filter(organization_id=organization_id)
+    result = {'tenders': [], 'bids': []}
+    for kind, organization, status, service_type, count in rows.order_by(
+            *KEY_FIELDS).values_list(*KEY_FIELDS, 'count'):
+        item = {'organization': organization, 'status': status}
+        if kind == 'tender':
+            item['service_type'] = service_type
+        item['count'] = count
+        result[f'{kind}s'].append(item)
+    return result
+
+
+def actual_counts():
+    """
+    Счетчики, посчитанные по таблицам тендеров и предложений, включая
+    архив: перенос в архив статистику не меняет
+    """
+    counts = {}
+    tenders = TenderWithArchive.objects.order_by().values_list(
+        'organization_id', 'status', 'service_type').annotate(Count('id'))
+    for organization_id, status, service_type, count in tenders:
+        counts['tender', organization_id, status, service_type] = count
+    bids = BidWithArchive.objects.order_by().values_list(
+        'organization_id', 'status').annotate(Count('id'))
+    for organization_id, status, count in bids:
+        counts['bid', organization_id, status, ''] = count
+    return counts
+
+
+def reconcile(fix=True):
+    """
+    Сравнивает счетчики с таблицами и при fix перестраивает их с нуля.
+    Возвращает расхождения [(ключ, в ObjectStats, фактически)]
+    """
+    with transaction.atomic():
+        stored = {row[:-1]: row[-1] for row in ObjectStats.objects
+                  .select_for_update().values_list(*KEY_FIELDS, 'count')}
+        actual = actual_counts()
+        drift = [(key, stored.get(key, 0), actual.get(key, 0))
+                 for key in sorted(stored.keys() | actual.keys())
+                 if stored.get(key, 0) != actual.get(key, 0)]
+        if fix:
+            ObjectStats.objects.all().delete()
+            ObjectStats.objects.bulk_create(
+                ObjectStats(**dict(zip(KEY_FIELDS, key)), count=count)
+                for key, count in sorted(actual.items()))
+    return drift
@@ -0,0 +1,134 @@
+"""
+Генератор синтетических данных для бенчмарков: организации, сотрудники,
+ответственные, тендеры, предложения, история версий и отзывы. Все
+вставки выполняются пакетно через bulk_create, поэтому генерация
+десятков тысяч объектов занимает секунды
+"""
+import random
+from dataclasses import dataclass, field
+
+from .history import pack
+from .stats import record_created
+from .models import (Bid, BidVersion, Employee, Organization,
+                     OrganizationResponsible, Review, Tender, TenderVersion)
+
+WORDS = ('поставка', 'монтаж', 'оборудование', 'срок', 'гарантия', 'объект',
+         'работы', 'смета', 'договор', 'услуги', 'материалы', 'проект',
+         'server', 'network', 'support', 'delivery', 'cable', 'license')
+
+BATCH_SIZE = 1000
+
+
+@dataclass
+class Dataset:
+    """Созданные объекты, на которые ссылаются сценарии бенчмарков"""
+
+    prefix: str
+    organizations: list = field(default_factory=list)
+    employees: list = field(default_factory=list)
+    responsibles: dict = field(default_factory=dict)
+    tenders: list = field(default_factory=list)
+    bids: list = field(default_factory=list)
+    reviews: list = field(default_factory=list)
+
+
+def _text(rng, low, high):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+def _edit(rng, text):
+    words = text.split(' ')
+    position = rng.randrange(len(words))
+    words[position:position + 2] = [rng.choice(WORDS)
+                                    for _ in range(rng.randint(1, 3))]
+    return ' '.join(words)
+
+
+def _history(rng, objects, version_model, parent_field, plain_fields,
+             versions):
+    """
+    Версии 1..versions-1 для каждого объекта в формате хранения
+    tenders.history (опорные версии и разницы). Текущая версия объекта
+    становится равной versions
+    """
+    rows = []
+    for obj in objects:
+        states = [{'name': obj.name, 'description': obj.description}]
+        for _ in range(versions - 1):
+            states.append({'name': states[-1]['name'],
+                           'description': _edit(rng,
+                                                states[-1]['description'])})
+        obj.name, obj.description = states[-1]['name'], \
+            states[-1]['description']
+        obj.version = versions
+        keyframe = None
+        for number, state in enumerate(states[:-1], start=1):
+            row = version_model(
+                **pack(state, number, keyframe),
+                **{parent_field: obj, 'version': number},
+                **{name: getattr(obj, name) for name in plain_fields})
+            if row.base_version is None:
+                keyframe = row
+            rows.append(row)
+    return rows
+
+
+def generate(scale=1000, seed=0, versions=5, prefix='synthetic'):
+    """
+    Создает набор данных: scale тендеров, по 3 предложения на тендер,
+    отзыв на каждое второе предложение, versions версий каждого объекта.
+    Организации и сотрудники создаются из расчета 50 тендеров на
+    организацию и 3 сотрудника на организацию
+    """
+    rng = random.Random(seed)
+    data = Dataset(prefix=prefix)
+    organization_count = max(1, scale // 50)
+
+    data.organizations = Organization.objects.bulk_create(
+        Organization(name=f'{prefix} org {i}',
+                     type=rng.choice(Organization.ORGANIZATION_TYPES)[0])
+        for i in range(organization_count))
+    data.employees = Employee.objects.bulk_create(
+        Employee(username=f'{prefix}_user_{i}')
+        for i in range(organization_count * 3))
+    links = []
+    for index, employee in enumerate(data.employees):
+        organization = data.organizations[index // 3]
+        links.append(OrganizationResponsible(user=employee,
+                                             organization=organization))
+        data.responsibles[employee.id] = organization
+    OrganizationResponsible.objects.bulk_create(links)
+
+    tenders = []
+    for i in range(scale):
+        creator = rng.choice(data.employees)
+        tenders.append(Tender(
+            name=f'{prefix} tender {i}', description=_text(rng, 20, 80),
+            organization=data.responsibles[creator.id], creator=creator,
+            status=rng.choice(Tender.STATUS_CHOICES)[0],
+            service_type=rng.choice(Tender.SERVICE_TYPE_CHOICES)[0]))
+    tender_versions = _history(rng, tenders, TenderVersion, 'tender',
+                               ('status', 'service_type'), versions)
+    data.tenders = Tender.objects.bulk_create(tenders, BATCH_SIZE)
+    TenderVersion.objects.bulk_create(tender_versions, BATCH_SIZE)
+    record_created(data.tenders)
+
+    bids = []
+    for i in range(scale * 3):
+        creator = rng.choice(data.employees)
+        bids.append(Bid(
+            name=f'{prefix} bid {i}', description=_text(rng, 10, 40),
+            tender=rng.choice(data.tenders),
+            organization=data.responsibles[creator.id], creator=creator,
+            status=rng.choice(Bid.STATUS_CHOICES)[0]))
+    bid_versions = _history(rng, bids, BidVersion, 'bid', ('status',),
+                            versions)
+    data.bids = Bid.objects.bulk_create(bids, BATCH_SIZE)
+    BidVersion.objects.bulk_create(bid_versions, BATCH_SIZE)
+    record_created(data.bids)
+
+    data.reviews = Review.objects.bulk_create(
+        (Review(bid=bid, author=rng.choice(data.employees),
+                content=_text(rng, 5, 30))
+         for bid in data.bids[::2]), BATCH_SIZE)
+    return data
@@ -1,3 +1,1625 @@
-from django.test import TestCase
-
-# Create your tests here.
+import csv
+import datetime
+import io
+import json
+import threading
+from unittest import mock, skipUnless
+from urllib.parse import quote
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, connections, transaction
+from django.http import QueryDict
+from django.test import (AsyncClient, Client, RequestFactory,
+                         SimpleTestCase, TestCase, TransactionTestCase)
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import include, path, resolve
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+from . import changes, responsibility, routers, stats, throttling
+from . import urls
+from .async_views import AsyncListView, AsyncReadView
+from .fieldsets import requested_fields
+from .history import build_version, reconstruct
+from .management.commands.benchmark_endpoints import routes
+from .middleware import ReplicaRoutingMiddleware, sticky_cache
+from .models import (ArchivedBid, ArchivedBidVersion, ArchivedReview,
+                     ArchivedTender, ArchivedTenderVersion, Bid, BidVersion,
+                     BidWithArchive, Change, Employee, IdempotencyKey,
+                     ObjectStats, Organization, OrganizationResponsible,
+                     Review, Tender, TenderVersion, TenderWithArchive)
+from .serializers import (BidSerializer, ReviewSerializer, TenderSerializer,
+                          values_serializer)
+from .synthetic import generate
+from .views import TenderViewSet
+
+
+def create_responsible(name='tests'):
+    """Сотрудник, ответственный за новую организацию"""
+    employee = Employee.objects.create(username=name)
+    organization = Organization.objects.create(name=name, type='LLC')
+    OrganizationResponsible.objects.create(user=employee,
+                                           organization=organization)
+    return employee, organization
+
+
+def create_tenders(employee, organization, count, **kwargs):
+    return [Tender.objects.create(**{
+        'name': f'tender {index}', 'description': f'description {index}',
+        'creator': employee, 'organization': organization, **kwargs})
+        for index in range(count)]
+
+
+class AsyncReadViewTests(SimpleTestCase):
+    """Базовый асинхронный обработчик нельзя подключить без read"""
+
+    def test_base_class_cannot_be_routed(self):
+        with self.assertRaises(TypeError):
+            AsyncReadView.as_view(viewset=TenderViewSet)
+
+    def test_subclass_without_read_cannot_be_routed(self):
+        class NoRead(AsyncReadView):
+            pass
+
+        with self.assertRaises(TypeError):
+            NoRead.as_view(viewset=TenderViewSet)
+
+
+@override_settings(THROTTLE_RATES={})
+class ConditionalListTests(TestCase):
+    """Условные запросы к спискам после удаления объекта"""
+
+    @classmethod
+    def setUpTestData(cls):
+        employee, organization = create_responsible()
+        cls.tenders = create_tenders(employee, organization, 3)
+
+    def get_sync(self, **headers):
+        return APIClient().get('/api/tenders', headers=headers)
+
+    def get_async(self, **headers):
+        request = RequestFactory().get('/api/tenders', headers=headers)
+        view = AsyncListView.as_view(viewset=TenderViewSet)
+        return async_to_sync(view)(request)
+
+    def test_if_modified_since_ignored_after_delete(self):
+        for get in (self.get_sync, self.get_async):
+            with self.subTest(get.__name__):
+                first = get()
+                self.assertEqual(first.status_code, 200)
+                Tender.objects.filter(pk=self.tenders[-1].pk).delete()
+                response = get(If_Modified_Since=first['Last-Modified'])
+                self.assertEqual(response.status_code, 200)
+                response = get(If_None_Match=first['ETag'])
+                self.assertEqual(response.status_code, 200)
+                response = get(If_None_Match=response['ETag'])
+                self.assertEqual(response.status_code, 304)
+                self.tenders.pop()
+
+
+@override_settings(THROTTLE_RATES={})
+class ValuesSerializerParityTests(TestCase):
+    """
+    ValuesSerializer выдает побайтово тот же JSON, что и сериализатор
+    модели, со всеми полями и с ?fields= / ?exclude=
+    """
+
+    cases = (
+        (Tender, TenderSerializer,
+         ('', 'fields=id,name,status', 'exclude=description',
+          'fields=id,service_type,created_at&exclude=id')),
+        (Bid, BidSerializer,
+         ('', 'fields=id,name,status', 'exclude=description,tender')),
+        (Review, ReviewSerializer,
+         ('', 'fields=id,content', 'exclude=content')),
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        employee, organization = create_responsible()
+        tenders = create_tenders(employee, organization, 3,
+                                 service_type='IT')
+        tenders += create_tenders(employee, organization, 2,
+                                  status='PUBLISHED', description=None)
+        for index, tender in enumerate(tenders):
+            bid = Bid.objects.create(
+                name=f'bid {index}', description=None if index % 2 else 'д',
+                tender=tender, creator=employee, organization=organization)
+            Review.objects.create(bid=bid, author=employee, content='отзыв')
+
+    def test_values_match_serializer(self):
+        renderer = JSONRenderer()
+        for model, serializer_class, queries in self.cases:
+            queryset = model.objects.order_by('-created_at', '-id')
+            for query in queries:
+                with self.subTest(serializer=serializer_class.__name__,
+                                  query=query):
+                    fields = requested_fields(QueryDict(query),
+                                              (serializer_class,))
+                    reader = values_serializer(serializer_class, fields)
+                    expected = renderer.render(serializer_class(
+                        list(queryset), many=True, fields=fields).data)
+                    actual = renderer.render(
+                        reader.represent(list(reader.values(queryset))))
+                    self.assertEqual(actual, expected)
+
+    def test_list_endpoints_match_serializer(self):
+        for url, model, serializer_class, queries in (
+                ('/api/tenders', *self.cases[0]),
+                ('/api/bids', *self.cases[1])):
+            queryset = model.objects.order_by('-created_at', '-id')
+            for query in queries:
+                with self.subTest(url=url, query=query):
+                    fields = requested_fields(QueryDict(query),
+                                              (serializer_class,))
+                    response = APIClient().get(f'{url}?{query}')
+                    self.assertEqual(response.status_code, 200)
+                    expected = JSONRenderer().render(serializer_class(
+                        list(queryset), many=True, fields=fields).data)
+                    self.assertEqual(response.json()['results'],
+                                     json.loads(expected))
+
+
+@override_settings(THROTTLE_RATES={})
+class BidBoardQueryTests(TestCase):
+    """Доска предложений выполняет два запроса при любом числе предложений"""
+
+    @classmethod
+    def setUpTestData(cls):
+        employee, organization = create_responsible()
+        cls.single, cls.many = create_tenders(employee, organization, 2)
+        for tender, count in ((cls.single, 1), (cls.many, 25)):
+            for index in range(count):
+                bid = Bid.objects.create(
+                    name=f'bid {index}', tender=tender, creator=employee,
+                    organization=organization)
+                Review.objects.bulk_create(
+                    Review(bid=bid, author=employee, content=f'отзыв {number}')
+                    for number in range(2))
+                BidVersion.objects.bulk_create(
+                    BidVersion(bid=bid, name=bid.name, status=bid.status,
+                               version=number) for number in range(1, 4))
+
+    def get_board(self, tender):
+        with CaptureQueriesContext(connection) as captured:
+            response = APIClient().get(f'/api/tenders/{tender.id}/board')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['bids'], len(captured)
+
+    def test_query_count_does_not_depend_on_bids(self):
+        single, single_queries = self.get_board(self.single)
+        many, many_queries = self.get_board(self.many)
+        self.assertEqual((len(single), len(many)), (1, 25))
+        self.assertEqual(single_queries, 2)
+        self.assertEqual(many_queries, single_queries)
+        for bid in single + many:
+            self.assertEqual((bid['review_count'], bid['version_count']),
+                             (2, 3))
+            self.assertEqual(bid['organization_name'], 'tests')
+
+
+# Зеркало основной базы из профиля tender_service.settings_test
+REPLICA_TEST = 'replica_test' in settings.DATABASES
+
+
+@skipUnless(REPLICA_TEST, 'нужен профиль tender_service.settings_test')
+@override_settings(DATABASE_REPLICAS=['replica_test'], THROTTLE_RATES={})
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Чтение из реплики и из основной базы. replica_test — зеркало основной
+    базы, поэтому данные видны, только если они зафиксированы
+    """
+
+    # Без зеркала класс пропускается, но базы тестов собираются до пропуска
+    databases = {'default', 'replica_test'} if REPLICA_TEST else {'default'}
+
+    def setUp(self):
+        employee, organization = create_responsible()
+        self.tender, = create_tenders(employee, organization, 1)
+        # Неуправляемые таблицы сотрудников и организаций не очищаются
+        # между тестами
+        self.addCleanup(employee.delete)
+        self.addCleanup(organization.delete)
+        sticky_cache().clear()
+        self.addCleanup(routers._unavailable.clear)
+
+    def request(self, client, method, url, data=None,
+                ensure_connection=None):
+        """
+        Ответ и число запросов к основной базе и к реплике.
+        ensure_connection заменяет проверку соединения с репликой
+        """
+        replica_connection = connections['replica_test']
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(replica_connection) as replica:
+            with mock.patch.object(replica_connection, 'ensure_connection',
+                                   ensure_connection
+                                   or replica_connection.ensure_connection):
+                response = getattr(client, method)(url, data, format='json')
+        self.assertLess(response.status_code, 400, response.content)
+        return response, len(primary), len(replica)
+
+    def test_get_reads_from_replica(self):
+        response, primary, replica = self.request(
+            APIClient(), 'get', f'/api/tenders/{self.tender.id}')
+        self.assertEqual(response.json()['id'], self.tender.id)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_write_and_sticky_window_use_primary(self):
+        client = APIClient()
+        data = {'name': 'new', 'description': 'new', 'service_type': 'IT',
+                'creator': self.tender.creator_id,
+                'organization': self.tender.organization_id}
+        response, _, replica = self.request(client, 'post',
+                                            '/api/tenders/new', data)
+        self.assertEqual(replica, 0)
+        self.assertIn(ReplicaRoutingMiddleware.cookie_name, response.cookies)
+        # Тот же клиент с cookie и клиент с того же IP без cookie
+        for reader in (client, APIClient()):
+            _, primary, replica = self.request(reader, 'get', '/api/tenders')
+            self.assertGreater(primary, 0)
+            self.assertEqual(replica, 0)
+        # Другой клиент читает из реплики
+        _, primary, replica = self.request(
+            APIClient(REMOTE_ADDR='10.0.0.2'), 'get', '/api/tenders')
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_rejected_write_is_not_sticky(self):
+        client = APIClient()
+        data = {'name': 'new', 'description': 'new', 'service_type': 'IT',
+                'creator': self.tender.creator_id, 'organization': 0}
+        response = client.post('/api/tenders/new', data, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertNotIn(ReplicaRoutingMiddleware.cookie_name,
+                         response.cookies)
+        _, primary, replica = self.request(client, 'get', '/api/tenders')
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_streamed_export_reads_from_replica(self):
+        """Поток читается после process_response, сбросившего реплику"""
+        for url in ('/api/tenders/export', '/api/tenders/versions/export'):
+            with CaptureQueriesContext(connections['default']) as primary, \
+                    CaptureQueriesContext(
+                        connections['replica_test']) as replica:
+                response = APIClient().get(url)
+                self.assertEqual(response.status_code, 200)
+                content = b''.join(response.streaming_content)
+            self.assertEqual(len(primary), 0, url)
+            self.assertGreater(len(replica), 0, url)
+            if url == '/api/tenders/export':
+                self.assertEqual(json.loads(content)['id'], self.tender.id)
+
+    def test_unavailable_replica_is_excluded(self):
+        down = mock.Mock(side_effect=OperationalError('down'))
+        _, primary, replica = self.request(APIClient(), 'get',
+                                           '/api/tenders',
+                                           ensure_connection=down)
+        down.assert_called_once_with()
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+        # Реплика исключена на REPLICA_RETRY_SECONDS и не проверяется
+        _, primary, replica = self.request(APIClient(), 'get',
+                                           '/api/tenders',
+                                           ensure_connection=down)
+        down.assert_called_once_with()
+        self.assertEqual(replica, 0)
+
+
+@override_settings(THROTTLE_RATES={})
+class IdempotencyTests(TestCase):
+    """Повтор запросов с Idempotency-Key"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee, cls.organization = create_responsible()
+
+    def tender_data(self, name='tender'):
+        return {'name': name, 'description': 'description',
+                'service_type': 'IT', 'creator': self.employee.id,
+                'organization': self.organization.id}
+
+    def post(self, url, data, key='key', client=None):
+        return (client or APIClient()).post(url, data, format='json',
+                                            HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_replay(self):
+        first = self.post('/api/tenders/new', self.tender_data())
+        replayed = self.post('/api/tenders/new', self.tender_data())
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(replayed.content, first.content)
+        self.assertEqual(replayed['Idempotent-Replayed'], 'true')
+        self.assertEqual(Tender.objects.count(), 1)
+        response = self.post('/api/tenders/new', self.tender_data('other'))
+        self.assertEqual(response.status_code, 422)
+
+    def test_key_is_scoped_by_client_and_endpoint(self):
+        requests = (
+            ('/api/tenders/new', self.tender_data('first'), None),
+            ('/api/tenders/new', self.tender_data('second'),
+             APIClient(REMOTE_ADDR='10.0.0.2')),
+            ('/api/tenders', self.tender_data('third'), None),
+        )
+        for url, data, client in requests:
+            response = self.post(url, data, client=client)
+            self.assertEqual(response.status_code, 201, response.content)
+            self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(IdempotencyKey.objects.count(), 3)
+        self.assertEqual(Tender.objects.count(), 3)
+
+    def test_server_error_rolls_back_changes(self):
+        def failing_create(view, request):
+            Tender.objects.create(name='partial', creator=self.employee,
+                                  organization=self.organization)
+            return Response(status=503)
+
+        with mock.patch.object(TenderViewSet, 'create_obj', failing_create):
+            response = self.post('/api/tenders/new', self.tender_data())
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(Tender.objects.exists())
+        self.assertFalse(IdempotencyKey.objects.exists())
+        # Повтор выполняется заново
+        response = self.post('/api/tenders/new', self.tender_data())
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Tender.objects.get().name, 'tender')
+
+
+class ChangesFeedTests(TestCase):
+    """Журнал изменений: время базы, видимость без задержки и курсор"""
+
+    @classmethod
+    def setUpTestData(cls):
+        employee, organization = create_responsible()
+        cls.tenders = create_tenders(employee, organization, 2)
+
+    def test_created_at_uses_database_clock(self):
+        worker_now = datetime.datetime(2000, 1, 1, tzinfo=datetime.UTC)
+        before = timezone.now()
+        with mock.patch('django.utils.timezone.now',
+                        return_value=worker_now):
+            changes.publish('created', self.tenders[:1])
+        created_at = Change.objects.get().created_at
+        self.assertGreaterEqual(
+            created_at, before - datetime.timedelta(seconds=1))
+
+    def test_changes_are_visible_immediately(self):
+        changes.publish('created', self.tenders, TenderSerializer)
+        response = APIClient().get('/api/changes?since=0')
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()['changes']
+        self.assertEqual([row['object_id'] for row in rows],
+                         [tender.id for tender in self.tenders])
+        self.assertEqual(response.json()['next'], str(rows[-1]['seq']))
+        self.assertEqual(
+            [row['seq'] for row in changes.fetch(rows[0]['seq'])],
+            [rows[1]['seq']])
+
+    def test_publish_takes_no_lock(self):
+        with self.assertNumQueries(1):
+            changes.publish('created', self.tenders)
+
+    def test_late_commit_is_not_skipped(self):
+        change = {'kind': 'tender', 'action': 'updated'}
+        Change.objects.create(id=1000, object_id=self.tenders[0].id,
+                              **change)
+        first, = changes.fetch(0)
+        # Транзакция, получившая меньший id, зафиксирована позже
+        Change.objects.create(id=500, object_id=self.tenders[1].id,
+                              **change)
+        late, = changes.fetch(first['seq'])
+        self.assertEqual((late['id'], late['seq']), (500, first['seq'] + 1))
+        self.assertEqual(changes.fetch(late['seq']), [])
+
+
+@override_settings(THROTTLE_RATES={}, CHANGES_STREAM_SECONDS=0)
+class ChangesStreamTests(TestCase):
+    """Поток Server-Sent Events работает только под ASGI"""
+
+    @classmethod
+    def setUpTestData(cls):
+        employee, organization = create_responsible()
+        changes.publish('created',
+                        create_tenders(employee, organization, 2))
+
+    def test_wsgi_is_rejected(self):
+        response = Client().get('/api/changes/stream')
+        self.assertEqual(response.status_code, 501)
+        self.assertFalse(response.streaming)
+
+    async def test_asgi_streams_events(self):
+        response = await AsyncClient().get('/api/changes/stream',
+                                           headers={'Last-Event-ID': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = ''.join([chunk.decode() async for chunk
+                        in response.streaming_content])
+        self.assertEqual(body.count('event: change'), 1)
+        self.assertIn('id: 2\n', body)
+
+
+@skipUnless(connection.vendor == 'postgresql',
+            'транзакции с записью выполняются одновременно только в '
+            'PostgreSQL')
+class ChangesConcurrencyTests(TransactionTestCase):
+    """Транзакции, добавляющие записи в журнал, не ждут друг друга"""
+
+    def setUp(self):
+        employee, organization = create_responsible()
+        self.addCleanup(employee.delete)
+        self.addCleanup(organization.delete)
+        self.first, self.second = create_tenders(employee, organization, 2)
+
+    def test_writers_are_not_serialized(self):
+        published, release = threading.Event(), threading.Event()
+
+        def slow_writer():
+            try:
+                with transaction.atomic():
+                    changes.publish('updated', [self.first])
+                    published.set()
+                    release.wait(10)
+            finally:
+                connections.close_all()
+
+        writer = threading.Thread(target=slow_writer)
+        writer.start()
+        self.addCleanup(writer.join)
+        self.addCleanup(release.set)
+        self.assertTrue(published.wait(10))
+        # Вторая транзакция фиксируется, пока первая еще не завершена, и
+        # ее запись видна сразу
+        with transaction.atomic():
+            changes.publish('updated', [self.second])
+        rows = changes.fetch(0)
+        self.assertEqual([row['object_id'] for row in rows],
+                         [self.second.id])
+        release.set()
+        writer.join()
+        rows += changes.fetch(rows[-1]['seq'])
+        self.assertEqual([row['object_id'] for row in rows],
+                         [self.second.id, self.first.id])
+
+
+@override_settings(THROTTLE_RATES={}, DATABASE_REPLICAS=[])
+class KeysetPaginationTests(TestCase):
+    """Страницы по курсору при совпадающем created_at"""
+
+    @classmethod
+    def setUpTestData(cls):
+        employee, organization = create_responsible()
+        tenders = create_tenders(employee, organization, 9)
+        moment = timezone.now() - datetime.timedelta(hours=1)
+        # Пять тендеров созданы в один момент, два — раньше, два — позже
+        for tender, created_at in zip(tenders, [
+                moment - datetime.timedelta(minutes=1), moment, moment,
+                moment + datetime.timedelta(minutes=1), moment, moment,
+                moment - datetime.timedelta(minutes=2), moment,
+                moment + datetime.timedelta(minutes=2)]):
+            Tender.objects.filter(pk=tender.pk).update(created_at=created_at)
+        cls.expected = list(Tender.objects.order_by('-created_at', '-id')
+                            .values_list('id', flat=True))
+
+    def walk(self, url, key='next'):
+        pages = []
+        while url:
+            response = APIClient().get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            pages.append(response.json())
+            url = pages[-1][key]
+        return pages
+
+    def test_pages_have_no_duplicates_or_gaps(self):
+        for page_size in (1, 2, 4):
+            pages = self.walk(f'/api/tenders?page_size={page_size}')
+            self.assertEqual([row['id'] for page in pages
+                              for row in page['results']], self.expected)
+            self.assertIsNone(pages[0]['previous'])
+            # Обратно от последней страницы
+            back = self.walk(pages[-1]['previous'], key='previous')
+            self.assertEqual([page['results'] for page in back],
+                             [page['results'] for page in pages[-2::-1]])
+
+    def test_invalid_cursor(self):
+        response = APIClient().get('/api/tenders?cursor=garbage')
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(THROTTLE_RATES={})
+class SearchCursorPaginationTests(TestCase):
+    """Курсор результатов поиска идет по убыванию релевантности"""
+
+    @classmethod
+    def setUpTestData(cls):
+        employee, organization = create_responsible()
+        # Релевантность не совпадает с порядком создания, часть тендеров
+        # с одинаковой релевантностью
+        for repeat in (1, 3, 1, 5, 2, 3, 1):
+            create_tenders(employee, organization, 1,
+                           description=' '.join(['монтаж'] * repeat
+                                                + ['кабель'] * 5))
+        create_tenders(employee, organization, 1, description='другое')
+
+    def test_cursor_pages_follow_rank(self):
+        client = APIClient()
+        query = quote('монтаж')
+        expected = [row['id'] for row in client.get(
+            f'/api/tenders?q={query}&limit=100').json()['results']]
+        self.assertEqual(len(expected), 7)
+
+        pages, url = [], f'/api/tenders?q={query}&page_size=2'
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.json())
+            url = response.json()['next']
+        self.assertEqual([row['id'] for page in pages
+                          for row in page['results']], expected)
+        previous = client.get(pages[2]['previous']).json()
+        self.assertEqual(previous['results'], pages[1]['results'])
+
+
+@override_settings(THROTTLE_RATES={'write': '3/min'}, THROTTLE_CACHE='')
+class ThrottlingTests(TestCase):
+    """Корзины сотрудников и организаций и стоимость массовых операций"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee, cls.organization = create_responsible()
+        cls.outsider, _ = create_responsible('outsider')
+
+    def setUp(self):
+        throttling.local_buckets.clear()
+        responsibility.cache.clear()
+
+    def tender_data(self, creator=None):
+        return {'name': 'tender', 'description': 'description',
+                'service_type': 'IT',
+                'creator': (creator or self.employee).id,
+                'organization': self.organization.id}
+
+    def post(self, address, url, data):
+        return APIClient(REMOTE_ADDR=address).post(url, data, format='json')
+
+    def test_unverified_identity_does_not_drain_buckets(self):
+        # Сотрудник не отвечает за организацию: расходуется только
+        # корзина его IP
+        for _ in range(3):
+            response = self.post('10.0.0.1', '/api/tenders/new',
+                                 self.tender_data(self.outsider))
+            self.assertEqual(response.status_code, 403)
+        response = self.post('10.0.0.2', '/api/tenders/new',
+                             self.tender_data())
+        self.assertEqual(response.status_code, 201)
+
+    def test_verified_identity_shares_bucket_across_addresses(self):
+        for address in ('10.0.0.1', '10.0.0.2', '10.0.0.3'):
+            response = self.post(address, '/api/tenders/new',
+                                 self.tender_data())
+            self.assertEqual(response.status_code, 201)
+        response = self.post('10.0.0.4', '/api/tenders/new',
+                             self.tender_data())
+        self.assertEqual(response.status_code, 429)
+
+    def test_bulk_is_charged_per_item(self):
+        response = self.post('10.0.0.1', '/api/tenders/bulk',
+                             [self.tender_data()] * 2)
+        self.assertNotEqual(response.status_code, 429)
+        response = self.post('10.0.0.1', '/api/tenders/bulk',
+                             [self.tender_data()] * 2)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(Tender.objects.count(), 2)
+
+
+@override_settings(THROTTLE_RATES={})
+class OptimisticConcurrencyTests(TestCase):
+    """
+    Изменение устаревшей версии отклоняется с 409, объект и его история
+    не меняются
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee, organization = create_responsible()
+        cls.tender, = create_tenders(cls.employee, organization, 1)
+
+    def edit(self, data=None, **headers):
+        return APIClient().patch(
+            f'/api/tenders/{self.tender.id}/edit',
+            {'description': 'changed', 'creator': self.employee.id,
+             **(data or {})}, format='json', headers=headers)
+
+    def assertUnchanged(self, version=1, saved_versions=None):
+        tender = Tender.objects.get(pk=self.tender.pk)
+        self.assertEqual((tender.version, tender.description),
+                         (version, self.tender.description))
+        self.assertEqual(
+            TenderVersion.objects.filter(tender=self.tender).count(),
+            version - 1 if saved_versions is None else saved_versions)
+
+    def test_matching_version_is_applied(self):
+        response = self.edit(If_Match='"1"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], '"2"')
+        self.assertEqual(Tender.objects.get(pk=self.tender.pk).version, 2)
+        self.assertEqual(TenderVersion.objects.get(tender=self.tender)
+                         .version, 1)
+
+    def test_stale_if_match(self):
+        self.assertEqual(self.edit(If_Match='"1"').status_code, 200)
+        self.tender.description = 'changed'
+        for headers in ({'If_Match': '"1"'}, {'If_Match': 'W/"1"'}):
+            with self.subTest(headers=headers):
+                response = self.edit({'description': 'stale'}, **headers)
+                self.assertEqual(response.status_code, 409)
+                self.assertUnchanged(version=2)
+
+    def test_stale_expected_version(self):
+        for data in ({'expected_version': 0}, {'expected_version': 2}):
+            with self.subTest(data=data):
+                response = self.edit(data)
+                self.assertEqual(response.status_code, 409)
+                self.assertUnchanged()
+        response = self.edit({'expected_version': 'x'})
+        self.assertEqual(response.status_code, 400)
+        self.assertUnchanged()
+
+    def test_conditional_update_loses_race(self):
+        get_object = TenderViewSet.get_object
+
+        def read_then_concurrent_write(view):
+            instance = get_object(view)
+            # Другой запрос меняет версию после чтения объекта
+            Tender.objects.filter(pk=instance.pk).update(version=2)
+            return instance
+
+        with mock.patch.object(TenderViewSet, 'get_object',
+                               read_then_concurrent_write):
+            response = self.edit()
+        self.assertEqual(response.status_code, 409)
+        self.assertUnchanged(version=2, saved_versions=0)
+
+
+@override_settings(VERSION_KEYFRAME_INTERVAL=5)
+class VersionHistoryStorageTests(TestCase):
+    """
+    Версии, сохраненные опорными и разницами, восстанавливаются без
+    потерь, в том числе после compress_version_history
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        employee, organization = create_responsible()
+        cls.tender, = create_tenders(employee, organization, 1)
+        lines = [f'Этап {index}: поставка «оборудования», монтаж —  '
+                 f'пусконаладка\t{index * "ё"}' for index in range(30)]
+        cls.snapshots = {}
+        for number in range(1, 18):
+            lines[number % len(lines)] += f' изменено в версии {number}'
+            description = '\n'.join(lines) + '\n\n  конец '
+            if number == 9:
+                # Разница больше половины текста: новая опорная версия
+                description = 'Совсем другое описание\r\nв две строки'
+            elif number == 12:
+                description = None
+            tender = cls.tender
+            tender.name = f'Тендер №{number // 3}'
+            tender.description = description
+            tender.status = ('CREATED', 'PUBLISHED')[number % 2]
+            tender.version = number
+            build_version(tender).save()
+            cls.snapshots[number] = {
+                'name': tender.name, 'description': description,
+                'status': tender.status, 'service_type': tender.service_type}
+
+    def assertRoundTrip(self):
+        versions = TenderVersion.objects.filter(tender=self.tender)
+        self.assertEqual(len(versions), len(self.snapshots))
+        for version in versions:
+            with self.subTest(version=version.version):
+                self.assertEqual(reconstruct(version),
+                                 self.snapshots[version.version])
+        return versions
+
+    def test_reconstruct_every_version(self):
+        versions = self.assertRoundTrip()
+        bases = {version.version: version.base_version
+                 for version in versions}
+        # Опорные версии: каждые VERSION_KEYFRAME_INTERVAL версий (1, 6,
+        # 12 -> 17), при разнице больше половины текста (9) и при коротком
+        # тексте (12)
+        self.assertEqual([number for number, base in bases.items()
+                          if base is None], [1, 6, 9, 12, 17])
+        self.assertEqual((bases[5], bases[11], bases[16]), (1, 9, 12))
+
+    def test_compress_existing_history(self):
+        # Полные копии, как до перехода на разницы
+        for version in TenderVersion.objects.filter(tender=self.tender):
+            state = reconstruct(version)
+            TenderVersion.objects.filter(pk=version.pk).update(
+                name=state['name'], description=state['description'],
+                base_version=None, delta=None)
+        call_command('compress_version_history', stdout=io.StringIO())
+        versions = self.assertRoundTrip()
+        self.assertGreater(sum(version.base_version is not None
+                               for version in versions), 8)
+        call_command('compress_version_history', stdout=io.StringIO())
+        self.assertRoundTrip()
+
+
+@override_settings(THROTTLE_RATES={})
+class BulkTests(TestCase):
+    """Массовые операции: ошибки по индексам, пакет целиком, число запросов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee, cls.organization = create_responsible()
+        cls.outsider, _ = create_responsible('outsider')
+        cls.tenders = create_tenders(cls.employee, cls.organization, 3)
+
+    def setUp(self):
+        responsibility.cache.clear()
+
+    def tender_data(self, **kwargs):
+        return {'name': 'tender', 'description': 'description',
+                'service_type': 'IT', 'creator': self.employee.id,
+                'organization': self.organization.id, **kwargs}
+
+    def bid_data(self, **kwargs):
+        return {'name': 'bid', 'description': 'description',
+                'tender': self.tenders[0].id, 'creator': self.employee.id,
+                'organization': self.organization.id, **kwargs}
+
+    def bulk(self, method, url, items):
+        with CaptureQueriesContext(connection) as captured:
+            response = getattr(APIClient(), method)(url, items,
+                                                    format='json')
+        return response, len(captured)
+
+    def assertErrors(self, response, expected):
+        """expected: {индекс: поле ошибки или текст detail}"""
+        self.assertEqual(response.status_code, 400, response.content)
+        errors = {error['index']: error['errors']
+                  for error in response.json()['errors']}
+        self.assertEqual(set(errors), set(expected))
+        for index, key in expected.items():
+            self.assertTrue(key in errors[index]
+                            or errors[index].get('detail') == key,
+                            errors[index])
+        return errors
+
+    def test_create_reports_errors_and_writes_nothing(self):
+        response, _ = self.bulk('post', '/api/tenders/bulk', [
+            self.tender_data(), self.tender_data(name=''),
+            self.tender_data(), 'tender',
+            self.tender_data(creator=self.outsider.id),
+            self.tender_data(service_type='unknown')])
+        self.assertErrors(response, {
+            1: 'name', 3: 'Object expected.',
+            4: 'Вы не ответственны за организацию', 5: 'service_type'})
+        self.assertEqual(response.json()['created'], [])
+        self.assertEqual(Tender.objects.count(), 3)
+        self.assertFalse(Change.objects.exists())
+
+    def test_update_reports_errors_and_changes_nothing(self):
+        first, second, third = self.tenders
+        response, _ = self.bulk('patch', '/api/tenders/bulk', [
+            {'id': first.id, 'creator': self.employee.id,
+             'description': 'changed'},
+            {'id': second.id, 'creator': self.employee.id,
+             'description': 'changed', 'expected_version': 5},
+            {'id': 0, 'creator': self.employee.id},
+            {'id': first.id, 'creator': self.employee.id},
+            {'id': third.id, 'creator': self.employee.id,
+             'status': 'unknown'}])
+        self.assertErrors(response, {1: 'Version conflict.', 2: 'Not found.',
+                                     3: 'Duplicate id.', 4: 'status'})
+        for tender in Tender.objects.all():
+            self.assertEqual(tender.version, 1)
+            self.assertTrue(tender.description.startswith('description'))
+        self.assertFalse(TenderVersion.objects.exists())
+        self.assertFalse(Change.objects.exists())
+
+    def test_update_applies_whole_batch(self):
+        response, _ = self.bulk('patch', '/api/tenders/bulk', [
+            {'id': tender.id, 'creator': self.employee.id,
+             'description': 'changed', 'expected_version': 1}
+            for tender in self.tenders])
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(response.json()['updated']), 3)
+        self.assertEqual(set(Tender.objects.values_list(
+            'description', 'version')), {('changed', 2)})
+        self.assertEqual(TenderVersion.objects.count(), 3)
+
+    def test_query_count_does_not_depend_on_batch_size(self):
+        for method, url, item in (
+                ('post', '/api/tenders/bulk', self.tender_data()),
+                ('post', '/api/bids/bulk', self.bid_data())):
+            with self.subTest(url=url):
+                # Первый пакет еще и создает строку ObjectStats
+                self.bulk(method, url, [item])
+                counts = []
+                for size in (1, 20):
+                    responsibility.cache.clear()
+                    response, queries = self.bulk(method, url, [item] * size)
+                    self.assertEqual(response.status_code, 201)
+                    self.assertEqual(len(response.json()['created']), size)
+                    counts.append(queries)
+                self.assertEqual(counts[0], counts[1])
+
+        counts = []
+        for size in (1, 3):
+            responsibility.cache.clear()
+            response, queries = self.bulk('patch', '/api/tenders/bulk', [
+                {'id': tender.id, 'creator': self.employee.id,
+                 'name': f'changed {size}'}
+                for tender in self.tenders[:size]])
+            self.assertEqual(response.status_code, 200)
+            counts.append(queries)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_bid_tender_is_required_and_validated(self):
+        data = self.bid_data()
+        del data['tender']
+        response, _ = self.bulk('post', '/api/bids/bulk', [
+            self.bid_data(), data, self.bid_data(tender=0),
+            self.bid_data(tender='x'), self.bid_data(tender=True)])
+        errors = self.assertErrors(response, {1: 'tender', 2: 'tender',
+                                              3: 'tender', 4: 'tender'})
+        self.assertEqual([errors[index]['tender'] for index in range(1, 5)],
+                         [['This field is required.'],
+                          ['Invalid pk "0" - object does not exist.'],
+                          ['Incorrect type. Expected pk value, received '
+                           'str.'],
+                          ['Incorrect type. Expected pk value, received '
+                           'bool.']])
+        self.assertFalse(Bid.objects.exists())
+
+        response = APIClient().post('/api/bids/new', data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('tender', response.json())
+        response, _ = self.bulk('post', '/api/bids/bulk', [self.bid_data()])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Bid.objects.get().tender, self.tenders[0])
+
+
+@override_settings(THROTTLE_RATES={}, DATABASE_REPLICAS=[])
+class ArchiveRoundTripTests(TestCase):
+    """
+    archive_tenders и restore_tenders: строки, представления *WithArchive,
+    ?include_archived=, журнал изменений и счетчики ObjectStats
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee, cls.organization = create_responsible()
+        cls.closed = create_tenders(cls.employee, cls.organization, 2,
+                                    status='CLOSED')
+        cls.open, = create_tenders(cls.employee, cls.organization, 1)
+        for tender in cls.closed + [cls.open]:
+            TenderVersion.objects.create(tender=tender, name=tender.name,
+                                         status='CREATED', version=1)
+            for index in range(2):
+                bid = Bid.objects.create(
+                    name=f'bid {index}', tender=tender, creator=cls.employee,
+                    organization=cls.organization, status='PUBLISHED')
+                BidVersion.objects.create(bid=bid, name=bid.name,
+                                          status='CREATED', version=1)
+                Review.objects.create(bid=bid, author=cls.employee,
+                                      content='отзыв')
+        Tender.objects.filter(pk__in=[tender.pk for tender in cls.closed]) \
+            .update(updated_at=timezone.now() - datetime.timedelta(days=60))
+        stats.reconcile()
+
+    def snapshot(self):
+        """Строки действующих таблиц и счетчики"""
+        return {model.__name__: list(model.objects.order_by('id').values())
+                for model in (Tender, TenderVersion, Bid, BidVersion,
+                              Review, ObjectStats)}
+
+    def get_ids(self, url):
+        response = APIClient().get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return {row['id'] for row in response.json()['results']}
+
+    def test_archive_and_restore(self):
+        before = self.snapshot()
+        closed_ids = {tender.id for tender in self.closed}
+        closed_bids = set(Bid.objects.filter(tender_id__in=closed_ids)
+                          .values_list('id', flat=True))
+        all_ids = closed_ids | {self.open.id}
+
+        call_command('archive_tenders', days=30, stdout=io.StringIO())
+        self.assertEqual(set(Tender.objects.values_list('id', flat=True)),
+                         {self.open.id})
+        for model, count in ((ArchivedTender, 2), (ArchivedTenderVersion, 2),
+                             (ArchivedBid, 4), (ArchivedBidVersion, 4),
+                             (ArchivedReview, 4)):
+            self.assertEqual(model.objects.count(), count, model.__name__)
+        self.assertEqual(set(TenderWithArchive.objects
+                             .values_list('id', flat=True)), all_ids)
+        self.assertEqual(BidWithArchive.objects.count(), 6)
+
+        self.assertEqual(self.get_ids('/api/tenders'), {self.open.id})
+        self.assertEqual(self.get_ids('/api/tenders?include_archived=true'),
+                         all_ids)
+        self.assertEqual(
+            self.get_ids('/api/tenders?include_archived=true&status=CLOSED'),
+            closed_ids)
+        archived = self.closed[0]
+        url = f'/api/tenders/{archived.id}'
+        self.assertEqual(APIClient().get(url).status_code, 404)
+        response = APIClient().get(f'{url}?include_archived=true')
+        self.assertEqual(response.json()['name'], archived.name)
+        self.assertEqual(len(self.get_ids('/api/bids')), 2)
+        self.assertEqual(
+            len(self.get_ids('/api/bids?include_archived=true')), 6)
+        self.assertEqual(
+            APIClient().get(f'/api/bids/{archived.id}/list').status_code, 404)
+        self.assertEqual(
+            len(self.get_ids(f'/api/bids/{archived.id}/list'
+                             f'?include_archived=true')), 2)
+
+        # Перенос в архив не меняет статистику и виден в журнале
+        self.assertEqual(self.snapshot()['ObjectStats'],
+                         before['ObjectStats'])
+        self.assertEqual(stats.reconcile(fix=False), [])
+        rows = changes.fetch(0)
+        self.assertEqual({(row['kind'], row['object_id']) for row in rows},
+                         {('tender', pk) for pk in closed_ids}
+                         | {('bid', pk) for pk in closed_bids})
+        self.assertEqual({row['action'] for row in rows}, {'archived'})
+
+        call_command('restore_tenders', *closed_ids, stdout=io.StringIO())
+        self.assertEqual(self.snapshot(), before)
+        for model in (ArchivedTender, ArchivedTenderVersion, ArchivedBid,
+                      ArchivedBidVersion, ArchivedReview):
+            self.assertFalse(model.objects.exists(), model.__name__)
+        self.assertEqual(stats.reconcile(fix=False), [])
+        restored = changes.fetch(rows[-1]['seq'])
+        self.assertEqual({(row['kind'], row['object_id'], row['action'])
+                          for row in restored},
+                         {('tender', pk, 'restored') for pk in closed_ids}
+                         | {('bid', pk, 'restored') for pk in closed_bids})
+        self.assertTrue(all(row['data']['id'] == row['object_id']
+                            for row in restored))
+
+
+@override_settings(THROTTLE_RATES={}, DATABASE_REPLICAS=[])
+class AsOfTests(TestCase):
+    """?as_of= отдает состояние объектов на момент времени"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee, organization = create_responsible()
+        cls.edited, cls.twice, cls.untouched = create_tenders(
+            cls.employee, organization, 3)
+        cls.bid = Bid.objects.create(name='bid', tender=cls.untouched,
+                                     creator=cls.employee,
+                                     organization=organization)
+
+    def change(self, url, data):
+        response = APIClient().patch(
+            url, {**data, 'creator': self.employee.id}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as captured:
+            response = APIClient().get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json(), [query['sql'] for query in captured]
+
+    def names(self, url):
+        data, _ = self.get(url)
+        return {row['id']: (row['name'], row['status'], row['version'])
+                for row in data['results']}
+
+    def test_list_and_object_return_historical_state(self):
+        self.change(f'/api/tenders/{self.twice.id}/status',
+                    {'status': 'PUBLISHED'})
+        as_of = quote(timezone.now().isoformat())
+        self.change(f'/api/tenders/{self.edited.id}/edit',
+                    {'name': 'renamed'})
+        self.change(f'/api/tenders/{self.edited.id}/status',
+                    {'status': 'CLOSED'})
+        self.change(f'/api/tenders/{self.twice.id}/status',
+                    {'status': 'CLOSED'})
+        self.change(f'/api/bids/{self.bid.id}/status',
+                    {'status': 'PUBLISHED'})
+        create_tenders(self.employee, self.edited.organization, 1,
+                       name='created later')
+
+        self.assertEqual(self.names(f'/api/tenders?as_of={as_of}'), {
+            self.edited.id: ('tender 0', 'CREATED', 1),
+            self.twice.id: ('tender 1', 'PUBLISHED', 2),
+            self.untouched.id: ('tender 2', 'CREATED', 1)})
+        self.assertEqual(
+            set(self.names(f'/api/tenders?as_of={as_of}&status=CREATED')),
+            {self.edited.id, self.untouched.id})
+        self.assertEqual(
+            set(self.names(f'/api/tenders?as_of={as_of}&status=PUBLISHED')),
+            {self.twice.id})
+        self.assertEqual(
+            self.names(f'/api/tenders?as_of={as_of}&status=CLOSED'), {})
+        self.assertEqual(set(self.names('/api/tenders?status=CLOSED')),
+                         {self.edited.id, self.twice.id})
+        self.assertEqual(
+            set(self.names(f'/api/tenders?as_of={as_of}&status=CREATED'
+                           f'&service_type=Construction')), set())
+
+        data, _ = self.get(f'/api/tenders/{self.edited.id}?as_of={as_of}')
+        self.assertEqual((data['name'], data['status'], data['version']),
+                         ('tender 0', 'CREATED', 1))
+        self.assertEqual(
+            set(self.names(f'/api/bids?as_of={as_of}&status=CREATED')),
+            {self.bid.id})
+        self.assertEqual(
+            self.names(f'/api/bids?as_of={as_of}&status=PUBLISHED'), {})
+
+    def test_status_filter_uses_window_not_per_row_subquery(self):
+        as_of = quote(timezone.now().isoformat())
+        _, queries = self.get(f'/api/tenders?as_of={as_of}&status=CREATED')
+        listing = next(sql for sql in queries
+                       if 'FROM "tenders_tender"' in sql
+                       and 'COUNT' not in sql)
+        self.assertIn('ROW_NUMBER', listing)
+        # Подзапросы к версиям не ссылаются на строку списка
+        self.assertNotRegex(listing, r'= \(?"tenders_tender"\."id"')
+
+
+@override_settings(THROTTLE_RATES={}, DATABASE_REPLICAS=[])
+class StatsReconcileTests(TestCase):
+    """
+    Счетчики ObjectStats, измененные приращениями, совпадают с пересчетом
+    по таблицам после создания, смены статуса, удаления и архивации
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee, cls.organization = create_responsible()
+        cls.other, cls.other_organization = create_responsible('other')
+
+    def setUp(self):
+        responsibility.cache.clear()
+
+    def request(self, method, url, data, status_code=200):
+        response = getattr(APIClient(), method)(url, data, format='json')
+        self.assertEqual(response.status_code, status_code, response.content)
+        return response.json() if response.content else None
+
+    def tender_data(self, employee, organization, **kwargs):
+        return {'name': 'tender', 'description': 'description',
+                'service_type': 'IT', 'creator': employee.id,
+                'organization': organization.id, **kwargs}
+
+    def assertCountersMatch(self):
+        counters = {
+            (row.kind, row.organization_id, row.status, row.service_type):
+                row.count
+            for row in ObjectStats.objects.filter(count__gt=0)}
+        self.assertEqual(counters, stats.actual_counts())
+        self.assertEqual(stats.reconcile(fix=False), [])
+
+    def test_counters_match_reconcile(self):
+        first = self.request('post', '/api/tenders/new', self.tender_data(
+            self.employee, self.organization), 201)
+        created = self.request('post', '/api/tenders/bulk', [
+            self.tender_data(self.employee, self.organization,
+                             service_type='Construction'),
+            self.tender_data(self.other, self.other_organization)], 201)
+        second, third = created['created']
+        bids = [self.request('post', '/api/bids/new', {
+            'name': 'bid', 'description': 'description',
+            'tender': tender['id'], 'creator': employee.id,
+            'organization': organization.id}, 201)
+            for tender in (first, second, third)
+            for employee, organization in (
+                (self.employee, self.organization),
+                (self.other, self.other_organization))]
+        self.assertCountersMatch()
+
+        self.request('patch', f'/api/tenders/{first["id"]}/status',
+                     {'status': 'CLOSED', 'creator': self.employee.id})
+        self.request('patch', f'/api/bids/{bids[0]["id"]}/status',
+                     {'status': 'PUBLISHED', 'creator': self.employee.id})
+        self.request('patch', '/api/tenders/bulk', [
+            {'id': third['id'], 'creator': self.other.id,
+             'status': 'PUBLISHED'}])
+        self.assertCountersMatch()
+
+        # Удаление тендера уменьшает и счетчики его предложений
+        self.request('delete', f'/api/tenders/{second["id"]}',
+                     {'creator': self.employee.id}, 204)
+        self.request('delete', f'/api/bids/{bids[4]["id"]}',
+                     {'creator': self.employee.id}, 204)
+        self.assertCountersMatch()
+
+        Tender.objects.filter(pk=first['id']).update(
+            updated_at=timezone.now() - datetime.timedelta(days=60))
+        call_command('archive_tenders', days=30, stdout=io.StringIO())
+        self.assertFalse(Tender.objects.filter(pk=first['id']).exists())
+        self.assertCountersMatch()
+
+        out = io.StringIO()
+        call_command('reconcile_stats', '--dry-run', '--fail', stdout=out)
+        self.assertIn('Расхождений нет', out.getvalue())
+
+    def test_reconcile_stats_fixes_drift(self):
+        create_tenders(self.employee, self.organization, 1)
+        self.assertEqual(len(stats.reconcile(fix=False)), 1)
+        with self.assertRaises(CommandError):
+            call_command('reconcile_stats', '--dry-run', '--fail',
+                         stdout=io.StringIO())
+        call_command('reconcile_stats', stdout=io.StringIO())
+        self.assertCountersMatch()
+
+
+@override_settings(THROTTLE_RATES={}, DATABASE_REPLICAS=[])
+class ResponsibilityCacheTests(TestCase):
+    """Кэш прав процесса сбрасывается сразу при изменении связей"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee, cls.organization = create_responsible()
+        cls.other, _ = create_responsible('other')
+
+    def setUp(self):
+        responsibility.cache.clear()
+
+    def is_responsible(self, employee):
+        return responsibility.is_responsible(None, employee.id,
+                                             self.organization.id)
+
+    def create_tender(self):
+        return APIClient().post('/api/tenders/new', {
+            'name': 'tender', 'description': 'description',
+            'service_type': 'IT', 'creator': self.employee.id,
+            'organization': self.organization.id}, format='json')
+
+    def test_revoked_access_stops_immediately(self):
+        self.assertEqual(self.create_tender().status_code, 201)
+        with self.assertNumQueries(0):
+            self.assertTrue(self.is_responsible(self.employee))
+        OrganizationResponsible.objects.get(user=self.employee).delete()
+        self.assertFalse(self.is_responsible(self.employee))
+        self.assertEqual(self.create_tender().status_code, 403)
+
+    def test_reassigned_link_invalidates_both_users(self):
+        self.assertTrue(self.is_responsible(self.employee))
+        self.assertFalse(self.is_responsible(self.other))
+        link = OrganizationResponsible.objects.get(user=self.employee)
+        link.user = self.other
+        link.save()
+        self.assertFalse(self.is_responsible(self.employee))
+        self.assertTrue(self.is_responsible(self.other))
+
+    def test_settings_are_read_lazily(self):
+        with override_settings(RESPONSIBILITY_CACHE_SIZE=1):
+            self.assertTrue(self.is_responsible(self.employee))
+            self.assertFalse(self.is_responsible(self.other))
+            with self.assertNumQueries(1):
+                self.assertTrue(self.is_responsible(self.employee))
+        responsibility.cache.clear()
+        with override_settings(RESPONSIBILITY_CACHE_TTL=-1):
+            self.assertTrue(self.is_responsible(self.employee))
+            with self.assertNumQueries(1):
+                self.assertTrue(self.is_responsible(self.employee))
+
+
+@override_settings(THROTTLE_RATES={}, DATABASE_REPLICAS=[],
+                   EXPORT_CHUNK_SIZE=2)
+class ExportTests(TestCase):
+    """Потоковая выгрузка: формат, порции и экранирование CSV"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee, cls.organization = create_responsible()
+        cls.tenders = create_tenders(cls.employee, cls.organization, 4)
+        cls.tricky, = create_tenders(
+            cls.employee, cls.organization, 1, name='Ремонт, "под ключ"',
+            description='Первая строка\nвторая, с запятой\r\n"кавычки"')
+        cls.tenders.append(cls.tricky)
+        for tender in cls.tenders:
+            TenderVersion.objects.create(tender=tender, name=tender.name,
+                                         description=tender.description,
+                                         status='CREATED', version=1)
+
+    def export(self, url):
+        response = APIClient().get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_ndjson_spans_several_chunks(self):
+        response, content = self.export('/api/tenders/export')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(response['Content-Disposition'],
+                         'attachment; filename="tenders.ndjson"')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(
+            rows, [json.loads(JSONRenderer().render(
+                TenderSerializer(tender).data))
+                for tender in Tender.objects.order_by('id')])
+
+    def test_csv_quotes_commas_and_newlines(self):
+        response, content = self.export('/api/tenders/export?output=csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        reader = csv.DictReader(io.StringIO(content, newline=''))
+        rows = list(reader)
+        self.assertEqual(reader.fieldnames, list(TenderSerializer().fields))
+        self.assertEqual(len(rows), len(self.tenders))
+        self.assertEqual([int(row['id']) for row in rows],
+                         [tender.id for tender in self.tenders])
+        self.assertEqual((rows[-1]['name'], rows[-1]['description']),
+                         (self.tricky.name, self.tricky.description))
+
+    def test_versions_export(self):
+        _, content = self.export('/api/tenders/versions/export?output=csv')
+        rows = list(csv.DictReader(io.StringIO(content, newline='')))
+        self.assertEqual([int(row['tender']) for row in rows],
+                         [tender.id for tender in self.tenders])
+        self.assertEqual(rows[-1]['description'], self.tricky.description)
+
+    def test_unknown_format(self):
+        response = APIClient().get('/api/tenders/export?output=xml')
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(THROTTLE_RATES={}, DATABASE_REPLICAS=[],
+                   VERSION_KEYFRAME_INTERVAL=2)
+class VersionEndpointTests(TestCase):
+    """Список версий, версия целиком и разница между версиями"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee, cls.organization = create_responsible()
+        cls.tender, = create_tenders(cls.employee, cls.organization, 1,
+                                     name='Ремонт', description='Смета',
+                                     service_type='IT')
+        cls.url = f'/api/tenders/{cls.tender.id}'
+        cls.states = [{'name': 'Ремонт', 'description': 'Смета',
+                       'status': 'CREATED', 'service_type': 'IT'}]
+        for url, data in (
+                ('edit', {'description': 'Смета\nс изменениями'}),
+                ('status', {'status': 'PUBLISHED'}),
+                ('edit', {'name': 'Ремонт кровли'}),
+                ('edit', {'description': 'Смета\nс изменениями\nи итог'})):
+            response = APIClient().patch(
+                f'{cls.url}/{url}', {'creator': cls.employee.id, **data},
+                format='json')
+            assert response.status_code == 200, response.content
+            cls.states.append({**cls.states[-1], **data})
+
+    def setUp(self):
+        responsibility.cache.clear()
+
+    def diff(self, old, new):
+        response = APIClient().get(f'{self.url}/diff?from={old}&to={new}')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual((response.json()['from'], response.json()['to']),
+                         (old, new))
+        return response.json()['changes']
+
+    def expected_diff(self, old, new):
+        old, new = self.states[old - 1], self.states[new - 1]
+        return {field: {'from': old[field], 'to': new[field]}
+                for field in old if old[field] != new[field]}
+
+    def test_diff_returns_changed_fields_only(self):
+        self.assertEqual(self.diff(2, 3),
+                         {'status': {'from': 'CREATED', 'to': 'PUBLISHED'}})
+        self.assertEqual(self.diff(3, 3), {})
+        for old, new in ((1, 5), (5, 1), (1, 4), (2, 5), (4, 5)):
+            self.assertEqual(self.diff(old, new),
+                             self.expected_diff(old, new), (old, new))
+        self.assertNotIn('service_type', self.diff(1, 5))
+
+    def test_diff_errors(self):
+        client = APIClient()
+        self.assertEqual(client.get(f'{self.url}/diff?from=1').status_code,
+                         400)
+        self.assertEqual(
+            client.get(f'{self.url}/diff?from=1&to=x').status_code, 400)
+        self.assertEqual(
+            client.get(f'{self.url}/diff?from=1&to=9').status_code, 404)
+
+    def test_versions_list_and_retrieve(self):
+        client = APIClient()
+        response = client.get(f'{self.url}/versions?page_size=2')
+        first = response.json()
+        second = client.get(first['next']).json()
+        self.assertIsNone(second['next'])
+        rows = first['results'] + second['results']
+        self.assertEqual([row['version'] for row in rows], [4, 3, 2, 1])
+        self.assertEqual([row['name'] for row in rows],
+                         [state['name'] for state in self.states[3::-1]])
+        self.assertFalse(any('description' in row for row in rows))
+        for number, state in enumerate(self.states, 1):
+            response = client.get(f'{self.url}/versions/{number}')
+            self.assertEqual(response.json(), {'version': number, **state})
+        self.assertEqual(client.get(f'{self.url}/versions/9').status_code,
+                         404)
+
+
+@override_settings(THROTTLE_RATES={}, DATABASE_REPLICAS=[])
+class FieldsetQueryTests(TestCase):
+    """?fields= и ?exclude= убирают невыбранные колонки из SELECT"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee, cls.organization = create_responsible()
+        cls.tender, = create_tenders(cls.employee, cls.organization, 1)
+        cls.bid = Bid.objects.create(
+            name='bid', description='bid description', tender=cls.tender,
+            creator=cls.employee, organization=cls.organization)
+        Review.objects.create(bid=cls.bid, author=cls.employee,
+                              content='отзыв')
+
+    def setUp(self):
+        responsibility.cache.clear()
+
+    def get(self, url):
+        """Ответ и SQL всех запросов к базе"""
+        with CaptureQueriesContext(connection) as captured:
+            response = APIClient().get(url)
+            content = b''.join(response.streaming_content) \
+                if response.streaming else response.content
+        self.assertEqual(response.status_code, 200, content)
+        return content.decode(), ' '.join(query['sql']
+                                          for query in captured)
+
+    def routes(self, query):
+        tender, bid, user = self.tender.id, self.bid.id, 'tests'
+        return [
+            f'/api/tenders?{query}',
+            f'/api/tenders/{tender}?{query}',
+            f'/api/tenders/my?username={user}&{query}',
+            f'/api/tenders/{tender}/board?{query}',
+            f'/api/tenders/export?{query}',
+            f'/api/bids?{query}',
+            f'/api/bids/{bid}?{query}',
+            f'/api/bids/{tender}/list?{query}',
+        ]
+
+    def test_unselected_columns_are_not_read(self):
+        for query in ('exclude=description', 'fields=id,name,status'):
+            for url in self.routes(query):
+                content, sql = self.get(url)
+                self.assertNotIn('"description"', sql, url)
+                self.assertNotIn('description', content, url)
+                self.assertIn('"name"', sql, url)
+
+    def test_columns_are_read_without_parameters(self):
+        for url in self.routes(''):
+            content, sql = self.get(url)
+            self.assertIn('"description"', sql, url)
+            self.assertIn('description', content, url)
+
+    def test_reviews(self):
+        url = (f'/api/bids/{self.bid.id}/reviews?authorUsername=tests'
+               f'&organizationId={self.organization.id}')
+        content, sql = self.get(f'{url}&exclude=content')
+        self.assertNotIn('"content"', sql)
+        self.assertEqual(json.loads(content)[0]['id'],
+                         Review.objects.get().id)
+        self.assertNotIn('content', json.loads(content)[0])
+        _, sql = self.get(url)
+        self.assertIn('"content"', sql)
+
+    def test_unknown_field(self):
+        response = APIClient().get('/api/tenders?fields=id,unknown')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.json())
+
+
+class SyncReadURLConf:
+    """Чтение только через вьюсеты"""
+    urlpatterns = [path('api/', include(urls.router_urlpatterns))]
+
+
+class AsyncReadURLConf:
+    """Чтение через асинхронные обработчики, как при ASYNC_READ_PATH"""
+    urlpatterns = [path('api/', include(urls.async_read_urlpatterns()
+                                        + urls.router_urlpatterns))]
+
+
+@override_settings(THROTTLE_RATES={}, DATABASE_REPLICAS=[])
+class AsyncReadParityTests(TestCase):
+    """
+    Асинхронные обработчики чтения отвечают так же, как вьюсеты: статус,
+    тело, ETag и Last-Modified совпадают для каждого маршрута
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee, cls.organization = create_responsible()
+        cls.outsider, _ = create_responsible('outsider')
+        tenders = create_tenders(cls.employee, cls.organization, 4,
+                                 service_type='IT')
+        tenders += create_tenders(cls.employee, cls.organization, 1,
+                                  status='PUBLISHED', service_type='Other')
+        cls.archived, = create_tenders(cls.employee, cls.organization, 1,
+                                       status='CLOSED')
+        for tender in tenders + [cls.archived]:
+            for index in range(2):
+                bid = Bid.objects.create(
+                    name=f'bid {index}', description='описание',
+                    tender=tender, creator=cls.employee,
+                    organization=cls.organization)
+                Review.objects.create(bid=bid, author=cls.employee,
+                                      content=f'отзыв {index}')
+        cls.tender = tenders[0]
+        cls.bid = Bid.objects.filter(tender=cls.tender).first()
+        Tender.objects.filter(pk=cls.archived.pk).update(
+            updated_at=timezone.now() - datetime.timedelta(days=60))
+        call_command('archive_tenders', days=30, stdout=io.StringIO())
+
+    def setUp(self):
+        responsibility.cache.clear()
+
+    def urls(self):
+        tender, bid, archived = self.tender.id, self.bid.id, self.archived.id
+        reviews = f'/api/bids/{bid}/reviews?organizationId=' \
+                  f'{self.organization.id}'
+        result = [reviews, f'{reviews}&authorUsername=tests',
+                  f'{reviews}&authorUsername=tests&fields=id,content',
+                  f'{reviews}&authorUsername=outsider',
+                  f'/api/bids/0/reviews?authorUsername=tests'
+                  f'&organizationId={self.organization.id}',
+                  f'/api/bids/{tender}/list',
+                  f'/api/bids/{tender}/list?page_size=1',
+                  f'/api/bids/{tender}/list?exclude=description',
+                  f'/api/bids/{archived}/list',
+                  f'/api/bids/{archived}/list?include_archived=true',
+                  '/api/bids/0/list']
+        for prefix, pk in (('tenders', tender), ('bids', bid)):
+            result += [
+                f'/api/{prefix}',
+                f'/api/{prefix}?page_size=2',
+                f'/api/{prefix}?cursor=garbage',
+                f'/api/{prefix}?limit=2&offset=1',
+                f'/api/{prefix}?status=PUBLISHED',
+                f'/api/{prefix}?include_archived=true',
+                f'/api/{prefix}?fields=id,name',
+                f'/api/{prefix}?fields=unknown',
+                f'/api/{prefix}?as_of={quote(timezone.now().isoformat())}',
+                f'/api/{prefix}/{pk}',
+                f'/api/{prefix}/{pk}?exclude=description',
+                f'/api/{prefix}/0',
+                f'/api/{prefix}/my?username=tests',
+                f'/api/{prefix}/my?username=tests&fields=id',
+                f'/api/{prefix}/my?username=unknown',
+                f'/api/{prefix}/my',
+            ]
+        return result + ['/api/tenders?service_type=IT&page_size=3',
+                         f'/api/tenders/{archived}?include_archived=true',
+                         f'/api/tenders?q={quote("описание")}']
+
+    def get(self, url, urlconf, **headers):
+        with override_settings(ROOT_URLCONF=urlconf):
+            response = APIClient().get(url, headers=headers)
+        return (response.status_code, response.content and response.json(),
+                response.get('ETag'), response.get('Last-Modified'))
+
+    def assertSame(self, url, **headers):
+        sync = self.get(url, SyncReadURLConf, **headers)
+        self.assertEqual(self.get(url, AsyncReadURLConf, **headers), sync,
+                         url)
+        return sync
+
+    def test_every_async_route_is_covered(self):
+        callbacks = {resolve(url.split('?')[0], AsyncReadURLConf).func
+                     for url in self.urls()}
+        for pattern in urls.async_read_urlpatterns():
+            self.assertTrue(any(
+                getattr(callback, 'view_class', None)
+                is pattern.callback.view_class
+                and callback.view_initkwargs['viewset']
+                is pattern.callback.view_initkwargs['viewset']
+                for callback in callbacks), pattern)
+
+    def test_responses_match(self):
+        for url in self.urls():
+            status_code, data, etag, _ = self.assertSame(url)
+            if status_code != 200:
+                continue
+            if etag is not None:
+                self.assertEqual(
+                    self.assertSame(url, if_none_match=etag)[0], 304, url)
+            if isinstance(data, dict) and data.get('next'):
+                self.assertSame(data['next'])
+
+
+class ExplainQueriesTests(TestCase):
+    """explain_queries строит планы запросов, выполненных эндпоинтами"""
+
+    def test_plans_captured_queries(self):
+        out = io.StringIO()
+        call_command('explain_queries', '--scale', '10', '--versions', '2',
+                     '--route', 'GET /tenders?q=', '--route',
+                     'GET /tenders/{id}/board', '--verbose-plan',
+                     stdout=out)
+        output = out.getvalue()
+        self.assertIn('OK        GET /tenders?q=', output)
+        self.assertIn('OK        GET /tenders/{id}/board', output)
+        # Печатается запрос полнотекстового поиска, выполненный эндпоинтом
+        # (SQLite: MATCH по FTS5, PostgreSQL: @@ по tsvector)
+        self.assertRegex(output, r'SELECT .*"tenders_tender".*(MATCH|@@)')
+        self.assertFalse(Tender.objects.exists())
+
+
+# Число запросов к базе для первого выполнения каждого маршрута
+# benchmark_endpoints на данных generate(). Не зависит от объема данных:
+# рост числа — регрессия (N+1), уменьшение — повод обновить значение здесь
+QUERY_COUNTS = {
+    'GET /tenders': 2,
+    'GET /tenders?status=': 2,
+    'GET /tenders?service_type=&status=': 2,
+    'GET /tenders?q=': 2,
+    'GET /tenders?limit=&offset=': 3,
+    'GET /tenders?cursor=': 2,
+    'GET /tenders?exclude=description': 2,
+    'GET /tenders?fields=id,name,status': 2,
+    'GET /tenders/{id}': 1,
+    'GET /tenders/{id}?exclude=description': 1,
+    'GET /tenders?as_of=': 3,
+    'GET /tenders/{id}?as_of=': 2,
+    'GET /tenders/my': 3,
+    'POST /tenders/new': 8,
+    'POST /tenders/new (replay)': 1,
+    'POST /tenders/bulk': 8,
+    'PATCH /tenders/{id}/edit': 8,
+    'PUT /tenders/{id}': 9,
+    'PATCH /tenders/{id}/status': 9,
+    'PUT /tenders/{id}/rollback/{version}': 10,
+    'GET /tenders/{id}/versions': 3,
+    'GET /tenders/{id}/diff': 2,
+    'GET /tenders/{id}/board': 2,
+    'GET /tenders/stats': 1,
+    'GET /tenders/export': 1,
+    'GET /bids': 2,
+    'GET /bids?exclude=description': 2,
+    'GET /bids?fields=id,name,status': 2,
+    'GET /bids?status=': 2,
+    'GET /bids/{id}': 1,
+    'GET /bids?as_of=': 3,
+    'GET /bids/my': 3,
+    'POST /bids/new': 9,
+    'PATCH /bids/{id}/edit': 8,
+    'PATCH /bids/{id}/status': 7,
+    'PUT /bids/{id}/rollback/{version}': 8,
+    'GET /bids/{tender_id}/list': 3,
+    'GET /bids/{id}/reviews': 4,
+    'POST /bids/{id}/feedback': 7,
+    'POST /bids/{id}/feedback (replay)': 1,
+}
+
+
+@override_settings(DATABASE_REPLICAS=[], THROTTLE_RATES={})
+class RouteQueryCountTests(TestCase):
+    """Число запросов к базе для маршрутов benchmark_endpoints"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = generate(300, prefix='tests')
+
+    def test_query_counts(self):
+        cases = routes(self.data)
+        self.assertEqual([case[0] for case in cases], list(QUERY_COUNTS))
+        client = APIClient()
+        for name, method, url, body, *headers in cases:
+            with self.subTest(route=name):
+                # Холодный кэш ответственности, как в benchmark_endpoints
+                responsibility.cache.clear()
+                with self.assertNumQueries(QUERY_COUNTS[name]):
+                    response = getattr(client, method)(
+                        url, body, format='json', **dict(*headers))
+                    content = b''.join(response.streaming_content) \
+                        if response.streaming else response.content
+                self.assertLess(response.status_code, 400, content[:200])
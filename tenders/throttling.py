@@ -0,0 +1,239 @@
+"""
+Ограничение частоты запросов корзинами токенов.
+
+Запрос расходует токен из корзины клиентского IP и корзин сотрудника и
+организации, если в запросе указана пара сотрудник (creator или
+username) и организация и сотрудник отвечает за организацию
+(tenders.responsibility, как в проверке прав). Без такой проверки
+клиент мог бы расходовать корзины чужих сотрудников и организаций.
+Массовая операция расходует по токену на элемент пакета, но не больше
+емкости корзины. Корзина для скорости 'N/период' вмещает N токенов и
+равномерно пополняется, поэтому клиент может сделать N запросов
+подряд, а затем — не чаще N за период. Токены списываются, только если
+их хватает во всех корзинах запроса. Для чтения, поиска (?q=) и
+изменений скорости разные (THROTTLE_RATES). Корзины хранятся в памяти
+процесса или, если задан THROTTLE_CACHE, в общем кэше Django, и тогда
+ограничение действует на все воркеры. Кэш не поддерживает атомарное
+чтение с записью, поэтому при одновременных запросах одного клиента в
+разных воркерах ограничение приблизительное
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import BaseThrottle
+
+from .responsibility import employee_id_for_username, is_responsible
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Поля запроса с сотрудником (id или username) и его организацией
+USER_ID_FIELDS = ('creator',)
+USERNAME_FIELDS = ('username', 'authorUsername')
+ORGANIZATION_FIELDS = ('organization', 'organizationId')
+# Не больше стольких пар сотрудник-организация проверяется на запрос
+MAX_KEYS = 20
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'100/min' -> (емкость, токенов в секунду); пустая строка — None"""
+    if not rate:
+        return None
+    count, period = rate.split('/')
+    count = int(count)
+    return count, count / PERIODS[period[0]]
+
+
+def _refill(bucket, now, capacity, rate):
+    tokens, updated = bucket or (capacity, now)
+    return min(capacity, tokens + max(0.0, now - updated) * rate)
+
+
+def _take(buckets, now, capacity, rate, cost=1):
+    """
+    Новое состояние корзин и время ожидания: 0, если cost токенов есть в
+    каждой корзине, иначе время до их появления в самой пустой
+    """
+    cost = min(cost, capacity)
+    tokens = {key: _refill(bucket, now, capacity, rate)
+              for key, bucket in buckets.items()}
+    lowest = min(tokens.values())
+    if lowest < cost:
+        return {key: (value, now) for key, value in tokens.items()}, \
+            (cost - lowest) / rate
+    return {key: (value - cost, now) for key, value in tokens.items()}, 0
+
+
+class LocalBuckets:
+    """Корзины в памяти процесса с вытеснением давно не использованных"""
+
+    def __init__(self, max_size=100000):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, keys, capacity, rate, cost=1):
+        with self._lock:
+            buckets, wait = _take({key: self._data.get(key) for key in keys},
+                                  time.monotonic(), capacity, rate, cost)
+            for key, bucket in buckets.items():
+                self._data[key] = bucket
+                self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+        return wait
+
+    async def atake(self, keys, capacity, rate, cost=1):
+        return self.take(keys, capacity, rate, cost)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class CacheBuckets:
+    """
+    Корзины в кэше Django. Запись живет, пока корзина не наполнится
+    заново, поэтому кэш не хранит корзины неактивных клиентов
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def take(self, keys, capacity, rate, cost=1):
+        buckets, wait = _take(
+            {key: None for key in keys} | self.cache.get_many(keys),
+            time.time(), capacity, rate, cost)
+        self.cache.set_many(buckets, math.ceil(capacity / rate) + 1)
+        return wait
+
+    async def atake(self, keys, capacity, rate, cost=1):
+        buckets, wait = _take(
+            {key: None for key in keys} | await self.cache.aget_many(keys),
+            time.time(), capacity, rate, cost)
+        await self.cache.aset_many(buckets, math.ceil(capacity / rate) + 1)
+        return wait
+
+
+local_buckets = LocalBuckets()
+
+
+def get_buckets():
+    alias = getattr(settings, 'THROTTLE_CACHE', '')
+    return CacheBuckets(caches[alias]) if alias else local_buckets
+
+
+def get_scope(request):
+    if request.method not in SAFE_METHODS:
+        return 'write'
+    if request.GET.get('q'):
+        return 'search'
+    return 'read'
+
+
+def _first(source, fields):
+    for field in fields:
+        value = source.get(field)
+        if isinstance(value, (str, int)) and value != '':
+            return value
+    return None
+
+
+def claims(request, data=None):
+    """
+    Пары (id сотрудника, username, организация), указанные в запросе:
+    в параметрах и в теле или в каждом элементе пакета
+    """
+    pairs = []
+    items = data if isinstance(data, list) else [data]
+    for source in [request.GET, *items]:
+        if not isinstance(source, dict):
+            continue
+        organization = _first(source, ORGANIZATION_FIELDS)
+        user_id = _first(source, USER_ID_FIELDS)
+        username = _first(source, USERNAME_FIELDS)
+        if organization is not None and (user_id, username) != (None, None):
+            pair = (user_id, username, organization)
+            if pair not in pairs:
+                pairs.append(pair)
+    return pairs[:MAX_KEYS]
+
+
+def verified_identities(request, pairs):
+    """
+    Сотрудники и организации из пар, в которых сотрудник отвечает за
+    организацию. Результаты проверок запоминаются в запросе и кэше
+    ответственности, поэтому проверка прав представления их не повторяет
+    """
+    identities = set()
+    for user_id, username, organization in pairs:
+        if user_id is None:
+            user_id = employee_id_for_username(request, username)
+        if user_id is not None \
+                and is_responsible(request, user_id, organization):
+            identities.add(('user', int(user_id)))
+            identities.add(('organization', int(organization)))
+    return identities
+
+
+def client_keys(request, scope, identities=()):
+    """Ключи корзин запроса: IP клиента, сотрудники и организации"""
+    ident = BaseThrottle().get_ident(request)
+    return [f'throttle:{scope}:ip:{ident}',
+            *(f'throttle:{scope}:{kind}:{value}'
+              for kind, value in sorted(identities))]
+
+
+def request_cost(data):
+    """Число токенов запроса: по одному на элемент пакета"""
+    return max(len(data), 1) if isinstance(data, list) else 1
+
+
+def _limits(request):
+    scope = get_scope(request)
+    rates = getattr(settings, 'THROTTLE_RATES', {})
+    return scope, parse_rate(rates.get(scope))
+
+
+def check(request, data=None):
+    """Время ожидания в секундах, если запрос нужно отклонить, иначе 0"""
+    scope, limit = _limits(request)
+    if limit is None:
+        return 0
+    identities = verified_identities(request, claims(request, data))
+    return get_buckets().take(client_keys(request, scope, identities),
+                              *limit, request_cost(data))
+
+
+async def acheck(request):
+    """Асинхронный вариант check для запросов без тела"""
+    scope, limit = _limits(request)
+    if limit is None:
+        return 0
+    pairs = claims(request)
+    identities = await sync_to_async(verified_identities)(request, pairs) \
+        if pairs else ()
+    return await get_buckets().atake(
+        client_keys(request, scope, identities), *limit)
+
+
+def throttled_detail(wait):
+    """Текст ошибки и Retry-After в том виде, в котором их отдает DRF"""
+    exc = Throttled(wait)
+    return exc.detail, str(exc.wait)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Ограничение частоты для вьюсетов DRF"""
+
+    def allow_request(self, request, view):
+        self.wait_time = check(request, request.data)
+        return not self.wait_time
+
+    def wait(self):
+        return self.wait_time
@@ -1,18 +1,66 @@
-from django.urls import path, include
-from rest_framework.routers import SimpleRouter
-from .views import TenderViewSet, BidViewSet, ping
-
-tender_router = SimpleRouter(
-    trailing_slash=False)  # убрать trailing_slash=False
-# что бы маршруты работали с / на конце
-tender_router.register(r'tenders', TenderViewSet)
-
-bid_router = SimpleRouter(trailing_slash=False)  # убрать trailing_slash=False
-# что бы маршруты работали с / на конце
-bid_router.register(r'bids', BidViewSet)
-
-urlpatterns = [
-    path('ping', ping, name='ping'),
-    path('', include(tender_router.urls)),
-    path('', include(bid_router.urls)),
-]
+from django.conf import settings
+from django.urls import path, include
+from rest_framework.routers import SimpleRouter
+from .changes import changes_feed, changes_stream
+from .views import TenderViewSet, BidViewSet, ping, metrics
+
+tender_router = SimpleRouter(
+    trailing_slash=False)  # убрать trailing_slash=False
+# что бы маршруты работали с / на конце
+tender_router.register(r'tenders', TenderViewSet)
+
+bid_router = SimpleRouter(trailing_slash=False)  # убрать trailing_slash=False
+# что бы маршруты работали с / на конце
+bid_router.register(r'bids', BidViewSet)
+
+urlpatterns = [
+    path('ping', ping, name='ping'),
+    path('metrics', metrics, name='metrics'),
+    path('changes', changes_feed, name='changes'),
+    path('changes/stream', changes_stream, name='changes-stream'),
+]
+
+
+def async_read_urlpatterns():
+    """
+    Маршруты асинхронных обработчиков чтения (tenders.async_views).
+    Перекрывают маршруты роутеров; остальные методы на тех же адресах
+    обрабатывает вьюсет
+    """
+    from .async_views import (AsyncListView, AsyncDetailView,
+                              AsyncMyListView, AsyncTenderBidsView,
+                              AsyncBidReviewsView)
+
+    patterns = []
+    for prefix, viewset in (('tenders', TenderViewSet),
+                            ('bids', BidViewSet)):
+        patterns += [
+            path(prefix, AsyncListView.as_view(
+                viewset=viewset,
+                fallback=viewset.as_view({'get': 'list',
+                                          'post': 'create'}))),
+            path(f'{prefix}/my', AsyncMyListView.as_view(viewset=viewset)),
+            path(f'{prefix}/<int:pk>', AsyncDetailView.as_view(
+                viewset=viewset,
+                fallback=viewset.as_view({'get': 'retrieve',
+                                          'put': 'update',
+                                          'patch': 'partial_update',
+                                          'delete': 'destroy'}))),
+        ]
+    return patterns + [
+        path('bids/<int:pk>/list',
+             AsyncTenderBidsView.as_view(viewset=BidViewSet)),
+        path('bids/<int:pk>/reviews',
+             AsyncBidReviewsView.as_view(viewset=BidViewSet)),
+    ]
+
+
+# Маршруты вьюсетов
+router_urlpatterns = [
+    path('', include(tender_router.urls)),
+    path('', include(bid_router.urls)),
+]
+
+if settings.ASYNC_READ_PATH:
+    urlpatterns += async_read_urlpatterns()
+urlpatterns += router_urlpatterns
@@ -0,0 +1,90 @@
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .history import TEXT_FIELDS, VERSION_SPECS, reconstruct, summarize
+from .pagination import VersionPagination
+
+
+class VersionHistoryMixin:
+    """
+    Просмотр истории версий объекта (Tender или Bid): постраничный список
+    версий без описаний, отдельная версия целиком и разница между двумя
+    версиями. Текущее состояние объекта доступно под его текущим номером
+    версии
+    """
+
+    def get_version_states(self, instance, numbers):
+        """
+        Полные состояния объекта для номеров версий. Отсутствующие версии
+        в результат не попадают
+        """
+        parent_field, plain_fields = VERSION_SPECS[self.version_model]
+        states = {}
+        if instance.version in numbers:
+            states[instance.version] = {
+                field: getattr(instance, field)
+                for field in TEXT_FIELDS + plain_fields
+            }
+        stored = [number for number in numbers if number != instance.version]
+        if stored:
+            versions = list(self.version_model.objects.filter(**{
+                parent_field: instance, 'version__in': stored}))
+            keyframes = {obj.version: obj for obj in versions
+                         if obj.base_version is None}
+            for obj in versions:
+                states[obj.version] = reconstruct(
+                    obj, keyframes.get(obj.base_version))
+        return states
+
+    @action(detail=True, methods=['get'], url_path='versions',
+            pagination_class=VersionPagination)
+    def list_versions(self, request, pk=None):
+        """
+        Возвращает историю версий объекта от новых к старым, без описаний
+        """
+        instance = self.get_object()
+        queryset = self.version_model.objects.filter(
+            **{self.version_parent_field: instance}
+        ).defer('description')
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(summarize(page))
+
+    @action(detail=True, methods=['get'],
+            url_path='versions/(?P<version>[0-9]+)')
+    def retrieve_version(self, request, pk=None, version=None):
+        """Возвращает версию объекта целиком, включая описание"""
+        instance = self.get_object()
+        number = int(version)
+        state = self.get_version_states(instance, [number]).get(number)
+        if state is None:
+            return Response({"detail": "Version not found."},
+                            status=status.HTTP_404_NOT_FOUND)
+        return Response({'version': number, **state})
+
+    @action(detail=True, methods=['get'], url_path='diff')
+    def diff_versions(self, request, pk=None):
+        """
+        Возвращает только поля, отличающиеся между версиями from и to
+        """
+        try:
+            numbers = (int(request.query_params['from']),
+                       int(request.query_params['to']))
+        except (KeyError, ValueError):
+            return Response(
+                {"detail": "Both from and to versions are required."},
+                status=status.HTTP_400_BAD_REQUEST)
+
+        instance = self.get_object()
+        states = self.get_version_states(instance, list(numbers))
+        if any(number not in states for number in numbers):
+            return Response({"detail": "Version not found."},
+                            status=status.HTTP_404_NOT_FOUND)
+
+        old, new = states[numbers[0]], states[numbers[1]]
+        changes = {
+            field: {'from': old[field], 'to': new[field]}
+            for field in old if old[field] != new[field]
+        }
+        return Response({'from': numbers[0], 'to': numbers[1],
+                         'changes': changes})
@@ -1,303 +1,455 @@
-from django.http import HttpResponse
-from rest_framework import viewsets, status
-from rest_framework.decorators import action
-from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
-from django_filters.rest_framework import DjangoFilterBackend
-
-from .models import Tender, Bid, OrganizationResponsible, Employee, \
-    TenderVersion, BidVersion, Review
-from .serializers import TenderSerializer, BidSerializer, ReviewSerializer
-from .permissions import (
-    IsOrganizationResponsible,
-    IsTenderCreatorOrResponsible
-)
-from .filters import TenderFilter, BidFilter
-
-
-def ping(request):
-    """Простая проверка работы сервера. Возвращает 'ok'"""
-    return HttpResponse("ok", content_type="text/plain")
-
-
-class BaseTenderBidViewSet(viewsets.ModelViewSet):
-    """
-    Базовый вьюсет для управления объектами Tender и Bid.
-    Содержит общую логику для работы со статусами, версиями и правами доступа
-    """
-    filter_backends = (DjangoFilterBackend,)
-
-    def get_permissions(self):
-        """Определяет права доступа для действий update, delete и create"""
-        if self.action in ['update', 'partial_update', 'destroy']:
-            return [IsTenderCreatorOrResponsible()]
-        elif self.action == 'create':
-            return [IsOrganizationResponsible()]
-        return [AllowAny()]
-
-    def create(self, request, *args, **kwargs):
-        """
-        Создает новый объект (Tender или Bid), проверяя права на организацию
-        """
-        organization_id = request.data.get('organization')
-        creator_id = request.data.get('creator')
-        if not OrganizationResponsible.objects.filter(
-                user_id=creator_id, organization_id=organization_id
-        ).exists():
-            return Response({"detail": "Вы не ответственны за организацию"},
-                            status=status.HTTP_403_FORBIDDEN)
-        return super().create(request, *args, **kwargs)
-
-    def update(self, request, *args, **kwargs):
-        """
-        Обновляет объект, увеличивая его версию и сохраняет предыдущую версию
-        """
-        instance = self.get_object()
-        self.save_version(instance)
-        instance.version += 1
-        instance.save()
-        return super().update(request, *args, **kwargs)
-
-    def save_version(self, instance):
-        """Сохранение текущей версии объекта перед изменением"""
-        version_data = {
-            'name': instance.name,
-            'description': instance.description,
-            'status': instance.status,
-            'version': instance.version
-        }
-
-        if isinstance(instance, Tender):
-            TenderVersion.objects.create(
-                tender=instance,
-                service_type=instance.service_type,
-                **version_data
-            )
-        elif isinstance(instance, Bid):
-            BidVersion.objects.create(
-                bid=instance,
-                **version_data
-            )
-
-    @action(detail=True, methods=['put'],
-            url_path='rollback/(?P<version>[0-9]+)')
-    def rollback(self, request, pk=None, version=None):
-        """Откат к указанной версии для тендера или предложения"""
-        instance = self.get_object()
-        version_number = int(version)
-
-        if version_number >= instance.version or version_number <= 0:
-            return Response({"detail": "Invalid version for rollback."},
-                            status=status.HTTP_400_BAD_REQUEST)
-
-        if isinstance(instance, Tender):
-            version_obj = TenderVersion.objects.filter(
-                tender=instance,
-                version=version_number
-            ).first()
-        elif isinstance(instance, Bid):
-            version_obj = BidVersion.objects.filter(
-                bid=instance,
-                version=version_number
-            ).first()
-
-        if not version_obj:
-            return Response({"detail": "Version not found."},
-                            status=status.HTTP_404_NOT_FOUND)
-
-        self.save_version(instance)
-
-        instance.name = version_obj.name
-        instance.description = version_obj.description
-        instance.status = version_obj.status
-        if isinstance(instance, Tender):
-            instance.service_type = version_obj.service_type
-        instance.version += 1
-        instance.save()
-
-        return Response(
-            {"detail": f"{instance.__class__.__name__} "
-                       f"rolled back to version {version_number}."},
-            status=status.HTTP_200_OK
-        )
-
-    @action(detail=False, methods=['post'], url_path='new')
-    def create_obj(self, request):
-        """Создает новый объект"""
-        return self.create(request)
-
-    @action(detail=True, methods=['patch'], url_path='status')
-    def update_status(self, request, pk=None):
-        """
-        Обновляет статус объекта (Tender или Bid) и увеличивает его версию
-        """
-        obj = self.get_object()
-        new_status = request.data.get('status')
-        if new_status not in ['CREATED', 'PUBLISHED', 'CLOSED']:
-            return Response({"detail": "Invalid status."},
-                            status=status.HTTP_400_BAD_REQUEST)
-        obj.status = new_status
-        obj.version += 1
-        obj.save()
-        return Response({'status': 'status updated'},
-                        status=status.HTTP_200_OK)
-
-    @action(detail=False, methods=['get'], url_path='my')
-    def list_my_items(self, request):
-        """
-        Возвращает список объектов (тендеров или предложений), созданных
-        текущим пользователем.
-        """
-        username = request.GET.get('username')
-        if not username:
-            return Response({"detail": "Username parameter is required."},
-                            status=status.HTTP_400_BAD_REQUEST)
-
-        try:
-            user = Employee.objects.get(username=username)
-        except Employee.DoesNotExist:
-            return Response({"detail": "User not found."},
-                            status=status.HTTP_404_NOT_FOUND)
-
-        queryset = self.queryset.filter(creator=user)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
-
-    @action(detail=True, methods=['patch'], url_path='edit')
-    def edit_obj(self, request, pk=None):
-        """Частично обновляет объект по ID"""
-        return self.partial_update(request)
-
-    def partial_update(self, request, *args, **kwargs):
-        """Частично обновляет объект, увеличивая версию"""
-        instance = self.get_object()
-        self.save_version(instance)
-        instance.version += 1
-        instance.save()
-        serializer = self.get_serializer(instance, data=request.data,
-                                         partial=True)
-        serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
-        return Response(serializer.data)
-
-
-class TenderViewSet(BaseTenderBidViewSet):
-    """Вьюсет для управления тендерами"""
-
-    queryset = Tender.objects.all()
-    serializer_class = TenderSerializer
-    filterset_class = TenderFilter
-
-    def update(self, request, *args, **kwargs):
-        tender = self.get_object()
-        TenderVersion.objects.create(
-            tender=tender,
-            name=tender.name,
-            description=tender.description,
-            status=tender.status,
-            service_type=tender.service_type,
-            version=tender.version
-        )
-        tender.version += 1
-        tender.save()
-        return super().update(request, *args, **kwargs)
-
-
-class BidViewSet(BaseTenderBidViewSet):
-    """Вьюсет для управления предложениями"""
-
-    queryset = Bid.objects.all()
-    serializer_class = BidSerializer
-    filterset_class = BidFilter
-
-    @action(detail=True, methods=['get'], url_path='list')
-    def list_bids_for_tender(self, request, pk=None):
-        """Возвращает список предложений для указанного тендера"""
-        try:
-            tender = Tender.objects.get(pk=pk)
-        except Tender.DoesNotExist:
-            return Response({"detail": "Tender not found."},
-                            status=status.HTTP_404_NOT_FOUND)
-        bids = Bid.objects.filter(tender=tender)
-
-        serializer = self.get_serializer(bids, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-
-    @action(detail=True, methods=['get'], url_path='reviews')
-    def list_reviews_for_bid(self, request, pk=None):
-        """
-        Возвращает список отзывов для предложения, созданного определенным
-        автором
-        """
-        author_username = request.query_params.get('authorUsername')
-        organization_id = request.query_params.get('organizationId')
-
-        if not author_username or not organization_id:
-            return Response(
-                {
-                    "detail": "Both authorUsername and organizationId "
-                              "are required."
-                },
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        try:
-            bid = Bid.objects.get(pk=pk)
-        except Bid.DoesNotExist:
-            return Response({"detail": "Bid not found."},
-                            status=status.HTTP_404_NOT_FOUND)
-
-        if not OrganizationResponsible.objects.filter(
-                user__username=author_username,
-                organization_id=organization_id).exists():
-            return Response({"detail": "Вы не ответственны за организацию."},
-                            status=status.HTTP_403_FORBIDDEN)
-
-        reviews = Review.objects.filter(bid=bid,
-                                        author__username=author_username)
-        serializer = ReviewSerializer(reviews, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-
-    @action(detail=True, methods=['post'], url_path='feedback')
-    def create_review_for_bid(self, request, pk=None):
-        """
-        Создает отзыв для предложения (Bid)
-        """
-        user = request.data.get('authorUsername')
-        organization_id = request.data.get('organizationId')
-
-        if not user or not organization_id:
-            return Response(
-                {
-                    "detail":
-                        "Both authorUsername and organizationId are required."
-                },
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        try:
-            bid = Bid.objects.get(pk=pk)
-        except Bid.DoesNotExist:
-            return Response(
-                {"detail": "Bid not found."},
-                status=status.HTTP_404_NOT_FOUND
-            )
-
-        if not OrganizationResponsible.objects.filter(
-                user__username=user,
-                organization_id=organization_id
-        ).exists():
-            return Response(
-                {"detail": "Вы не ответственны за организацию."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-
-        review_content = request.data.get('content')
-        if not review_content:
-            return Response({"detail": "Review content is required."},
-                            status=status.HTTP_400_BAD_REQUEST)
-
-        author = Employee.objects.get(username=user)
-        Review.objects.create(bid=bid, author=author, content=review_content)
-        return Response({"detail": "Review created successfully"},
-                        status=status.HTTP_201_CREATED)
+from django.db import transaction
+from django.db.models import (Count, F, IntegerField, Max, OuterRef,
+                              Prefetch, Subquery)
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.permissions import AllowAny
+from django_filters.rest_framework import DjangoFilterBackend
+
+from .models import Tender, Bid, TenderVersion, BidVersion, Review, \
+    TenderWithArchive, BidWithArchive
+from .serializers import TenderSerializer, BidSerializer, ReviewSerializer, \
+    BidBoardSerializer
+from .permissions import (
+    IsOrganizationResponsible,
+    IsTenderCreatorOrResponsible
+)
+from .filters import TenderFilter, BidFilter, TenderWithArchiveFilter, \
+    BidWithArchiveFilter, TenderAsOfFilter, BidAsOfFilter
+from .exceptions import VersionConflict
+from .archive import ARCHIVE_ACTIONS, include_archived
+from .as_of import AsOfMixin
+from .bulk import BulkMixin
+from .changes import publish, publish_deleted
+from .history import build_version, reconstruct
+from .idempotency import IdempotencyMixin
+from .export import ExportMixin
+from .fieldsets import REQUIRED_COLUMNS, FieldsetMixin, only_fields
+from .versions import VersionHistoryMixin
+from .conditional import ConditionalGetMixin, version_etag
+from .metrics import measure_serialization, render as render_metrics
+from .responsibility import is_responsible, is_responsible_by_username, \
+    employee_id_for_username
+from .throttling import TokenBucketThrottle
+from .stats import record_created, record_deleted, record_update, summary
+
+
+def ping(request):
+    """Простая проверка работы сервера. Возвращает 'ok'"""
+    return HttpResponse("ok", content_type="text/plain")
+
+
+def metrics(request):
+    """Гистограммы запросов этого процесса в формате Prometheus"""
+    return HttpResponse(render_metrics(),
+                        content_type='text/plain; version=0.0.4')
+
+
+class BaseTenderBidViewSet(IdempotencyMixin, FieldsetMixin, AsOfMixin,
+                           ConditionalGetMixin, BulkMixin, ExportMixin,
+                           VersionHistoryMixin, viewsets.ModelViewSet):
+    """
+    Базовый вьюсет для управления объектами Tender и Bid.
+    Содержит общую логику для работы со статусами, версиями и правами доступа
+    """
+    filter_backends = (DjangoFilterBackend,)
+    throttle_classes = (TokenBucketThrottle,)
+    replica_reads = True
+    # Представление действующих и архивных объектов для чтения с
+    # ?include_archived=true
+    archive_model = None
+    archive_filterset_class = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.include_archived():
+            self.filterset_class = self.archive_filterset_class
+
+    def get_queryset(self):
+        if self.include_archived():
+            return self.archive_model.objects.all()
+        return super().get_queryset()
+
+    def include_archived(self):
+        # При генерации схемы (generate_schema) вьюсет создается без запроса
+        return self.request is not None and self.action in ARCHIVE_ACTIONS \
+            and include_archived(self.request)
+
+    def get_permissions(self):
+        """Определяет права доступа для действий update, delete и create"""
+        if self.action in ['update', 'partial_update', 'destroy']:
+            return [IsTenderCreatorOrResponsible()]
+        elif self.action == 'create':
+            return [IsOrganizationResponsible()]
+        return [AllowAny()]
+
+    def create(self, request, *args, **kwargs):
+        """
+        Создает новый объект (Tender или Bid), проверяя права на организацию
+        """
+        organization_id = request.data.get('organization')
+        creator_id = request.data.get('creator')
+        if not is_responsible(request, creator_id, organization_id):
+            return Response({"detail": "Вы не ответственны за организацию"},
+                            status=status.HTTP_403_FORBIDDEN)
+        return super().create(request, *args, **kwargs)
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            serializer.save()
+            record_created([serializer.instance])
+            publish('created', [serializer.instance],
+                    self.get_serializer_class())
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            record_deleted(instance)
+            publish_deleted(instance)
+            instance.delete()
+
+    def update(self, request, *args, **kwargs):
+        """
+        Обновляет объект, увеличивая его версию и сохраняет предыдущую версию
+        """
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+        expected_version = self.get_expected_version(request)
+        serializer = self.get_serializer(instance, data=request.data,
+                                         partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.apply_versioned_update(instance, serializer.validated_data,
+                                    expected_version)
+        return Response(self.get_serializer(instance).data,
+                        headers={'ETag': version_etag(instance)})
+
+    def get_expected_version(self, request):
+        """
+        Версия, которую клиент ожидает изменить. Берется из заголовка
+        If-Match или параметра expected_version
+        """
+        value = request.headers.get('If-Match')
+        if value:
+            value = value.strip()
+            if value == '*':
+                return None
+            value = value.removeprefix('W/').strip('"')
+        else:
+            value = request.data.get('expected_version') \
+                if hasattr(request.data, 'get') else None
+            if value is None:
+                value = request.query_params.get('expected_version')
+        if value in (None, ''):
+            return None
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValidationError({'expected_version': 'Invalid version.'})
+
+    def apply_versioned_update(self, instance, changes,
+                               expected_version=None, action='updated'):
+        """
+        Сохраняет снимок текущей версии и применяет изменения одним условным
+        UPDATE ... SET version = version + 1 WHERE id = ? AND version = ?
+        в одной транзакции. Если версия уже изменилась, возвращает 409.
+        action — тип записи в журнале изменений
+        """
+        if expected_version is None:
+            expected_version = instance.version
+        if expected_version != instance.version:
+            raise VersionConflict()
+
+        changes = dict(changes)
+        changes.pop('version', None)
+        changes['updated_at'] = timezone.now()
+        with transaction.atomic():
+            updated = type(instance).objects.filter(
+                pk=instance.pk, version=expected_version
+            ).update(version=F('version') + 1, **changes)
+            if not updated:
+                raise VersionConflict()
+            self.save_version(instance)
+            record_update(instance, changes)
+            for field, value in changes.items():
+                setattr(instance, field, value)
+            instance.version = expected_version + 1
+            publish(action, [instance], self.get_serializer_class())
+        return instance
+
+    def save_version(self, instance):
+        """Сохранение текущей версии объекта перед изменением"""
+        self.build_version(instance).save()
+
+    def build_version(self, instance, keyframe=None, load_keyframe=True):
+        """
+        Несохраненный снимок текущей версии объекта (полный или в виде
+        разницы с опорной версией, см. tenders.history)
+        """
+        return build_version(instance, keyframe, load_keyframe)
+
+    @action(detail=True, methods=['put'],
+            url_path='rollback/(?P<version>[0-9]+)')
+    def rollback(self, request, pk=None, version=None):
+        """Откат к указанной версии для тендера или предложения"""
+        instance = self.get_object()
+        version_number = int(version)
+
+        if version_number >= instance.version or version_number <= 0:
+            return Response({"detail": "Invalid version for rollback."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        version_obj = self.version_model.objects.filter(**{
+            self.version_parent_field: instance,
+            'version': version_number,
+        }).first()
+
+        if not version_obj:
+            return Response({"detail": "Version not found."},
+                            status=status.HTTP_404_NOT_FOUND)
+
+        changes = reconstruct(version_obj)
+        self.apply_versioned_update(instance, changes,
+                                    self.get_expected_version(request),
+                                    action='rollback')
+
+        return Response(
+            {"detail": f"{instance.__class__.__name__} "
+                       f"rolled back to version {version_number}."},
+            status=status.HTTP_200_OK
+        )
+
+    @action(detail=False, methods=['post'], url_path='new')
+    def create_obj(self, request):
+        """Создает новый объект"""
+        return self.create(request)
+
+    @action(detail=True, methods=['patch'], url_path='status')
+    def update_status(self, request, pk=None):
+        """
+        Обновляет статус объекта (Tender или Bid) и увеличивает его версию
+        """
+        obj = self.get_object()
+        new_status = request.data.get('status')
+        if new_status not in ['CREATED', 'PUBLISHED', 'CLOSED']:
+            return Response({"detail": "Invalid status."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        self.apply_versioned_update(obj, {'status': new_status},
+                                    self.get_expected_version(request),
+                                    action='status')
+        return Response({'status': 'status updated'},
+                        status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'], url_path='my')
+    def list_my_items(self, request):
+        """
+        Возвращает список объектов (тендеров или предложений), созданных
+        текущим пользователем.
+        """
+        username = request.GET.get('username')
+        if not username:
+            return Response({"detail": "Username parameter is required."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        user_id = employee_id_for_username(request, username)
+        if user_id is None:
+            return Response({"detail": "User not found."},
+                            status=status.HTTP_404_NOT_FOUND)
+
+        queryset = self.get_queryset().filter(creator_id=user_id)
+        return self.conditional_list(
+            request, queryset, lambda: self.paginated_response(queryset))
+
+    @action(detail=True, methods=['patch'], url_path='edit')
+    def edit_obj(self, request, pk=None):
+        """Частично обновляет объект по ID"""
+        return self.partial_update(request)
+
+
+class TenderViewSet(BaseTenderBidViewSet):
+    """Вьюсет для управления тендерами"""
+
+    queryset = Tender.objects.all()
+    serializer_class = TenderSerializer
+    filterset_class = TenderFilter
+    version_model = TenderVersion
+    version_parent_field = 'tender'
+    archive_model = TenderWithArchive
+    archive_filterset_class = TenderWithArchiveFilter
+    as_of_filterset_class = TenderAsOfFilter
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'bid_board':
+            board_bids = only_fields(
+                self.get_board_bids(), BidBoardSerializer,
+                self.response_fields, *REQUIRED_COLUMNS, 'tender')
+            queryset = queryset.prefetch_related(Prefetch(
+                'bid_set', queryset=board_bids, to_attr='board_bids'))
+        return queryset
+
+    @staticmethod
+    def get_board_bids():
+        """
+        Предложения с названием организации, числом и временем последнего
+        отзыва и числом сохраненных версий. Счетчики считаются
+        подзапросами, чтобы соединения не умножали строки
+        """
+        reviews = Review.objects.filter(bid=OuterRef('pk')).order_by() \
+            .values('bid')
+        versions = BidVersion.objects.filter(bid=OuterRef('pk')).order_by() \
+            .values('bid')
+        return Bid.objects.annotate(
+            organization_name=F('organization__name'),
+            review_count=Coalesce(
+                Subquery(reviews.annotate(count=Count('id'))
+                         .values('count')),
+                0, output_field=IntegerField()),
+            latest_review_at=Subquery(
+                reviews.annotate(latest=Max('created_at')).values('latest')),
+            version_count=Coalesce(
+                Subquery(versions.annotate(count=Count('id'))
+                         .values('count')),
+                0, output_field=IntegerField()),
+        ).order_by('-created_at', '-id')
+
+    @action(detail=False, methods=['get'], url_path='stats')
+    def stats(self, request):
+        """
+        Число тендеров по организации, статусу и типу услуг и число
+        предложений по организации и статусу. Параметр organization
+        ограничивает ответ одной организацией
+        """
+        organization_id = request.query_params.get('organization')
+        if organization_id is not None:
+            try:
+                organization_id = int(organization_id)
+            except ValueError:
+                return Response({"detail": "Invalid organization."},
+                                status=status.HTTP_400_BAD_REQUEST)
+        return Response(summary(organization_id))
+
+    @action(detail=True, methods=['get'], url_path='board')
+    def bid_board(self, request, pk=None):
+        """
+        Доска предложений тендера: тендер и все его предложения с
+        названием организации, числом отзывов, временем последнего отзыва
+        и числом версий. Два запроса независимо от числа предложений
+        """
+        tender = self.get_object()
+        with measure_serialization():
+            data = {
+                'tender': TenderSerializer(
+                    tender, fields=self.response_fields).data,
+                'bids': BidBoardSerializer(
+                    tender.board_bids, many=True,
+                    fields=self.response_fields).data,
+            }
+        return Response(data)
+
+
+class BidViewSet(BaseTenderBidViewSet):
+    """Вьюсет для управления предложениями"""
+
+    queryset = Bid.objects.all()
+    serializer_class = BidSerializer
+    filterset_class = BidFilter
+    version_model = BidVersion
+    version_parent_field = 'bid'
+    archive_model = BidWithArchive
+    archive_filterset_class = BidWithArchiveFilter
+    as_of_filterset_class = BidAsOfFilter
+
+    @action(detail=True, methods=['get'], url_path='list')
+    def list_bids_for_tender(self, request, pk=None):
+        """Возвращает список предложений для указанного тендера"""
+        tenders = TenderWithArchive.objects if self.include_archived() \
+            else Tender.objects
+        if not tenders.filter(pk=pk).exists():
+            return Response({"detail": "Tender not found."},
+                            status=status.HTTP_404_NOT_FOUND)
+        bids = self.get_queryset().filter(tender_id=pk)
+        return self.conditional_list(
+            request, bids, lambda: self.paginated_response(bids))
+
+    @action(detail=True, methods=['get'], url_path='reviews')
+    def list_reviews_for_bid(self, request, pk=None):
+        """
+        Возвращает список отзывов для предложения, созданного определенным
+        автором
+        """
+        author_username = request.query_params.get('authorUsername')
+        organization_id = request.query_params.get('organizationId')
+
+        if not author_username or not organization_id:
+            return Response(
+                {
+                    "detail": "Both authorUsername and organizationId "
+                              "are required."
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            bid = Bid.objects.get(pk=pk)
+        except Bid.DoesNotExist:
+            return Response({"detail": "Bid not found."},
+                            status=status.HTTP_404_NOT_FOUND)
+
+        if not is_responsible_by_username(request, author_username,
+                                          organization_id):
+            return Response({"detail": "Вы не ответственны за организацию."},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        author_id = employee_id_for_username(request, author_username)
+        reader = self.get_values_serializer(ReviewSerializer)
+        reviews = reader.values(
+            Review.objects.filter(bid=bid, author_id=author_id))
+        return Response(reader.represent(reviews), status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['post'], url_path='feedback')
+    def create_review_for_bid(self, request, pk=None):
+        """
+        Создает отзыв для предложения (Bid)
+        """
+        user = request.data.get('authorUsername')
+        organization_id = request.data.get('organizationId')
+
+        if not user or not organization_id:
+            return Response(
+                {
+                    "detail":
+                        "Both authorUsername and organizationId are required."
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            bid = Bid.objects.get(pk=pk)
+        except Bid.DoesNotExist:
+            return Response(
+                {"detail": "Bid not found."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        if not is_responsible_by_username(request, user, organization_id):
+            return Response(
+                {"detail": "Вы не ответственны за организацию."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        review_content = request.data.get('content')
+        if not review_content:
+            return Response({"detail": "Review content is required."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        author_id = employee_id_for_username(request, user)
+        with transaction.atomic():
+            review = Review.objects.create(bid=bid, author_id=author_id,
+                                           content=review_content)
+            publish('created', [review], ReviewSerializer)
+        return Response({"detail": "Review created successfully"},
+                        status=status.HTTP_201_CREATED)